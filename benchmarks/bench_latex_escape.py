@@ -0,0 +1,90 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+# -*- mode: python; python-indent-offset: 4 -*-
+#
+# Micro-benchmark of scripts/latex_escape.py against the clean_latex_string() that used to be
+# copy-pasted into DiVA_generator.py and generate_publication_dividers.py. Checks that both give
+# the same output (but for non-breaking spaces, now written as '~'), then times cold (every string
+# new) and warm (memoized) escaping.
+# Run from the repository root: python3 benchmarks/bench_latex_escape.py [n]
+
+import os
+import re
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+
+import latex_escape
+
+def old_clean_latex_string(text):
+    """The previous implementation, kept here as the reference."""
+    if not text: return ""
+    text = re.sub(r'\s+', ' ', text).strip()
+    parts = re.split(r'(\$.*?\$)', text)
+    mapping = {
+        '&': r'\&', '%': r'\%', '$': r'\$', '#': r'\#',
+        '_': r'\_', '{': r'\{', '}': r'\}',
+        '~': r'\textasciitilde{}', '^': r'\textasciicircum{}'
+    }
+    cleaned_parts = []
+    for part in parts:
+        if part.startswith('$') and part.endswith('$'):
+            cleaned_parts.append(part)
+        else:
+            local_mapping = mapping.copy()
+            del local_mapping['$']
+            temp_part = part
+            for char, escape in local_mapping.items():
+                temp_part = temp_part.replace(char, escape)
+            cleaned_parts.append(temp_part)
+    return "".join(cleaned_parts)
+
+def reference(text):
+    """The expected output: the previous implementation, except that a non-breaking space is
+    written as a tie ('~') instead of being collapsed like other whitespace."""
+    return old_clean_latex_string(text.replace('\u00a0', '\0')).replace('\0', '~')
+
+PIECES = ["Networking", "100 Gbps", "R&D", "50%", "C#", "file_path", "{Braces}", "~approx",
+          "x^2", "$O(n^2)$", "$", "  spaced\tout\n", "Maguire Jr., Gerald Q.", "Kostić, Dejan"]
+
+def make_strings(n, rng):
+    return [" ".join(rng.choice(PIECES) for _ in range(rng.randint(3, 15))) for _ in range(n)]
+
+def timed(function, strings):
+    start = time.perf_counter()
+    for s in strings:
+        function(s)
+    return time.perf_counter() - start
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    rng = random.Random(42)
+    strings = make_strings(n, rng)
+
+    mismatches = [s for s in strings[:5000] if reference(s) != latex_escape.clean_latex_string(s)]
+    latex_escape.clean_latex_string.cache_clear()
+
+    escape_uncached = latex_escape.clean_latex_string.__wrapped__
+    old = timed(old_clean_latex_string, strings)
+    new = timed(escape_uncached, strings)
+    latex_escape.clean_latex_string.cache_clear()
+    new_memoized = timed(latex_escape.clean_latex_string, strings)
+    # memoization pays off on repeated strings (author names, role labels), so time a
+    # workload that draws n strings from a pool of 2000 distinct ones
+    repeated = [rng.choice(strings[:2000]) for _ in range(n)]
+    old_repeated = timed(old_clean_latex_string, repeated)
+    # each timed run starts from an empty cache, so only the repeats within it are hits
+    latex_escape.clean_latex_string.cache_clear()
+    warm = timed(latex_escape.clean_latex_string, repeated)
+
+    print(f"{n} strings")
+    print(f"  old implementation        {old:8.3f}s")
+    print(f"  new, not memoized         {new:8.3f}s  ({old / new:5.1f}x)")
+    print(f"  new, memoized             {new_memoized:8.3f}s  ({old / new_memoized:5.1f}x)")
+    print(f"{n} strings drawn from 2000 distinct ones")
+    print(f"  old implementation        {old_repeated:8.3f}s")
+    print(f"  new, memoized             {warm:8.3f}s  ({old_repeated / warm:5.1f}x)")
+    print(f"  output mismatches: {len(mismatches)}")
+    sys.exit(1 if mismatches else 0)
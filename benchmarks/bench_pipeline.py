@@ -0,0 +1,259 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+# -*- mode: python; python-indent-offset: 4 -*-
+#
+# Synthetic-scale benchmark of the publication pipeline.
+#
+# For each size it generates, in a temporary directory, a publications_map.json with that many
+# records (a configurable fraction of them 'included'), a matching references.bib, a DiVA MODS
+# export (replayed through the offline response cache) and a padded custom_configuration.tex.
+# It then times each stage and prints the results as JSON, so runs on different versions can be
+# compared. Every --repeat run of a stage starts from the same files; the warm time of a stage
+# (caches filled by a previous run) is reported separately. Run from the repository root:
+#
+#   python3 benchmarks/bench_pipeline.py --sizes 1000 10000 --output bench.json
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import hashlib
+import argparse
+import platform
+import tempfile
+import subprocess
+import contextlib
+from xml.sax.saxutils import escape
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.join(REPO_ROOT, 'scripts'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import http_cache
+import bib_cache
+import latex_escape
+import DiVA_discovery
+import DiVA_generator
+import generate_publication_dividers
+import generate_thesis_contributions
+import build_publications
+import merge_config
+from bench_title_index import make_vocabulary, make_title, perturb
+
+KTHID = 'u1bench0'
+PUBTYPES = ['article', 'conferencePaper', 'patent', 'report', 'book', 'chapter']
+LABEL_PREFIXES = ['paper', 'patent', 'artifact', 'report']
+CREDIT_ROLES = ["Conceptualization", "Data Curation", "Formal Analysis", "Investigation",
+                "Methodology", "Software", "Writing – Original Draft", "Writing – Review & Editing"]
+AUTHORS = ["Maguire Jr., Gerald Q.", "Kostić, Dejan", "Farshin, Alireza", "Roozbeh, Amir",
+           "Noz, Marilyn E.", "Barbette, Tom", "Olivecrona, Henrik"]
+
+def make_dataset(size, included_fraction, bib_fraction, rng):
+    """Returns (pub_map, bib_entries, mods_records) for size synthetic publications."""
+    vocabulary = make_vocabulary(rng)
+    pub_map, bib_entries, mods_records = {}, [], []
+    n_included = int(size * included_fraction)
+    for i in range(size):
+        diva_id = f"diva2:{100000 + i}"
+        title = make_title(rng, vocabulary)
+        year = str(rng.randint(1980, 2025))
+        pubtype = rng.choice(PUBTYPES)
+        bib_key = None
+        if rng.random() < bib_fraction or i < n_included:
+            bib_key = f"key{i}"
+            bib_entries.append({'ID': bib_key, 'title': perturb(title, rng, vocabulary) if rng.random() < 0.2 else title,
+                                'year': year, 'authors': rng.sample(AUTHORS, rng.randint(1, 5))})
+        record = {
+            "title": title, "year": year, "pubtype": pubtype, "status": "unprocessed",
+            "label": None, "tab_index": None, "bib_key": bib_key, "in_bib": bib_key is not None,
+            "pdf_downloaded": False, "file_path": "Included_publications/", "pdf_pages": "",
+            "scale": 1.0, "permission_text": "",
+        }
+        if i < n_included:
+            authors = bib_entries[-1]['authors']
+            record.update({
+                "status": "included",
+                "label": f"{LABEL_PREFIXES[i % len(LABEL_PREFIXES)]}:P{i}",
+                "tab_index": i + 1,
+                "pdf_downloaded": rng.random() < 0.8,
+                "file_path": f"Included_publications/P{i}.pdf",
+                "pdf_pages": "1-2",
+                "scale": 0.9,
+                "permission_text": "Copyright \\copyright{} 2024 the authors & publisher.",
+                "credit_contributions": {a: rng.sample(CREDIT_ROLES, rng.randint(1, 6)) for a in authors},
+            })
+        # Most records are unchanged in DiVA, some get a new title, some are new to the map
+        mods_title = title if rng.random() < 0.9 else make_title(rng, vocabulary)
+        mods_records.append((diva_id, mods_title, year, pubtype))
+        if rng.random() > 0.05:
+            pub_map[diva_id] = record
+    return pub_map, bib_entries, mods_records
+
+def write_bib(path, bib_entries):
+    with open(path, 'w', encoding='utf-8') as f:
+        for entry in bib_entries:
+            f.write(f"@article{{{entry['ID']},\n"
+                    f"  title = {{{entry['title']}}},\n"
+                    f"  author = {{{' and '.join(entry['authors'])}}},\n"
+                    f"  year = {{{entry['year']}}},\n"
+                    f"}}\n\n")
+
+def write_mods(path, mods_records):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                '<modsCollection xmlns="http://www.loc.gov/mods/v3">\n')
+        for diva_id, title, year, pubtype in mods_records:
+            f.write(f'<mods version="3.7">'
+                    f'<genre authority="diva" type="publicationTypeCode">{pubtype}</genre>'
+                    f'<titleInfo lang="eng"><title>{escape(title)}</title></titleInfo>'
+                    f'<originInfo><dateIssued>{year}</dateIssued></originInfo>'
+                    f'<recordInfo><recordIdentifier>{diva_id}</recordIdentifier></recordInfo>'
+                    f'</mods>\n')
+        f.write('</modsCollection>\n')
+
+def seed_export_cache(mods_path):
+    """Stores the synthetic export in the response cache so sync_discovery(offline=True) replays it."""
+    url = DiVA_discovery.diva_export_url(KTHID)
+    body_path, meta_path = http_cache.cache_paths(url)
+    os.makedirs(os.path.dirname(body_path), exist_ok=True)
+    shutil.copy(mods_path, body_path)
+    with open(body_path, 'rb') as f:
+        sha = hashlib.sha256(f.read()).hexdigest()
+    with open(meta_path, 'w', encoding='utf-8') as f:
+        json.dump({'url': url, 'etag': None, 'last_modified': None, 'sha256': sha}, f)
+
+def write_config(size):
+    """custom_configuration.tex from the repository, padded to grow with size, plus the snippet."""
+    with open(os.path.join(REPO_ROOT, 'custom_configuration.tex'), 'r', encoding='utf-8') as f:
+        config = f.read()
+    padding = "".join(f"% filler line {i} \\macro{{{i}}} with {{nested {{braces}}}}\n" for i in range(size // 10))
+    with open('custom_configuration.tex', 'w', encoding='utf-8') as f:
+        f.write(config.replace(r'\kthid{u1XXXXXX}', f'\\kthid{{{KTHID}}}') + padding)
+    shutil.copy(os.path.join(REPO_ROOT, 'config_snippet.tex'), 'config_snippet.tex')
+
+def prepare(size, args, rng):
+    pub_map, bib_entries, mods_records = make_dataset(size, args.included, args.bib_fraction, rng)
+    with open('publications_map.json', 'w', encoding='utf-8') as f:
+        json.dump(pub_map, f, indent=2, ensure_ascii=False)
+    write_bib('references.bib', bib_entries)
+    write_mods('export.xml', mods_records)
+    seed_export_cache('export.xml')
+    write_config(size)
+    os.makedirs('lib', exist_ok=True)
+    return {'records': len(pub_map), 'included': int(size * args.included), 'bib_entries': len(bib_entries),
+            'mods_records': len(mods_records)}
+
+STAGES = [
+    ('sync_discovery', lambda: DiVA_discovery.sync_discovery(offline=True)),
+    ('generate_latex', lambda: DiVA_generator.generate_latex()),
+    ('generate_latex_dividers', lambda: generate_publication_dividers.generate_latex_dividers(
+        'publications_map.json', 'lib/publications_dividers_generated.tex')),
+    ('generate_contributions', lambda: generate_thesis_contributions.generate_contributions(
+        'publications_map.json', 'lib/thesis_contributions_generated.tex')),
+    ('build_publications', lambda: build_publications.build_publications()),
+    ('merge_configs', lambda: merge_config.merge_configs('custom_configuration.tex', 'config_snippet.tex')),
+]
+
+def snapshot(workdir):
+    """Copies the working directory (map, journal, outputs, .cache) aside."""
+    saved = workdir + '.snapshot'
+    shutil.rmtree(saved, ignore_errors=True)
+    shutil.copytree(workdir, saved)
+    return saved
+
+def restore(saved, workdir):
+    """Puts the working directory back as snapshot() found it and drops in-process caches."""
+    for name in os.listdir(workdir):
+        path = os.path.join(workdir, name)
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        else:
+            os.remove(path)
+    shutil.copytree(saved, workdir, dirs_exist_ok=True)
+    bib_cache._loaded.clear()
+    latex_escape.clean_latex_string.cache_clear()
+
+def run_stage(stage):
+    start = time.perf_counter()
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        stage()
+    return time.perf_counter() - start
+
+def run_size(size, args, rng):
+    """Times each stage cold: every repeat starts from the files (and .cache) the stage first saw,
+    so a delta sync or fragment cache filled by the previous repeat cannot make it a no-op. One
+    more run on the state the stage left behind is reported as its warm time."""
+    workdir = tempfile.mkdtemp(prefix=f'bench_{size}_')
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    saved = None
+    try:
+        result = {'size': size}
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            result['dataset'] = prepare(size, args, rng)
+        timings, warm_timings = {}, {}
+        for name, stage in STAGES:
+            if args.stages and name not in args.stages:
+                continue
+            saved = snapshot(workdir)
+            best = None
+            for _ in range(args.repeat):
+                restore(saved, workdir)
+                elapsed = run_stage(stage)
+                best = elapsed if best is None else min(best, elapsed)
+            warm = run_stage(stage)
+            timings[name] = round(best, 6)
+            warm_timings[name] = round(warm, 6)
+            print(f"  {size:>7} {name:<26} {best:9.3f}s  warm {warm:9.3f}s", file=sys.stderr)
+        result['seconds'] = timings
+        result['warm_seconds'] = warm_timings
+        return result
+    finally:
+        os.chdir(cwd)
+        if saved:
+            shutil.rmtree(saved, ignore_errors=True)
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'describe', '--always', '--dirty'], cwd=REPO_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Time the publication pipeline on synthetic data")
+    arg_parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000],
+                            help="numbers of DiVA records to generate (default: %(default)s)")
+    arg_parser.add_argument('--included', type=float, default=0.02,
+                            help="fraction of records with status 'included' (default: %(default)s)")
+    arg_parser.add_argument('--bib-fraction', type=float, default=0.3,
+                            help="fraction of records that also have a bib entry (default: %(default)s)")
+    arg_parser.add_argument('--repeat', type=int, default=1,
+                            help="cold runs per stage, each from the same starting files; the fastest is "
+                                 "reported (default: %(default)s)")
+    arg_parser.add_argument('--stages', nargs='+', choices=[name for name, _ in STAGES],
+                            help="only run these stages")
+    arg_parser.add_argument('--seed', type=int, default=42)
+    arg_parser.add_argument('--output', help="write the JSON report to this file instead of stdout")
+    arg_parser.add_argument('--keep', action='store_true', help="keep the generated working directories")
+    args = arg_parser.parse_args()
+
+    rng = random.Random(args.seed)
+    report = {
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'parameters': {'included': args.included, 'bib_fraction': args.bib_fraction,
+                       'repeat': args.repeat, 'seed': args.seed},
+        'results': [run_size(size, args, rng) for size in args.sizes],
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
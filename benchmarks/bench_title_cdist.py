@@ -0,0 +1,79 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+# -*- mode: python; python-indent-offset: 4 -*-
+#
+# Compares the ways of finding the best-scoring bib title for each DiVA title on synthetic titles:
+# a pure-Python loop calling thefuzz's fuzz.ratio() one pair at a time, TitleIndex.best_match()
+# per title (q-gram blocking), and TitleIndex.match_all() (process.cdist over the blocked
+# candidates, in batches of titles that share them). It checks that all three give the same
+# bib key and prints timings.
+# Run from the repository root: python3 benchmarks/bench_title_cdist.py [--workers N] [sizes...]
+
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+
+from thefuzz import fuzz
+from title_index import TitleIndex, normalize_text, bib_title
+from bench_title_index import make_vocabulary, make_title, perturb
+
+FUZZY_THRESHOLD = 90
+DEFAULT_SIZES = [2000, 5000]
+QUERIES = 3000
+LOOP_SAMPLE = 100  # the pairwise loop is timed on a sample and extrapolated
+
+def loop_best_match(title, bib_entries):
+    """Scores every pair with fuzz.ratio(), as the original loop in sync_discovery() did."""
+    norm_diva_title = normalize_text(title)
+    best, best_score, first_substring = None, FUZZY_THRESHOLD, None
+    for entry in bib_entries:
+        norm_bib_title = normalize_text(bib_title(entry))
+        score = fuzz.ratio(norm_diva_title, norm_bib_title)
+        if score > best_score:
+            best, best_score = entry['ID'], score
+        if first_substring is None and norm_diva_title in norm_bib_title:
+            first_substring = entry['ID']
+    return best or first_substring
+
+def run(size, rng, workers):
+    vocabulary = make_vocabulary(rng)
+    bib_entries = [{'ID': f"key{i}", 'title': make_title(rng, vocabulary)} for i in range(size)]
+    queries = [perturb(rng.choice(bib_entries)['title'], rng, vocabulary) for _ in range(QUERIES)]
+
+    start = time.perf_counter()
+    index = TitleIndex(bib_entries, FUZZY_THRESHOLD)
+    build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    blocked = [index.best_match(q) for q in queries]
+    blocked_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = index.match_all(queries, workers=workers)
+    batch_time = time.perf_counter() - start
+
+    sample = rng.sample(range(QUERIES), LOOP_SAMPLE)
+    start = time.perf_counter()
+    looped = {i: loop_best_match(queries[i], bib_entries) for i in sample}
+    loop_time = (time.perf_counter() - start) * QUERIES / LOOP_SAMPLE
+
+    mismatches = (sum(1 for i in sample if looped[i] != batch[i])
+                  + sum(1 for a, b in zip(blocked, batch) if a != b))
+    print(f"{QUERIES} x {size:>6}: loop (est.) {loop_time:9.3f}s  blocked {build + blocked_time:7.3f}s  "
+          f"cdist {build + batch_time:7.3f}s  speedup {loop_time / (build + batch_time):7.1f}x  "
+          f"mismatches {mismatches}")
+    return mismatches
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Benchmark the batch title matching backend")
+    arg_parser.add_argument('sizes', nargs='*', type=int, help=f"bib sizes (default: {DEFAULT_SIZES})")
+    arg_parser.add_argument('--workers', type=int, default=-1, help="cdist threads (default: one per core)")
+    args = arg_parser.parse_args()
+    rng = random.Random(42)
+    print(f"{QUERIES} DiVA titles per run, pairwise loop timed on {LOOP_SAMPLE} of them, {os.cpu_count()} cores")
+    failures = sum(run(size, rng, args.workers) for size in args.sizes or DEFAULT_SIZES)
+    sys.exit(1 if failures else 0)
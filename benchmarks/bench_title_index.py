@@ -0,0 +1,94 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+# -*- mode: python; python-indent-offset: 4 -*-
+#
+# Compares the linear bib cross-referencing loop from DiVA_discovery.py with scripts/title_index.py
+# on synthetic titles, checks that both give the same bib key for every query, and prints timings.
+# Run from the repository root: python3 benchmarks/bench_title_index.py [sizes...]
+
+import os
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+
+from thefuzz import fuzz
+from title_index import TitleIndex, normalize_text, bib_title
+
+FUZZY_THRESHOLD = 90
+DEFAULT_SIZES = [1000, 10000, 50000]
+QUERIES = 2000
+LINEAR_SAMPLE = 50  # the linear loop is too slow to run for every query at large sizes
+
+STOP_WORDS = "a an and for in of on the to using with".split()
+SYLLABLES = "ba be ca co da de fi ga in ka lo ma mi ne no pa po ra re si ta te to va ve wi xe zo".split()
+
+def make_vocabulary(rng, size=5000):
+    """Pseudo-words with a Zipf-like weight, so that some words are far more common than others."""
+    words = sorted({"".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))) for _ in range(size)})
+    rng.shuffle(words)
+    return words, [1.0 / rank for rank in range(1, len(words) + 1)]
+
+def make_title(rng, vocabulary):
+    words, weights = vocabulary
+    def phrase(n):
+        return " ".join(rng.choice(STOP_WORDS) if rng.random() < 0.25 else rng.choices(words, weights)[0]
+                        for _ in range(n))
+    title = phrase(rng.randint(3, 12))
+    title = title[0].upper() + title[1:]
+    if rng.random() < 0.3:
+        title += ": " + phrase(rng.randint(2, 5))
+    return title
+
+def perturb(title, rng, vocabulary):
+    """Returns a near-duplicate of title (typo, truncation or unrelated)."""
+    choice = rng.random()
+    if choice < 0.3:
+        pos = rng.randrange(len(title))
+        return title[:pos] + rng.choice("aeiou") + title[pos + 1:]
+    if choice < 0.5:
+        return title.split(":")[0]
+    if choice < 0.6:
+        return "{" + title.replace(" ", "} {") + "}"
+    return make_title(rng, vocabulary)
+
+def linear_match(title, bib_entries):
+    """The original loop from sync_discovery()."""
+    norm_diva_title = normalize_text(title)
+    for entry in bib_entries:
+        norm_bib_title = normalize_text(bib_title(entry))
+        if (norm_diva_title in norm_bib_title) or (fuzz.ratio(norm_diva_title, norm_bib_title) > FUZZY_THRESHOLD):
+            return entry['ID']
+    return None
+
+def run(size, rng):
+    vocabulary = make_vocabulary(rng)
+    bib_entries = [{'ID': f"key{i}", 'title': make_title(rng, vocabulary)} for i in range(size)]
+    queries = [perturb(rng.choice(bib_entries)['title'], rng, vocabulary) for _ in range(QUERIES)]
+
+    start = time.perf_counter()
+    index = TitleIndex(bib_entries, FUZZY_THRESHOLD)
+    build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    indexed = [index.match(q) for q in queries]
+    lookup = time.perf_counter() - start
+
+    sample = rng.sample(range(QUERIES), LINEAR_SAMPLE)
+    start = time.perf_counter()
+    linear = {i: linear_match(queries[i], bib_entries) for i in sample}
+    linear_time = (time.perf_counter() - start) * QUERIES / LINEAR_SAMPLE
+
+    mismatches = sum(1 for i in sample if linear[i] != indexed[i])
+    print(f"{size:>7} entries: build {build:7.3f}s  indexed {lookup:8.3f}s  "
+          f"linear (est.) {linear_time:9.3f}s  speedup {linear_time / (build + lookup):7.1f}x  "
+          f"mismatches {mismatches}/{LINEAR_SAMPLE}")
+    return mismatches
+
+if __name__ == "__main__":
+    sizes = [int(a) for a in sys.argv[1:]] or DEFAULT_SIZES
+    rng = random.Random(42)
+    print(f"{QUERIES} DiVA titles per run, linear loop timed on {LINEAR_SAMPLE} of them")
+    failures = sum(run(size, rng) for size in sizes)
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,89 @@
+-- kth/kth-timing.lua
+--
+-- Cheap in-process clock and named phase markers for the .log file.
+-- scripts/compile_profile.py turns the markers into per-phase durations.
+--
+-- Every marker is one log line "[+N.NNNs] message". Phases are written as
+--   [+N.NNNs] phase begin: name
+--   [+N.NNNs] phase end: name
+-- and nest: ending a phase also ends the phases that were opened inside it and left open.
+
+local KTHTiming = {}
+
+-- os.gettimeofday() is LuaTeX's wall clock (microsecond resolution) and costs no subprocess,
+-- unlike running `date --iso-8601=ns` through io.popen. os.clock() (CPU time) is the fallback.
+local now = os.gettimeofday or os.clock
+
+-- The clock starts when the class is loaded; the format load before it takes well under a second.
+KTHTiming.start_time = now()
+
+-- Stack of the open phases: {name = "chapter: 3", group = "chapter"}
+local open_phases = {}
+local group_counts = {}
+
+function KTHTiming.elapsed()
+  return now() - KTHTiming.start_time
+end
+
+-- Writes the message straight to the log file. texio does not go through TeX's input, so
+-- messages may contain characters such as # or % and the time is that of the call.
+function KTHTiming.log(message)
+  texio.write_nl("log", string.format("[+%.3fs] %s", KTHTiming.elapsed(), message))
+end
+
+-- The wall clock date of the start, so that logs of different builds can be told apart.
+function KTHTiming.log_start()
+  local seconds = math.floor(KTHTiming.start_time)
+  local timezone = os.date("%z", seconds)
+  KTHTiming.log(string.format("timing started at %s.%06d%s:%s", os.date("%Y-%m-%dT%H:%M:%S", seconds),
+    math.floor((KTHTiming.start_time - seconds) * 1e6), timezone:sub(1, 3), timezone:sub(4)))
+end
+
+function KTHTiming.begin_phase(name, group)
+  -- keep marker lines short, as TeX wraps log lines at max_print_line (79) characters
+  name = string.sub(string.gsub(name, "[\r\n]", " "), 1, 50)
+  table.insert(open_phases, {name = name, group = group})
+  KTHTiming.log("phase begin: " .. name)
+end
+
+function KTHTiming.end_phase(name)
+  name = string.sub(string.gsub(name, "[\r\n]", " "), 1, 50)
+  for i = #open_phases, 1, -1 do
+    if open_phases[i].name == name then
+      for j = #open_phases, i, -1 do
+        KTHTiming.log("phase end: " .. open_phases[j].name)
+        open_phases[j] = nil
+      end
+      return
+    end
+  end
+end
+
+-- Sequential phases such as chapters: each one lasts until the next of its group begins.
+-- If another phase was opened since (e.g. the References chapter inside \printbibliography),
+-- the new one nests inside it and ends with it.
+function KTHTiming.next_phase(group)
+  group_counts[group] = (group_counts[group] or 0) + 1
+  local top = open_phases[#open_phases]
+  if top and top.group == group then
+    KTHTiming.end_phase(top.name)
+  end
+  KTHTiming.begin_phase(group .. ": " .. group_counts[group], group)
+end
+
+-- An included file becomes the phase "kind: basename".
+function KTHTiming.begin_file_phase(kind, path)
+  KTHTiming.begin_phase(kind .. ": " .. (string.match(path, "([^/]*)$") or path))
+end
+
+function KTHTiming.end_file_phase(kind, path)
+  KTHTiming.end_phase(kind .. ": " .. (string.match(path, "([^/]*)$") or path))
+end
+
+function KTHTiming.end_all()
+  if #open_phases > 0 then
+    KTHTiming.end_phase(open_phases[1].name)
+  end
+end
+
+return KTHTiming
@@ -4,13 +4,14 @@
 # run the script locally with streamlit run ./scripts/CReDiT_Matrix_Wizard.py
 
 import streamlit as st
-import json
 import pandas as pd
-import bibtexparser
-from bibtexparser.bparser import BibTexParser
 from pathlib import Path
 import os
 import signal
+from bib_cache import load_bib
+from title_index import normalize_name
+from pub_store import PublicationStore
+from pub_db import load_records
 
 # The 14 official CReDiT roles
 CREDIT_ROLES = [
@@ -21,25 +22,100 @@ CREDIT_ROLES = [
     "Writing – Original Draft", "Writing – Review & Editing"
 ]
 
-def load_json(file_path):
-    with open(file_path, 'r', encoding='utf-8') as f:
-        return json.load(f)
-
-def save_json(file_path, data):
-    with open(file_path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=4, ensure_ascii=False)
-
-def get_authors_from_bib(bib_path, bib_key):
-    """Parses references.bib using an inclusive parser."""
-    if not bib_path.exists(): return []
-    with open(bib_path, 'r', encoding='utf-8') as bibfile:
-        parser = BibTexParser(ignore_nonstandard_types=False) #
-        library = bibtexparser.load(bibfile, parser=parser)
-    for entry in library.entries:
-        if entry.get('ID') == bib_key:
-            author_str = entry.get('author', '')
-            return [a.strip() for a in author_str.split(' and ')]
-    return []
+def save_paper(store, key, fields):
+    """Journals the edited fields of one paper under the store's lock, then folds the journal into
+    the map, so publications_map.json (what git and the CI sync see) holds the edit right away."""
+    store.patch({key: fields})
+    store.compact()
+    st.session_state["pub_map"][key].update(fields)
+    st.session_state["pub_map_stamp"] = map_stamp(store)
+
+def map_stamp(store):
+    """Changes whenever the map or its journal is modified, by us or by another writer."""
+    return store.version(), os.path.getmtime(store.map_file)
+
+def split_authors(author_str):
+    return [a.strip() for a in author_str.split(' and ')] if author_str else []
+
+@st.cache_data(show_spinner=False)
+def get_bib_authors(bib_file, mtime):
+    """Returns {bib key: [authors]} for references.bib; cached until the file's mtime changes."""
+    return {key: split_authors(entry.get('author', '')) for key, entry in load_bib(bib_file).by_key.items()}
+
+def paper_authors(paper, bib_path):
+    """The paper's authors in DiVA order, as DiVA_discovery.py stored them in the map.
+
+    references.bib is only read for records from before the map had authors. Authors that
+    already have roles are matched by normalize_name(), so 'Gerald Q. Maguire Jr.' from the bib
+    file is the row of 'Maguire Jr., Gerald Q.'; those that match no author are kept as rows.
+    """
+    authors = list(paper.authors or [])
+    if not authors and bib_path.exists():
+        authors = get_bib_authors(str(bib_path), bib_path.stat().st_mtime).get(paper.bib_key, [])
+    rows = {}
+    for author in authors + list(paper.credit_contributions) + list(paper.equal_contributors):
+        rows.setdefault(normalize_name(author), author)
+    return list(rows.values())
+
+def author_rows(names, authors):
+    """The rows of authors (from paper_authors()) that names, spelled in any way, refer to."""
+    rows = {normalize_name(author): author for author in authors}
+    return list(dict.fromkeys(rows[key] for key in map(normalize_name, names) if key in rows))
+
+def get_publications(store):
+    """Returns the included publications, re-reading them only when another writer changed the map."""
+    stamp = map_stamp(store)
+    if st.session_state.get("pub_map_stamp") != stamp:
+        st.session_state["pub_map"] = load_records(store.map_file, status="included")
+        st.session_state["pub_map_stamp"] = stamp
+    return st.session_state["pub_map"]
+
+@st.fragment
+def paper_editor(key, paper, authors):
+    """Editor for one paper. Widget changes here only rerun this fragment, not the other tabs."""
+    # CReDiT Matrix setup
+    existing_credit = paper.credit_contributions
+    df = pd.DataFrame(False, index=authors, columns=CREDIT_ROLES)
+    for auth, roles in existing_credit.items():
+        for row in author_rows([auth], authors):
+            for r in roles: df.at[row, r] = True
+
+    # Data Editor with updated 2026 'width' parameter
+    edited_df = st.data_editor(
+        df, key=f"ed_{key}", width="stretch", num_rows="fixed",
+        column_config={r: st.column_config.CheckboxColumn() for r in CREDIT_ROLES}
+    )
+
+    st.markdown("---")
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        # Multi-select for equal contributors
+        eq_contribs = st.multiselect(
+            "Identify Equal Contributors:",
+            options=authors,
+            default=author_rows(paper.equal_contributors, authors),
+            key=f"eq_{key}"
+        )
+    
+    with col2:
+        # Custom domain note (e.g. CS vs Medicine distinction)
+        contrib_note = st.text_area(
+            "Custom Contribution Note:",
+            value=paper.contribution_note,
+            key=f"note_{key}"
+        )
+
+    if st.button(f"Update JSON for Paper {paper.label}", type="primary", key=f"save_{key}"):
+        new_credit = {auth: edited_df.columns[edited_df.loc[auth]].tolist() 
+                      for auth in edited_df.index if edited_df.loc[auth].any()}
+        
+        save_paper(store, key, {
+            "credit_contributions": new_credit,
+            "equal_contributors": eq_contribs,
+            "contribution_note": contrib_note,
+        })
+        st.success(f"Saved the contributions of Paper {paper.label} to {store.map_file}")
 
 st.set_page_config(page_title="CReDiT Wizard", layout="wide")
 
@@ -48,6 +124,9 @@ with st.sidebar:
     st.header("Controls")
     if st.button("🔴 Quit Wizard", help="Click to stop the Streamlit server"):
         st.warning("Shutting down the server. You can close this tab now.")
+        # Fold the journaled edits into publications_map.json before leaving
+        if Path("publications_map.json").exists():
+            PublicationStore("publications_map.json").compact()
         # Sends a signal to the process to terminate cleanly
         os.kill(os.getpid(), signal.SIGINT)
 
@@ -55,71 +134,30 @@ st.title("🎓 CReDiT Contribution Wizard")
 
 json_path = Path("publications_map.json")
 bib_path = Path("references.bib")
+store = PublicationStore(json_path)
 
 if not json_path.exists():
     st.error(f"Missing {json_path}")
 else:
-    data = load_json(json_path)
-    # Filter for included papers only
-    included = {k: v for k, v in data.items() if v.get("status") == "included"}
+    # Only the included papers are loaded (an index lookup with the SQLite store)
+    included = get_publications(store)
     
     # Sort tabs by tab_index
-    sorted_keys = sorted(included.keys(), key=lambda x: included[x].get("tab_index", 999))
+    sorted_keys = sorted(included.keys(), key=lambda x: included[x].tab_order)
     
     if not sorted_keys:
         st.warning("No papers are marked as 'included' in your map.")
     else:
-        tabs = st.tabs([included[k].get("label", k) for k in sorted_keys])
+        tabs = st.tabs([included[k].label or k for k in sorted_keys])
 
         for i, key in enumerate(sorted_keys):
             paper = included[key]
             with tabs[i]:
-                st.subheader(f"Paper {paper.get('label')}: {paper.get('title')}")
-                authors = get_authors_from_bib(bib_path, paper.get("bib_key"))
+                st.subheader(f"Paper {paper.label}: {paper.title}")
+                authors = paper_authors(paper, bib_path)
                 
                 if not authors:
-                    st.error(f"Authors not found for {paper.get('bib_key')}")
+                    st.error(f"Authors not found for {key} (run DiVA_discovery.py) or {paper.bib_key}")
                     continue
 
-                # CReDiT Matrix setup
-                existing_credit = paper.get("credit_contributions", {})
-                df = pd.DataFrame(False, index=authors, columns=CREDIT_ROLES)
-                for auth, roles in existing_credit.items():
-                    if auth in df.index:
-                        for r in roles: df.at[auth, r] = True
-
-                # Data Editor with updated 2026 'width' parameter
-                edited_df = st.data_editor(
-                    df, key=f"ed_{key}", width="stretch", num_rows="fixed",
-                    column_config={r: st.column_config.CheckboxColumn() for r in CREDIT_ROLES}
-                )
-
-                st.markdown("---")
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    # Multi-select for equal contributors
-                    eq_contribs = st.multiselect(
-                        "Identify Equal Contributors:",
-                        options=authors,
-                        default=paper.get("equal_contributors", []),
-                        key=f"eq_{key}"
-                    )
-                
-                with col2:
-                    # Custom domain note (e.g. CS vs Medicine distinction)
-                    contrib_note = st.text_area(
-                        "Custom Contribution Note:",
-                        value=paper.get("contribution_note", ""),
-                        key=f"note_{key}"
-                    )
-
-                if st.button(f"Update JSON for Paper {paper.get('label')}", type="primary"):
-                    new_credit = {auth: edited_df.columns[edited_df.loc[auth]].tolist() 
-                                  for auth in edited_df.index if edited_df.loc[auth].any()}
-                    
-                    data[key]["credit_contributions"] = new_credit
-                    data[key]["equal_contributors"] = eq_contribs
-                    data[key]["contribution_note"] = contrib_note
-                    save_json(json_path, data)
-                    st.success("Successfully updated publications_map.json")
+                paper_editor(key, paper, authors)
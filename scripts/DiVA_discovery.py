@@ -10,19 +10,49 @@
 
 import os
 import re
+import copy
+import glob
 import json
+import argparse
+import hashlib
 import urllib.request
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+import xml.etree.ElementTree as ET
+from collections import namedtuple
 import pymods
-import bibtexparser
-from bibtexparser.bparser import BibTexParser
-from thefuzz import fuzz
+from title_index import TitleIndex
+from identifier_index import IdentifierIndex
+from bib_cache import load_bib
+import http_cache
+from pub_store import PublicationStore, diff_maps
+from pub_record import DIVIDER_FIELDS, new_record, fill_defaults
 
 # --- Configuration ---
 CONFIG_FILE = 'custom_configuration.tex'
 BIB_FILE = 'references.bib'
+# BibTeX of the included papers; their identifiers also resolve to references.bib keys
+INCLUDED_BIB_GLOB = os.path.join('Included_publications', '*.bib')
 MAP_FILE = 'publications_map.json'
 DIVA_MODS_TEMP = '/tmp/diva_discovery_mods.xml'
 FUZZY_THRESHOLD = 90
+SYNC_STATE_FILE = os.path.join('.cache', 'diva_sync_state.json')
+# per-record fingerprints and the watermark of the last sync (delta mode)
+FINGERPRINT_FILE = os.path.join('.cache', 'diva_fingerprints.json')
+# bump when read_record() or the bib matching changes, so every record is processed again
+DELTA_FORMAT = 4
+# the MODS elements read_record() reads
+FINGERPRINT_TAGS = {'recordInfo', 'titleInfo', 'originInfo', 'genre', 'identifier', 'name'}
+MODS_NS = '{http://www.loc.gov/mods/v3}'
+FINGERPRINT_ELEMENTS = {MODS_NS + tag: tag for tag in FINGERPRINT_TAGS}
+# identifier types kept in the map; 'patent' stands for any type containing 'patent'
+MAP_IDENTIFIER_TYPES = {'doi', 'isbn', 'urn', 'patent'}
+# MARC relator code and term of a <name> that is an author; personal names without a role count too
+AUTHOR_ROLES = {'aut', 'author'}
+PLACEHOLDER_KTHID = 'u1XXXXXX'
+# macros of custom_configuration.tex that name the members of a thesis' group
+GROUP_KTHID_MACROS = ['kthid', 'secondkthid'] + [f'supervisor{x}sKTHID' for x in 'ABCDE']
+MAX_FETCH_WORKERS = 8
 
 def get_kthid_from_config():
     """Extracts and validates KTHID from the LaTeX configuration file."""
@@ -42,14 +72,32 @@ def get_kthid_from_config():
         print(f"Warning: {CONFIG_FILE} not found. Using fallback ID.")
     return fallback_id
 
-def normalize_text(text):
-    """Simple normalization for fuzzy matching."""
-    if not text: return ""
-    return re.sub(r'[^\w\s]', '', text).lower().strip()
+def get_group_kthids_from_config():
+    """Returns the KTH IDs of the author, second author and supervisors set in the configuration.
+
+    Commented-out macros and placeholder IDs are skipped. Falls back to get_kthid_from_config().
+    """
+    pattern = re.compile(r'^\s*\\(' + '|'.join(GROUP_KTHID_MACROS) + r')\{([^}]+)\}')
+    kthids = []
+    try:
+        with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
+            for line in f:
+                match = pattern.search(line)
+                if match:
+                    found_id = match.group(2).strip()
+                    if found_id != PLACEHOLDER_KTHID and found_id not in kthids:
+                        kthids.append(found_id)
+    except FileNotFoundError:
+        pass
+    return kthids or [get_kthid_from_config()]
+
+def diva_export_url(kthid):
+    """Returns the DiVA MODS export URL for all publications of kthid."""
+    return f'https://kth.diva-portal.org/smash/export.jsf?format=mods&addFilename=true&aq=[[{{\"personId\":\"{kthid}\"}}]]&aqe=[]&aq2=[[]]&onlyFullText=false&noOfRows=5000&sortOrder=title_sort_asc&sortOrder2=title_sort_asc'
 
 def fetch_diva_mods(kthid):
     """Fetches MODS records from DiVA API."""
-    url = f'https://kth.diva-portal.org/smash/export.jsf?format=mods&addFilename=true&aq=[[{{\"personId\":\"{kthid}\"}}]]&aqe=[]&aq2=[[]]&onlyFullText=false&noOfRows=5000&sortOrder=title_sort_asc&sortOrder2=title_sort_asc'
+    url = diva_export_url(kthid)
     try:
         with urllib.request.urlopen(url) as response:
             data = response.read()
@@ -60,110 +108,361 @@ def fetch_diva_mods(kthid):
         print(f"Error fetching from DiVA: {e}")
         return []
 
-def sync_discovery():
-    kthid = get_kthid_from_config()
-    
-    # Load existing mapping
-    pub_map = {}
-    if os.path.exists(MAP_FILE):
-        with open(MAP_FILE, 'r', encoding='utf-8') as f:
-            pub_map = json.load(f)
-
-    # Load BibTeX for cross-referencing
-    bib_entries = []
-    if os.path.exists(BIB_FILE):
-        with open(BIB_FILE, 'r', encoding='utf-8') as f:
-            parser = BibTexParser(ignore_nonstandard_types=False)
-            bib_db = bibtexparser.load(f, parser=parser)
-            bib_entries = bib_db.entries
-
-    # Fetch from DiVA
-    mods_records = fetch_diva_mods(kthid)
+def iter_mods_records(source):
+    """Yields each <mods> element of a MODS collection as soon as it has been parsed.
+
+    source is a file name or a binary file-like object (e.g. an HTTP response). Each
+    element is cleared and detached from the tree once the caller is done with it,
+    so memory stays flat however many records the collection holds.
+    """
+    root = None
+    for event, elem in ET.iterparse(source, events=('start', 'end')):
+        if event == 'start':
+            if root is None:
+                root = elem
+            continue
+        if elem.tag == MODS_NS + 'mods':
+            yield elem
+            elem.clear()
+            if elem is not root:
+                root.remove(elem)
+
+def stream_diva_mods(kthid):
+    """Streams MODS records from the DiVA API, parsing them while the export is still arriving."""
+    url = diva_export_url(kthid)
+    try:
+        with urllib.request.urlopen(url) as response:
+            yield from iter_mods_records(response)
+    except Exception as e:
+        print(f"Error fetching from DiVA: {e}")
+
+def file_sha256(path):
+    """Returns the SHA-256 of a file's contents, or None if it does not exist."""
+    if not os.path.exists(path):
+        return None
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+def load_sync_state(path=SYNC_STATE_FILE):
+    if os.path.exists(path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            pass
+    return {}
+
+def save_sync_state(state, path=SYNC_STATE_FILE):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2)
+    os.replace(path + '.tmp', path)
+
+def bib_files_sha256():
+    """Combined hash of references.bib and Included_publications/*.bib, the inputs of the matching."""
+    shas = [f"{path}:{file_sha256(path)}" for path in [BIB_FILE] + sorted(glob.glob(INCLUDED_BIB_GLOB))]
+    return hashlib.sha256("\n".join(shas).encode('utf-8')).hexdigest()
+
+def delta_watermark(bib_sha):
+    """What the fingerprints of a sync are valid for: the bib file and the matching code."""
+    return {"format": DELTA_FORMAT, "bib": bib_sha, "threshold": FUZZY_THRESHOLD}
+
+ModsMetadata = namedtuple('ModsMetadata', ['diva_id', 'title', 'titles', 'year', 'pub_type', 'identifiers', 'authors'])
+
+def mods_name(elem):
+    """Returns 'Family, Given' (or the plain namePart) of a <name> with an author role, else None."""
+    roles = {term.text.strip().lower() for term in elem.iterfind(f'{MODS_NS}role/{MODS_NS}roleTerm') if term.text}
+    if roles and not roles & AUTHOR_ROLES:
+        return None  # e.g. the supervisor (ths) or editor (edt) of the record
+    if not roles and elem.attrib.get('type') == 'corporate':
+        return None  # an organisation the record is filed under
+    parts = {}
+    for part in elem.iterfind(MODS_NS + 'namePart'):
+        if part.text and part.text.strip():
+            parts.setdefault(part.attrib.get('type', ''), []).append(part.text.strip())
+    family, given = " ".join(parts.get('family', [])), " ".join(parts.get('given', []))
+    if family:
+        return f"{family}, {given}" if given else family
+    return " ".join(parts.get('', [])) or given or None
+
+def read_record(record):
+    """Returns (fingerprint, metadata) of a <mods> element, visiting each of its elements once.
+
+    The fingerprint hashes the tags, attributes and text of the elements in FINGERPRINT_TAGS,
+    i.e. of everything the metadata is taken from. metadata is a ModsMetadata, or None for a
+    record without a DiVA ID. Its identifiers are the record's own [(kind, value)] DOIs,
+    ISBNs, URNs and patent numbers, its authors the <name>s with an author role, in order.
+    """
+    sha = hashlib.sha1()
+    diva_id = None
+    titles = {}
+    year = "Unknown"
+    pub_type = "unknown"
+    identifiers = []
+    authors = []
+
+    for elem in record:
+        tag = FINGERPRINT_ELEMENTS.get(elem.tag)
+        if tag is None:
+            continue
+        for sub in elem.iter():
+            sha.update(repr((sub.tag, sorted(sub.attrib.items()), sub.text)).encode('utf-8'))
+        if tag == 'recordInfo':
+            for sub in elem.iterfind(MODS_NS + 'recordIdentifier'):
+                diva_id = sub.text
+        elif tag == 'titleInfo':
+            lang = elem.attrib.get('lang', 'eng')
+            for sub in elem.iterfind(MODS_NS + 'title'):
+                titles[lang] = sub.text
+        elif tag == 'originInfo':
+            for sub in elem.iterfind(MODS_NS + 'dateIssued'):
+                year = sub.text[:4] if sub.text else "Unknown"
+        elif tag == 'genre':
+            if elem.attrib.get('type') == "publicationTypeCode":
+                pub_type = elem.text
+        elif tag == 'identifier':
+            # only top-level identifiers: a relatedItem's ISBN is that of the host book
+            id_type = elem.attrib.get('type', '').lower()
+            if elem.text and elem.text.strip():
+                kind = 'patent' if 'patent' in id_type else id_type
+                if kind in MAP_IDENTIFIER_TYPES:
+                    identifiers.append((kind, elem.text.strip()))
+        elif tag == 'name':
+            author = mods_name(elem)
+            if author:
+                authors.append(author)
 
+    if not diva_id:
+        return sha.hexdigest(), None
+    main_title = titles.get('eng') or titles.get('swe') or "Untitled"
+    return sha.hexdigest(), ModsMetadata(diva_id, main_title, titles, year, pub_type, identifiers, authors)
+
+def map_identifiers(identifiers):
+    """[(kind, value)] -> {kind: [values]}, the form stored in the map."""
+    result = {}
+    for kind, value in identifiers:
+        if value not in result.setdefault(kind, []):
+            result[kind].append(value)
+    return result
+
+def iter_metadata(mods_records, known=None):
+    """Yields (diva_id, fingerprint, metadata) for each record with a DiVA ID.
+
+    metadata is None, and the record is neither merged nor matched, when its fingerprint
+    equals known[diva_id], i.e. it has not changed since the last sync.
+    """
     for record in mods_records:
-        diva_id = None
-        for elem in record:
-            if elem.tag.count("}recordInfo") == 1:
-                for sub in elem:
-                    if sub.tag.count("}recordIdentifier") == 1:
-                        diva_id = sub.text
-        
-        if not diva_id: continue
-
-        # Extract basic metadata from MODS
-        title_dict = {}
-        year = "Unknown"
-        pub_type = "unknown"
-
-        for elem in record:
-            if elem.tag.count("}titleInfo") == 1:
-                lang = elem.attrib.get('lang', 'eng')
-                for sub in elem:
-                    if sub.tag.count("}title") == 1:
-                        title_dict[lang] = sub.text
-            elif elem.tag.count("}originInfo") == 1:
-                for sub in elem:
-                    if sub.tag.count("}dateIssued") == 1:
-                        year = sub.text[:4] if sub.text else "Unknown"
-            elif elem.tag.count("}genre") == 1:
-                if elem.attrib.get('type') == "publicationTypeCode":
-                    pub_type = elem.text
-
-        main_title = title_dict.get('eng') or title_dict.get('swe') or "Untitled"
+        fingerprint, metadata = read_record(record)
+        if metadata is None:
+            continue
+        if known and known.get(metadata.diva_id) == fingerprint:
+            yield metadata.diva_id, fingerprint, None
+        else:
+            yield metadata.diva_id, fingerprint, metadata
+
+def fetch_exports(kthids, offline=False):
+    """Fetches the DiVA exports of kthids through the response cache, concurrently.
+
+    Returns {kthid: (body_path, sha256)}; people whose export is unavailable are left out.
+    """
+    def fetch(kthid):
+        body_path, sha, _ = http_cache.fetch(diva_export_url(kthid), offline=offline)
+        return kthid, body_path, sha
+
+    workers = min(MAX_FETCH_WORKERS, len(kthids))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(fetch, kthids))
+    return {kthid: (body_path, sha) for kthid, body_path, sha in results if body_path}
+
+def download_metadata(kthids, stream=True, known=None):
+    """Without the cache: downloads and parses each person's export in its own thread.
+
+    A single person is returned lazily, so records are merged while the export streams in.
+    """
+    def download(kthid):
+        return iter_metadata(stream_diva_mods(kthid) if stream else fetch_diva_mods(kthid), known)
+
+    if len(kthids) == 1:
+        return [download(kthids[0])]
+    workers = min(MAX_FETCH_WORKERS, len(kthids))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(lambda kthid: list(download(kthid)), kthids))
+
+def unique_metadata(sources):
+    """Chains the records of several exports, keeping the first occurrence of each diva2: ID.
+
+    Co-authors share publications, so the same record appears in several exports.
+    """
+    seen = set()
+    for source in sources:
+        for metadata in source:
+            if metadata[0] not in seen:
+                seen.add(metadata[0])
+                yield metadata
 
+def set_bib_key(record, bib_key, method):
+    """Records the cross-reference of a map record; method is how the key was found."""
+    record["in_bib"] = bib_key is not None
+    record["bib_key"] = bib_key
+    record["bib_match"] = method
+
+def change_report(original_map, updates, vanished):
+    """Compact lines listing the new, updated and vanished diva2: IDs of a sync."""
+    new = [diva_id for diva_id in updates if diva_id not in original_map]
+    updated = [f"{diva_id} ({', '.join(fields)})" for diva_id, fields in updates.items()
+               if diva_id in original_map]
+    lines = []
+    for heading, ids in (("New", new), ("Updated", updated), ("Vanished from DiVA (kept)", vanished)):
+        if ids:
+            lines.append(f"{heading} ({len(ids)}): " + ", ".join(ids))
+    return lines
+
+def sync_discovery(stream=True, use_cache=True, offline=False, force=False, kthids=None, delta=True):
+    """Merges the DiVA publications of kthids (default: the \\kthid of the configuration) into the map.
+
+    With several KTH IDs the exports are fetched concurrently, shared publications are merged
+    once, and the map is written in a single update. In delta mode, records whose fingerprint
+    matches the last sync (with the same bib file) are neither extracted nor matched again.
+    """
+    kthids = list(dict.fromkeys(kthids or [get_kthid_from_config()]))
+    state_key = ",".join(kthids)
+    missing = []
+
+    # Load existing mapping (including journaled edits not yet compacted)
+    store = PublicationStore(MAP_FILE)
+    pub_map, _ = store.load()
+    original_map = copy.deepcopy(pub_map)
+
+    # Fingerprints are only trusted for records still in the map and an unchanged watermark
+    watermark = delta_watermark(bib_files_sha256())
+    delta_state = load_sync_state(FINGERPRINT_FILE)
+    known = {}
+    if delta and delta_state.get("watermark") == watermark:
+        known = {diva_id: fp for diva_id, fp in delta_state.get("records", {}).items() if diva_id in pub_map}
+
+    # Fetch from DiVA. With the cache, unchanged exports (304 or same body hash) together with
+    # an unchanged bib file and map mean the previous sync result still holds. The hash is only
+    # known once the body is complete, so on this path each export is downloaded in full before
+    # it is parsed; only --no-cache parses while the export is arriving.
+    if use_cache or offline:
+        exports = fetch_exports(kthids, offline=offline)
+        if not exports:
+            print("No DiVA export available. Nothing to sync.")
+            return
+        missing = [kthid for kthid in kthids if kthid not in exports]
+        if missing:
+            print(f"Warning: no DiVA export for {', '.join(missing)}; merging the others.")
+        export_shas = [exports[kthid][1] for kthid in kthids if kthid in exports]
+        inputs = {"export": ",".join(export_shas), "bib": bib_files_sha256(), "map": file_sha256(MAP_FILE)}
+        sync_state = load_sync_state()
+        if not (force or offline) and sync_state.get(state_key) == inputs:
+            print(f"DiVA export, {BIB_FILE} and {MAP_FILE} unchanged since last sync. Nothing to do.")
+            return
+        sources = [iter_metadata(iter_mods_records(exports[kthid][0]), known)
+                   for kthid in kthids if kthid in exports]
+    else:
+        sources = download_metadata(kthids, stream=stream, known=known)
+
+    title_index = None
+    title_pending = []
+    fingerprints = {}
+    skipped = 0
+    for diva_id, fingerprint, metadata in unique_metadata(sources):
+        fingerprints[diva_id] = fingerprint
+        if metadata is None:
+            skipped += 1
+            continue
+        main_title, year, pub_type = metadata.title, metadata.year, metadata.pub_type
+        if title_index is None:
+            # Load BibTeX for cross-referencing (cached, with pre-normalized titles), only
+            # once a record actually needs matching
+            if os.path.exists(BIB_FILE):
+                bib = load_bib(BIB_FILE)
+                title_index = TitleIndex(bib.entries, FUZZY_THRESHOLD, titles=bib.titles)
+                included = [entry for path in sorted(glob.glob(INCLUDED_BIB_GLOB)) for entry in load_bib(path).entries]
+                identifier_index = IdentifierIndex(bib.entries, included)
+            else:
+                title_index = TitleIndex([], FUZZY_THRESHOLD)
+                identifier_index = IdentifierIndex([])
         # --- DEEP MERGE LOGIC ---
         if diva_id not in pub_map:
-            print(f"New publication discovered: {diva_id}")
-            pub_map[diva_id] = {
-                "title": main_title,
-                "year": year,
-                "pubtype": pub_type,
-                "status": "unprocessed", # Default status for new items
-                "label": None,
-                "tab_index": None,       # Manual curation required
-                "bib_key": None,
-                "in_bib": False,
-                "pdf_downloaded": False,
-                "file_path": "Included_publications/", # Default dir
-                "pdf_pages": "",
-                "scale": 1.0,
-                "permission_text": ""    # Manual curation required
-            }
+            # New items start 'unprocessed'; label, tab_index and permission_text need manual curation
+            pub_map[diva_id] = new_record(title=main_title, year=year, pubtype=pub_type,
+                                          authors=metadata.authors,
+                                          identifiers=map_identifiers(metadata.identifiers))
         else:
             # Update only objective metadata from DiVA
             pub_map[diva_id]["title"] = main_title
             pub_map[diva_id]["year"] = year
             pub_map[diva_id]["pubtype"] = pub_type
+            pub_map[diva_id]["authors"] = metadata.authors
+            pub_map[diva_id]["identifiers"] = map_identifiers(metadata.identifiers)
             
             # Ensure new divider fields exist in older JSON records without overwriting
-            pub_map[diva_id].setdefault("tab_index", None)
-            pub_map[diva_id].setdefault("file_path", "Included_publications/")
-            pub_map[diva_id].setdefault("pdf_pages", "")
-            pub_map[diva_id].setdefault("scale", 1.0)
-            pub_map[diva_id].setdefault("permission_text", "")
-
-        # --- Cross-referencing with .bib remains unchanged ---
-        found_in_bib = False
-        norm_diva_title = normalize_text(pub_map[diva_id].get('title', ''))
-
-        for entry in bib_entries:
-            bib_title_raw = entry.get('title', '').replace('{', '').replace('}', '')
-            norm_bib_title = normalize_text(bib_title_raw)
-            
-            if (norm_diva_title in norm_bib_title) or (fuzz.ratio(norm_diva_title, norm_bib_title) > FUZZY_THRESHOLD):
-                found_in_bib = True
-                pub_map[diva_id]["in_bib"] = True
-                pub_map[diva_id]["bib_key"] = entry['ID']
-                break
-        
-        if not found_in_bib:
-            pub_map[diva_id]["in_bib"] = False
-            pub_map[diva_id]["bib_key"] = None
-
-    # Save the updated map
-    with open(MAP_FILE, 'w', encoding='utf-8') as f:
-        json.dump(pub_map, f, indent=2, ensure_ascii=False)
-    print(f"Sync complete. {MAP_FILE} updated with protective merge.")
+            fill_defaults(pub_map[diva_id], DIVIDER_FIELDS)
+
+        # --- Cross-referencing with .bib: exact identifier join first; records without an
+        # identifier hit are title matched together after the loop ---
+        bib_key, method = identifier_index.match(metadata.identifiers)
+        if bib_key is None:
+            title_pending.append(diva_id)
+        set_bib_key(pub_map[diva_id], bib_key, method)
+
+    # best fuzzy match above FUZZY_THRESHOLD (else the first substring match), scored in one batch
+    if title_pending:
+        titles = [pub_map[diva_id].get('title', '') for diva_id in title_pending]
+        for diva_id, bib_key in zip(title_pending, title_index.match_all(titles)):
+            set_bib_key(pub_map[diva_id], bib_key, 'title' if bib_key is not None else None)
+
+    # Save only the fields discovery changed, under the store's lock, so edits made by
+    # other writers (e.g. the CReDiT wizard) while we were matching are kept. Without
+    # changes the map is not touched, so the workflow sees no diff.
+    updates = diff_maps(original_map, pub_map)
+    if updates:
+        store.patch(updates)
+        store.compact()
+    # records are never removed; with an export missing, absence from DiVA means nothing
+    vanished = [] if missing else [diva_id for diva_id in original_map if diva_id not in fingerprints]
+    for line in change_report(original_map, updates, vanished):
+        print(line)
+    if delta:
+        print(f"Delta sync: {skipped} of {len(fingerprints)} records unchanged since "
+              f"{delta_state.get('synced', 'the last sync')}, {len(fingerprints) - skipped} processed.")
+        # fingerprints of records another group member's export brought in earlier are kept
+        records = delta_state.get("records", {}) if delta_state.get("watermark") == watermark else {}
+        records.update(fingerprints)
+        save_sync_state({"watermark": watermark, "records": records,
+                         "synced": datetime.now(timezone.utc).isoformat(timespec='seconds')}, FINGERPRINT_FILE)
+    print(f"Sync complete. {len(fingerprints)} publications in DiVA, "
+          + (f"{len(updates)} records of {MAP_FILE} changed." if updates else f"{MAP_FILE} unchanged."))
+
+    if use_cache and not offline and not missing:
+        inputs["map"] = file_sha256(MAP_FILE)
+        sync_state[state_key] = inputs
+        save_sync_state(sync_state)
 
 if __name__ == "__main__":
-    sync_discovery()
+    arg_parser = argparse.ArgumentParser(description="Discover DiVA publications and merge them into " + MAP_FILE)
+    arg_parser.add_argument('--offline', action='store_true',
+                            help="replay the cached DiVA export instead of contacting DiVA")
+    arg_parser.add_argument('--force', action='store_true',
+                            help="run the merge even if nothing changed since the last sync")
+    arg_parser.add_argument('--no-cache', action='store_true',
+                            help="bypass the response cache and parse the export while it streams in from DiVA "
+                                 "(by default each export is downloaded in full to the cache and parsed afterwards, "
+                                 "so an unchanged export can be skipped)")
+    arg_parser.add_argument('--no-stream', action='store_true',
+                            help=f"with --no-cache: download the whole export to {DIVA_MODS_TEMP} and parse it with pymods")
+    arg_parser.add_argument('--full', action='store_true',
+                            help="extract and match every record, not only those changed since the last sync")
+    arg_parser.add_argument('--kthid', nargs='+', metavar='KTHID',
+                            help=f"discover the publications of these people (default: \\kthid of {CONFIG_FILE})")
+    arg_parser.add_argument('--group', action='store_true',
+                            help=f"discover the publications of the author(s) and all supervisors with a KTHID in {CONFIG_FILE}")
+    args = arg_parser.parse_args()
+    kthids = args.kthid or (get_group_kthids_from_config() if args.group else None)
+    sync_discovery(stream=not args.no_stream, use_cache=not args.no_cache,
+                   offline=args.offline, force=args.force, kthids=kthids, delta=not args.full)
@@ -2,10 +2,11 @@
 # -*- coding: utf-8 -*-
 # -*- mode: python; python-indent-offset: 4 -*-
 
-import json
 import os
-import re
-import bibtexparser
+from bib_cache import load_bib
+from build_utils import write_if_changed
+from pub_db import load_records
+from latex_escape import clean_latex_string
 
 MAP_FILE = 'publications_map.json'
 OUTPUT_FILE = 'lib/publications_generated.tex'
@@ -26,81 +27,62 @@ def get_valid_bib_keys(bib_file):
         print(f"Warning: {bib_file} not found.")
         return set()
     try:
-        with open(bib_file, 'r', encoding='utf-8') as f:
-            # We use the MiddleOut parser logic or ensure we capture all entries
-            parser = bibtexparser.bparser.BibTexParser(common_strings=True)
-            # This ensures custom types like @patent are included
-            parser.ignore_nonstandard_types = False 
-            bib_database = bibtexparser.load(f, parser=parser)
-            
-            keys = {entry['ID'] for entry in bib_database.entries}
-            print(f"Found {len(keys)} valid keys in {bib_file}")
-            return keys
+        # The shared loader keeps custom types like @patent and caches the parsed file
+        keys = set(load_bib(bib_file).by_key)
+        print(f"Found {len(keys)} valid keys in {bib_file}")
+        return keys
     except Exception as e:
         print(f"Error parsing .bib file: {e}")
         return set()
 
-def clean_latex_string(text):
-    """Cleans a string for LaTeX while preserving math mode."""
-    if not text: return ""
-    text = re.sub(r'\s+', ' ', text).strip()
-    parts = re.split(r'(\$.*?\$)', text)
-    mapping = {
-        '&': r'\&', '%': r'\%', '$': r'\$', '#': r'\#',
-        '_': r'\_', '{': r'\{', '}': r'\}',
-        '~': r'\textasciitilde{}', '^': r'\textasciicircum{}'
-    }
-    cleaned_parts = []
-    for part in parts:
-        if part.startswith('$') and part.endswith('$'):
-            cleaned_parts.append(part)
-        else:
-            local_mapping = mapping.copy()
-            del local_mapping['$'] 
-            temp_part = part
-            for char, escape in local_mapping.items():
-                temp_part = temp_part.replace(char, escape)
-            cleaned_parts.append(temp_part)
-    return "".join(cleaned_parts)
-
 def clean_bib_key(key):
     """Escapes underscores in BibTeX keys for display in LaTeX text."""
     if not key: return ""
     return key.replace('_', r'\_')
 
-def generate_latex():
-    valid_keys = get_valid_bib_keys('references.bib')
-    if not os.path.exists(MAP_FILE):
-        print(f"Error: {MAP_FILE} not found.")
-        return
+def publication_item(prefix, identifier, raw_title, bib_key, is_valid):
+    """Renders the \\item line of one publication."""
+    label_cmd = f"\\label{{{prefix}:{identifier}}}"
+    display_title = clean_latex_string(raw_title)
+
+    if is_valid:
+        cite_str = f"\\cite{{{bib_key}}}"
+    else:
+        # descriptive error message for missing keys
+        key_display = clean_bib_key(bib_key) if bib_key else "None"
+        cite_str = f"\\textbf{{[Missing BibTeX entry: {key_display}]}}"
 
-    with open(MAP_FILE, 'r', encoding='utf-8') as f:
-        pub_map = json.load(f)
+    return f"  \\item {label_cmd} {display_title} {cite_str}"
 
+def render_publications(pub_map, valid_keys, item=publication_item):
+    """Returns (LaTeX text, number of included publications) for the lists of publications.
+
+    pub_map maps diva IDs to Publication records (see pub_record.py). item renders a single
+    entry; the build driver passes a memoized version.
+    """
     grouped_entries = {env: [] for env in ENV_MAP.values()}
     included_diva_ids = [] # For the Cleanup reference list
     
     for diva_id, data in pub_map.items():
-        if data.get('status') == 'included' and data.get('label'):
+        if data.status == 'included' and data.label:
             try:
-                prefix, identifier = data['label'].split(':')
+                prefix, identifier = data.label.split(':')
                 env_name = ENV_MAP.get(prefix)
                 if env_name:
                     included_diva_ids.append(diva_id)
-                    target_key = data.get('better_bib_key') or data.get('bib_key')
+                    target_key = data.better_bib_key or data.bib_key
                     is_key_valid = target_key in valid_keys if target_key else False
-                    raw_title = data.get('full title') or data.get('title', 'Untitled')
-                    display_title = clean_latex_string(raw_title)
+                    raw_title = data.full_title or data.title
 
                     grouped_entries[env_name].append({
                         'id': identifier,
-                        'title': display_title,
+                        'title': raw_title,
                         'bib_key': target_key,
                         'is_valid': is_key_valid,
                         'prefix': prefix
                     })
             except ValueError:
-                print(f"Warning: Invalid label format for {diva_id}: {data['label']}")
+                print(f"Warning: Invalid label format for {diva_id}: {data.label}")
 
     latex_output = ["% --- Generated by DiVA_generator.py ---", ""]
 
@@ -111,16 +93,8 @@ def generate_latex():
         entries.sort(key=lambda x: x['id'])
         latex_output.append(f"\\begin{{{env_name}}}")
         for entry in entries:
-            label_cmd = f"\\label{{{entry['prefix']}:{entry['id']}}}"
-            
-            if entry['is_valid']:
-                cite_str = f"\\cite{{{entry['bib_key']}}}"
-            else:
-                # descriptive error message for missing keys
-                key_display = clean_bib_key(entry['bib_key']) if entry['bib_key'] else "None"
-                cite_str = f"\\textbf{{[Missing BibTeX entry: {key_display}]}}"
-            
-            latex_output.append(f"  \\item {label_cmd} {entry['title']} {cite_str}")
+            latex_output.append(item(entry['prefix'], entry['id'], entry['title'],
+                                     entry['bib_key'], entry['is_valid']))
             
         latex_output.append(f"\\end{{{env_name}}}")
         latex_output.append("")
@@ -130,11 +104,21 @@ def generate_latex():
     for d_id in sorted(included_diva_ids):
         latex_output.append(f"% {d_id}")
 
-    os.makedirs(os.path.dirname(OUTPUT_FILE), exist_ok=True)
-    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-        f.write("\n".join(latex_output))
-    
-    print(f"Successfully generated {OUTPUT_FILE} with {len(included_diva_ids)} publications.")
+    return "\n".join(latex_output), len(included_diva_ids)
+
+def generate_latex():
+    valid_keys = get_valid_bib_keys('references.bib')
+    if not os.path.exists(MAP_FILE):
+        print(f"Error: {MAP_FILE} not found.")
+        return
+
+    pub_map = load_records(MAP_FILE, status='included')
+
+    text, count = render_publications(pub_map, valid_keys)
+    if write_if_changed(OUTPUT_FILE, text):
+        print(f"Successfully generated {OUTPUT_FILE} with {count} publications.")
+    else:
+        print(f"{OUTPUT_FILE} is up to date ({count} publications).")
 
 if __name__ == "__main__":
     generate_latex()
@@ -0,0 +1,78 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+# -*- mode: python; python-indent-offset: 4 -*-
+#
+# Shared loader for references.bib.
+#
+# All scripts parse the bib file with the same bibtexparser settings through load_bib().
+# The parsed result (entry list, key->entry map and normalized titles) is pickled under
+# CACHE_DIR, keyed by the SHA-256 of the file contents, so an unchanged .bib file is loaded
+# without running the parser at all.
+
+import os
+import pickle
+import hashlib
+from collections import namedtuple
+import bibtexparser
+from bibtexparser.bparser import BibTexParser
+from title_index import normalize_text, bib_title
+
+CACHE_DIR = os.path.join('.cache', 'bib')
+# Bump when the parser settings or the cached fields change, so stale pickles are ignored
+CACHE_VERSION = 1
+
+ParsedBib = namedtuple('ParsedBib', ['entries', 'by_key', 'titles', 'sha256'])
+
+_loaded = {}  # (path, sha256) -> ParsedBib, for repeated loads within one process
+
+def make_parser():
+    """The single parser configuration used for references.bib."""
+    # common_strings resolves month macros such as month=feb;
+    # ignore_nonstandard_types=False keeps custom types like @patent
+    return BibTexParser(common_strings=True, ignore_nonstandard_types=False)
+
+def content_hash(data):
+    return hashlib.sha256(data + f"\0v{CACHE_VERSION}\0{bibtexparser.__version__}".encode()).hexdigest()
+
+def parse_bib(text, sha256=None):
+    """Parses BibTeX source text into a ParsedBib."""
+    entries = bibtexparser.loads(text, parser=make_parser()).entries
+    by_key = {}
+    for entry in entries:
+        by_key.setdefault(entry['ID'], entry)  # first definition wins, as in a linear search
+    titles = [normalize_text(bib_title(entry)) for entry in entries]
+    return ParsedBib(entries, by_key, titles, sha256)
+
+def load_bib(bib_file, use_cache=True):
+    """Returns the ParsedBib for bib_file, from the on-disk cache when the contents are unchanged.
+
+    Raises FileNotFoundError if bib_file does not exist.
+    """
+    with open(bib_file, 'rb') as f:
+        data = f.read()
+    sha = content_hash(data)
+    key = (os.path.abspath(bib_file), sha)
+    if use_cache and key in _loaded:
+        return _loaded[key]
+
+    cache_path = os.path.join(CACHE_DIR, sha + '.pickle')
+    if use_cache and os.path.exists(cache_path):
+        try:
+            with open(cache_path, 'rb') as f:
+                bib = pickle.load(f)
+            _loaded[key] = bib
+            return bib
+        except Exception:
+            pass  # unreadable cache entry: fall back to parsing
+
+    bib = parse_bib(data.decode('utf-8'), sha)
+    if use_cache:
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            with open(cache_path + '.tmp', 'wb') as f:
+                pickle.dump(bib, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(cache_path + '.tmp', cache_path)
+        except OSError as e:
+            print(f"Warning: could not write bib cache {cache_path}: {e}")
+        _loaded[key] = bib
+    return bib
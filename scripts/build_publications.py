@@ -0,0 +1,76 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+# -*- mode: python; python-indent-offset: 4 -*-
+#
+# Single entry point for the generated publication files:
+#   lib/publications_generated.tex           (DiVA_generator.py)
+#   lib/publications_dividers_generated.tex  (generate_publication_dividers.py)
+#   lib/thesis_contributions_generated.tex   (generate_thesis_contributions.py)
+#
+# publications_map.json and references.bib are loaded once and the three generators run in
+# memory. Per-publication fragments are memoized across runs (see build_utils.FragmentCache),
+# and each output is only written when its bytes change, so latexmk sees no new mtime for
+# an unchanged file.
+#
+# run from the repository root: python3 scripts/build_publications.py
+
+import os
+import argparse
+from build_utils import FragmentCache, write_if_changed
+from pub_store import PublicationStore
+from pub_db import load_records
+import DiVA_generator
+import generate_publication_dividers
+import generate_thesis_contributions
+import pdf_subset
+
+MAP_FILE = 'publications_map.json'
+BIB_FILE = 'references.bib'
+PUBLICATIONS_OUTPUT = 'lib/publications_generated.tex'
+DIVIDERS_OUTPUT = 'lib/publications_dividers_generated.tex'
+CONTRIBUTIONS_OUTPUT = 'lib/thesis_contributions_generated.tex'
+
+def build_publications(map_file=MAP_FILE, bib_file=BIB_FILE, use_cache=True, subset_pdfs=False):
+    """Regenerates the three lib/*_generated.tex files. Returns the list of files written.
+
+    With subset_pdfs the dividers include page subsets of the PDFs (see pdf_subset.py).
+    """
+    if not os.path.exists(map_file):
+        print(f"Error: {map_file} not found.")
+        return []
+
+    # Fold pending journaled edits into the JSON file, which is what gets committed
+    PublicationStore(map_file).compact()
+    pub_map = load_records(map_file, status='included')
+    valid_keys = DiVA_generator.get_valid_bib_keys(bib_file)
+
+    cache = FragmentCache() if use_cache else None
+    def memo(kind, render):
+        return cache.wrap(kind, render) if cache else render
+
+    publications, count = DiVA_generator.render_publications(
+        pub_map, valid_keys, item=memo('publication', DiVA_generator.publication_item))
+    outputs = [
+        (PUBLICATIONS_OUTPUT, publications),
+        (DIVIDERS_OUTPUT, generate_publication_dividers.render_dividers(
+            pub_map, fragment=memo('divider', generate_publication_dividers.divider_fragment),
+            subsets=pdf_subset.subset_pdfs(pub_map) if subset_pdfs else None)),
+        (CONTRIBUTIONS_OUTPUT, generate_thesis_contributions.render_contributions(
+            pub_map, fragment=memo('contribution', generate_thesis_contributions.contribution_fragment))),
+    ]
+
+    written = [path for path, text in outputs if write_if_changed(path, text)]
+    for path, _ in outputs:
+        print(f"{path}: {'updated' if path in written else 'unchanged'}")
+    if cache:
+        cache.save()
+        print(f"{count} included publications, fragments: {cache.hits} reused, {cache.misses} rendered")
+    return written
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Regenerate the lib/*_generated.tex publication files")
+    arg_parser.add_argument('--no-cache', action='store_true', help="render every fragment again")
+    arg_parser.add_argument('--subset-pdfs', action='store_true',
+                            help="include only the used pages of each PDF, extracted to a cache (see pdf_subset.py)")
+    args = arg_parser.parse_args()
+    build_publications(use_cache=not args.no_cache, subset_pdfs=args.subset_pdfs)
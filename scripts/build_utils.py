@@ -0,0 +1,84 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+# -*- mode: python; python-indent-offset: 4 -*-
+#
+# Helpers shared by the generators of the lib/*_generated.tex files:
+# write_if_changed() leaves an output untouched (and its mtime, so latexmk does not recompile)
+# when the new text is identical, and FragmentCache memoizes per-publication LaTeX fragments
+# across runs so a change to one record only re-renders that record.
+
+import os
+import glob
+import json
+import hashlib
+
+FRAGMENT_CACHE = os.path.join('.cache', 'fragments.json')
+
+def write_if_changed(path, text):
+    """Writes text to path only if the bytes differ from the current contents. Returns True if written."""
+    data = text.encode('utf-8')
+    try:
+        with open(path, 'rb') as f:
+            if f.read() == data:
+                return False
+    except FileNotFoundError:
+        pass
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path + '.tmp', 'wb') as f:
+        f.write(data)
+    os.replace(path + '.tmp', path)
+    return True
+
+def code_fingerprint():
+    """Hash of the scripts' own sources, so cached fragments are dropped when a generator changes."""
+    sha = hashlib.sha256()
+    for path in sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), '*.py'))):
+        with open(path, 'rb') as f:
+            sha.update(f.read())
+    return sha.hexdigest()
+
+def _record_dict(obj):
+    """json.dumps() hook: a Publication record hashes as its map record."""
+    if hasattr(obj, 'to_dict'):
+        return obj.to_dict()
+    raise TypeError(f"{type(obj).__name__} is not JSON serializable")
+
+class FragmentCache:
+    """Persistent memo of rendered fragments, keyed by a hash of the render inputs."""
+
+    def __init__(self, path=FRAGMENT_CACHE):
+        self.path = path
+        self.version = code_fingerprint()
+        self.fragments = {}
+        self.used = set()
+        self.hits = self.misses = 0
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    saved = json.load(f)
+                if saved.get('version') == self.version:
+                    self.fragments = saved.get('fragments', {})
+            except (OSError, ValueError):
+                pass
+
+    def wrap(self, kind, render):
+        """Returns a memoized version of render(*args); args must be JSON-serializable or Publication records."""
+        def cached(*args):
+            key = hashlib.sha256(json.dumps([kind, args], sort_keys=True, ensure_ascii=False,
+                                            default=_record_dict).encode('utf-8')).hexdigest()
+            self.used.add(key)
+            if key in self.fragments:
+                self.hits += 1
+            else:
+                self.misses += 1
+                self.fragments[key] = render(*args)
+            return self.fragments[key]
+        return cached
+
+    def save(self):
+        """Stores the fragments used in this run, dropping stale ones."""
+        fragments = {k: v for k, v in self.fragments.items() if k in self.used}
+        write_if_changed(self.path, json.dumps({'version': self.version, 'fragments': fragments},
+                                               sort_keys=True, ensure_ascii=False))
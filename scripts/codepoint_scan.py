@@ -0,0 +1,322 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+# -*- mode: python; python-indent-offset: 4 -*-
+#
+# Finds the non-ASCII code points a thesis actually uses and the fonts it needs for them.
+#
+# The scan covers examplethesis.tex and the files it \input's or \include's (following only
+# the \ifenabled... branches the \documentclass options turn on, and skipping comments and
+# comment environments), references.bib and the titles of the included publications in
+# publications_map.json. Files are read in one streaming pass each.
+#
+# The report lists the Unicode blocks in use, which of the fonts configured in kth/kth-fonts.tex
+# cover them (if fontTools is installed and the font files can be found), the code points no
+# configured font has, and the Enable...Font class options the thesis needs or could drop.
+# lib/unicode_blocks_generated.tex gets the \input lines of only the unicode_blocks/ files in
+# use, which lib/defines.tex loads instead of the full set. Block files whose font commands need
+# a class option that is not enabled (e.g. \greekfont without EnableGreekFont) are written
+# commented out, with the option to enable.
+#
+# python3 scripts/codepoint_scan.py [--main examplethesis.tex] [--list] [--no-fonts]
+# optional: pip install fonttools
+
+import os
+import re
+import bisect
+import argparse
+import subprocess
+import unicodedata
+from collections import Counter
+from build_utils import write_if_changed
+from pub_store import MAP_FILE
+from pub_db import load_publications
+from font_blacklist import default_font_dirs, find_fonts
+
+try:
+    from fontTools.ttLib import TTFont
+except ImportError:
+    TTFont = None
+
+MAIN_FILE = 'examplethesis.tex'
+BIB_FILE = 'references.bib'
+OPTIONS_FILE = os.path.join('kth', 'kth-options.tex')
+BLOCK_DIR = 'unicode_blocks'
+OUTPUT_FILE = os.path.join('lib', 'unicode_blocks_generated.tex')
+CHUNK_SIZE = 1024 * 1024
+
+BLOCK_FILE_RE = re.compile(r'^U\+([0-9A-F]+)-U\+([0-9A-F]+)-(.*)\.tex$')
+INPUT_RE = re.compile(r'\\(?:input|include)\s*\{([^}]+)\}')
+COMMENT_RE = re.compile(r'(?<!\\)%.*')
+IF_RE = re.compile(r'\\if(\w+)(?:\\relax)?')
+DOCUMENTCLASS_RE = re.compile(r'\\documentclass\s*\[(.*?)\]\s*\{kththesis\}', re.DOTALL)
+DECLARE_OPTION_RE = re.compile(r'\\DeclareOption\{(\w+)\}\{(.*)\}')
+
+# Blocks that have no file in unicode_blocks/, as every text font covers them
+BASE_BLOCKS = [(0x0000, 0x007F, 'Basic Latin'), (0x0080, 0x00FF, 'Latin-1 Supplement')]
+
+# Code point ranges that need one of the script font options of kth/kth-options.tex
+SCRIPT_OPTIONS = [
+    (0x0370, 0x03FF, 'EnableGreekFont'), (0x1F00, 0x1FFF, 'EnableGreekFont'),
+    (0x0400, 0x052F, 'EnableCyrillicFont'),
+    (0x0590, 0x05FF, 'EnableHebrewFont'), (0xFB1D, 0xFB4F, 'EnableHebrewFont'),
+    (0x0600, 0x06FF, 'EnableArabicFont'), (0xFB50, 0xFDFF, 'EnableArabicFont'),
+    (0xFE70, 0xFEFF, 'EnableArabicFont'),
+    (0x0900, 0x097F, 'EnableDevanagariFont'),
+    (0x3040, 0x30FF, 'EnableJapaneseFont'),
+    (0x4E00, 0x9FFF, 'EnableChineseSimplifiedFont'),  # EnableJapaneseFont if kana are used too
+    (0x01A0, 0x01B0, 'EnableVietnameseFont'), (0x1EA0, 0x1EF9, 'EnableVietnameseFont'),
+]
+MAIN_FONT = 'TeX Gyre Termes'
+# Font commands of the unicode_blocks/ files that kth/kth-fonts.tex only defines with one of these options
+FONT_COMMAND_OPTIONS = {
+    'greekfont': ['EnableGreekFont'],
+    'arabicfont': ['EnableArabicFont'],
+    'hindifont': ['EnableDevanagariFont'],
+    'cjkfont': ['EnableChineseSimplifiedFont', 'EnableJapaneseFont'],
+}
+FONT_COMMAND_RE = re.compile(r'\\(' + '|'.join(FONT_COMMAND_OPTIONS) + r')(?![a-zA-Z])')
+
+# The fonts kth/kth-fonts.tex sets up, by the file of their regular face
+CONFIGURED_FONTS = {
+    'TeX Gyre Termes': 'texgyretermes-regular.otf',
+    'TeX Gyre Heros': 'texgyreheros-regular.otf',
+    'TeX Gyre Cursor': 'texgyrecursor-regular.otf',
+    'STIX Two Math': 'STIXTwoMath-Regular.otf',
+    'STIX Two Text': 'STIXTwoText-Regular.otf',
+    'Figtree': os.path.join('Figtree', 'static', 'Figtree-Regular.ttf'),
+    'Noto Emoji': os.path.join('Noto_Emoji', 'static', 'NotoEmoji-Regular.ttf'),
+    'Noto Serif': 'NotoSerif-Regular.ttf',
+    'Noto Sans': 'NotoSans-Regular.ttf',
+    'DejaVu Sans': 'DejaVuSans.ttf',
+    'Noto Naskh Arabic': 'NotoNaskhArabic-Regular.ttf',
+    'Noto Serif Hebrew': 'NotoSerifHebrew-Regular.ttf',
+    'Noto Serif Devanagari': 'NotoSerifDevanagari-Regular.ttf',
+    'Noto Serif CJK': 'NotoSerifCJK-Regular.ttc',
+}
+
+def load_blocks(block_dir=BLOCK_DIR):
+    """Returns the sorted [(start, end, name, file)] of the blocks; file is None for the base blocks."""
+    blocks = [(start, end, name, None) for start, end, name in BASE_BLOCKS]
+    for name in os.listdir(block_dir) if os.path.isdir(block_dir) else []:
+        match = BLOCK_FILE_RE.match(name)
+        if match:
+            blocks.append((int(match.group(1), 16), int(match.group(2), 16), match.group(3),
+                           os.path.join(block_dir, name)))
+    return sorted(blocks)
+
+def block_of(code_point, blocks, starts):
+    i = bisect.bisect_right(starts, code_point) - 1
+    if i >= 0 and code_point <= blocks[i][1]:
+        return blocks[i]
+    # not a block with a unicode_blocks/ file: group by 128 code points
+    start = code_point & ~0x7F
+    return (start, start + 0x7F, 'other', None)
+
+def enabled_flags(main_file, options_file=OPTIONS_FILE):
+    """Returns (options, flags, declared): the active \\documentclass options of main_file, the
+    \\ifenabled... flags (without 'if') they set, and {option: flags} of kth/kth-options.tex."""
+    with open(main_file, 'r', encoding='utf-8') as f:
+        text = "\n".join(COMMENT_RE.sub('', line) for line in f)
+    match = DOCUMENTCLASS_RE.search(text)
+    options = [o.strip() for o in match.group(1).split(',') if o.strip()] if match else []
+    declared = {}
+    with open(options_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            match = DECLARE_OPTION_RE.match(line.strip())
+            if match:
+                declared[match.group(1)] = re.findall(r'\\(enabled\w+?)true', match.group(2))
+    flags = {flag for option in options for flag in declared.get(option, [])}
+    return options, flags, declared
+
+def scan_tex(path, flags, chars, sources, seen):
+    """Adds the characters typeset from path and the files it includes to chars and sources."""
+    if path in seen or not os.path.isfile(path):
+        return
+    seen.add(path)
+    conditions = []  # one bool per enclosing \if...\fi on lines of their own
+    in_comment = False
+    kept = []
+    includes = []
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        for line in f:
+            line = COMMENT_RE.sub('', line)
+            stripped = line.strip()
+            if stripped == r'\begin{comment}':
+                in_comment = True
+            elif stripped == r'\end{comment}':
+                in_comment = False
+            elif IF_RE.fullmatch(stripped):
+                name = IF_RE.fullmatch(stripped).group(1)
+                conditions.append(name in flags if name.startswith('enabled') else True)
+            elif stripped == r'\else' and conditions:
+                conditions[-1] = not conditions[-1]
+            elif stripped == r'\fi' and conditions:
+                conditions.pop()
+            elif not in_comment and all(conditions):
+                kept.append(line)
+                includes.extend(INPUT_RE.findall(line))
+    add_text(path, "".join(kept), chars, sources)
+    for name in includes:
+        name = name.strip()
+        if name.startswith(BLOCK_DIR + '/'):
+            continue  # the fallback definitions, not text
+        scan_tex(name if os.path.splitext(name)[1] else name + '.tex', flags, chars, sources, seen)
+
+def add_text(source, text, chars, sources):
+    if text.isascii():
+        return
+    counts = Counter(text)
+    for char in counts:
+        if char not in chars and ord(char) > 0x7F:
+            sources[char] = source
+    chars.update(counts)
+
+def scan_file(path, chars, sources):
+    """Streams a plain text file (e.g. references.bib) into chars and sources."""
+    if not os.path.isfile(path):
+        return
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), ''):
+            add_text(path, chunk, chars, sources)
+
+def scan_thesis(main_file=MAIN_FILE, bib_file=BIB_FILE, map_file=MAP_FILE):
+    """Returns (chars, sources, options, flags, declared): a Counter of the non-ASCII characters,
+    the file each was first seen in, and the class option information of enabled_flags()."""
+    options, flags, declared = enabled_flags(main_file)
+    chars, sources = Counter(), {}
+    scan_tex(main_file, flags, chars, sources, set())
+    scan_file(bib_file, chars, sources)
+    if os.path.exists(map_file):
+        titles = [data.get('title') or '' for data in load_publications(map_file, status='included').values()]
+        add_text(map_file, "\n".join(titles), chars, sources)
+    for char in [c for c in chars if ord(c) <= 0x7F]:
+        del chars[char]
+    return chars, sources, options, flags, declared
+
+def find_font_file(name):
+    """Path of a font file: relative to the repository, from kpsewhich, or in the font directories."""
+    if os.path.exists(name):
+        return name
+    try:
+        found = subprocess.run(['kpsewhich', name], capture_output=True, text=True, timeout=30).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        found = ''
+    if found:
+        return found
+    if not hasattr(find_font_file, 'index'):
+        find_font_file.index = {os.path.basename(p).lower(): p for p in find_fonts(default_font_dirs())}
+    return find_font_file.index.get(os.path.basename(name).lower())
+
+def font_cmaps(fonts=CONFIGURED_FONTS):
+    """{font: set of code points} of the configured fonts whose file can be found."""
+    cmaps = {}
+    for font, file_name in fonts.items():
+        path = find_font_file(file_name)
+        if not path:
+            continue
+        try:
+            tt = TTFont(path, fontNumber=0, lazy=True)
+            cmaps[font] = set(tt.getBestCmap() or {})
+            tt.close()
+        except Exception as e:  # fontTools raises many kinds of errors for broken fonts
+            print(f"Warning: cannot read {path}: {e}")
+    return cmaps
+
+def needed_options(chars, cmaps):
+    """The script font options needed for chars: those whose characters the main font lacks."""
+    main = cmaps.get(MAIN_FONT)
+    used = {ord(c) for c in chars if main is None or ord(c) not in main}
+    kana = any(0x3040 <= cp <= 0x30FF for cp in used)
+    options = set()
+    for start, end, option in SCRIPT_OPTIONS:
+        if any(start <= cp <= end for cp in used):
+            options.add('EnableJapaneseFont' if option == 'EnableChineseSimplifiedFont' and kana else option)
+    return options
+
+def block_usage(chars, blocks):
+    """{block: sorted characters} of the characters in use."""
+    starts = [block[0] for block in blocks]
+    usage = {}
+    for char in chars:
+        usage.setdefault(block_of(ord(char), blocks, starts), []).append(char)
+    return {block: sorted(usage[block]) for block in sorted(usage)}
+
+def block_font_options(block_file):
+    """The class options a block file needs, one list per font command it uses (any option of a
+    list defines the command), e.g. [['EnableGreekFont']] for the Greek block."""
+    with open(block_file, 'r', encoding='utf-8', errors='replace') as f:
+        commands = set(FONT_COMMAND_RE.findall(f.read()))
+    return [FONT_COMMAND_OPTIONS[command] for command in sorted(commands)]
+
+def fallback_config(usage, options, sources, enabled=()):
+    """Text of lib/unicode_blocks_generated.tex: the \\input lines of the block files in use.
+
+    A block file whose font commands need a class option that is not enabled is written
+    commented out, as \\input'ing it would stop the build on an undefined control sequence.
+    """
+    lines = ["% --- Generated by codepoint_scan.py ---",
+             f"% Non-ASCII characters used: {sum(len(c) for c in usage.values())} in {len(usage)} Unicode blocks,",
+             "% in " + ", ".join(sorted(set(sources.values()))),
+             "% Class options for the scripts in use: " + (", ".join(sorted(options)) or "none")]
+    for (start, end, name, block_file), block_chars in usage.items():
+        if block_file:
+            lines.append(f"% {name}, U+{start:04X} - U+{end:04X}: {''.join(block_chars)}")
+            input_line = "\\input{" + os.path.splitext(block_file)[0].replace(os.sep, '/') + "}"
+            missing = [" or ".join(choices) for choices in block_font_options(block_file)
+                       if not set(choices) & set(enabled)]
+            if missing:
+                lines.append(f"% needs the {', '.join(missing)} class option; enable it and rerun codepoint_scan.py")
+                input_line = "%" + input_line
+            lines.append(input_line)
+    return "\n".join(lines) + "\n"
+
+def char_name(char):
+    return unicodedata.name(char, f"U+{ord(char):04X}")
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Report the code points, Unicode blocks and fonts a thesis uses")
+    arg_parser.add_argument('--main', default=MAIN_FILE, help="main .tex file (default: %(default)s)")
+    arg_parser.add_argument('--bib', default=BIB_FILE, help="bibliography (default: %(default)s)")
+    arg_parser.add_argument('--map', default=MAP_FILE, help="publication map (default: %(default)s)")
+    arg_parser.add_argument('--output', default=OUTPUT_FILE, help="fallback configuration (default: %(default)s)")
+    arg_parser.add_argument('--list', action='store_true', help="list every character with its count and source")
+    arg_parser.add_argument('--no-fonts', action='store_true', help="do not check the coverage of the fonts")
+    args = arg_parser.parse_args()
+
+    chars, sources, options, flags, declared = scan_thesis(args.main, args.bib, args.map)
+    blocks = load_blocks()
+    usage = block_usage(chars, blocks)
+    cmaps = {}
+    if not args.no_fonts:
+        if TTFont is None:
+            print("fontTools is not installed (pip install fonttools); not checking the fonts.")
+        else:
+            cmaps = font_cmaps()
+            missing_fonts = sorted(set(CONFIGURED_FONTS) - set(cmaps))
+            if missing_fonts:
+                print("Font files not found: " + ", ".join(missing_fonts))
+
+    print(f"{len(chars)} distinct non-ASCII characters in {len(usage)} Unicode blocks")
+    for (start, end, name, block_file), block_chars in usage.items():
+        print(f"U+{start:04X}-U+{end:04X} {name}: {len(block_chars)} characters"
+              + ("" if block_file or name != 'other' else " (no unicode_blocks file)"))
+        if cmaps:
+            covering = [font for font, cmap in cmaps.items() if all(ord(c) in cmap for c in block_chars)]
+            print("    covered by: " + (", ".join(covering) or "no single font"))
+            uncovered = [c for c in block_chars if not any(ord(c) in cmap for cmap in cmaps.values())]
+            for char in uncovered:
+                print(f"    not in any configured font: {char} U+{ord(char):04X} {char_name(char)} ({sources[char]})")
+        if args.list:
+            for char in block_chars:
+                print(f"    {char} U+{ord(char):04X} {char_name(char)}: {chars[char]} ({sources[char]})")
+
+    needed = needed_options(chars, cmaps)
+    font_options = {option for _, _, option in SCRIPT_OPTIONS}
+    enabled = {option for option in font_options if declared.get(option) and set(declared[option]) <= flags}
+    for option in sorted(needed - enabled):
+        print(f"Needed: add {option} to the \\documentclass options")
+    for option in sorted(enabled - needed):
+        print(f"Unused: {option} is enabled, but no text needs it; removing it loads fewer fonts")
+
+    if write_if_changed(args.output, fallback_config(usage, needed, sources, enabled)):
+        print(f"Wrote {args.output}")
@@ -0,0 +1,144 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+# -*- mode: python; python-indent-offset: 4 -*-
+#
+# Reports where a LuaLaTeX build spends its time, from the markers kth/kth-timing.lua writes
+# into the .log file:
+#   [+12.345s] phase begin: fonts
+#   [+15.678s] phase end: fonts
+#   [+20.001s] Shipping out page 3
+# Phases nest (document > chapter: 3 > includepdf: Paper_A.pdf). For each phase the report gives
+# its total time and its self time (total minus the phases inside it); time outside any phase is
+# shown as (other).
+#
+# python3 scripts/compile_profile.py examplethesis.log [more.log ...]   per-phase table; several
+#                                                                       logs are averaged
+# python3 scripts/compile_profile.py --diff old.log new.log             compare two builds
+# python3 scripts/compile_profile.py build.log --folded build.folded    folded stacks for
+#                                                                       flamegraph.pl or speedscope
+
+import re
+import sys
+import argparse
+from collections import defaultdict
+
+MARKER_RE = re.compile(r'^\[\+(\d+(?:\.\d+)?)s\] (.*)$')
+PHASE_RE = re.compile(r'^phase (begin|end): (.*)$')
+MAX_PRINT_LINE = 79  # TeX wraps log lines at this length (texmf.cnf max_print_line)
+OTHER = '(other)'
+
+def read_markers(log_file, max_print_line=MAX_PRINT_LINE):
+    """Returns the [(seconds, message)] markers of a .log file, with wrapped lines joined."""
+    markers = []
+    with open(log_file, 'r', encoding='utf-8', errors='replace') as f:
+        lines = f.read().splitlines()
+    for i, line in enumerate(lines):
+        if not line.startswith('[+'):
+            continue
+        part = line
+        while len(part) == max_print_line and i + 1 < len(lines) and not lines[i + 1].startswith('[+'):
+            i += 1
+            part = lines[i]
+            line += part
+        match = MARKER_RE.match(line)
+        if match:
+            markers.append((float(match.group(1)), match.group(2)))
+    return markers
+
+def phase_times(markers):
+    """Returns ({stack: self seconds}, total seconds) for a list of markers.
+
+    A stack is a tuple of nested phase names. Ending a phase also ends the phases opened inside
+    it; phases still open at the last marker end there.
+    """
+    self_times = defaultdict(float)
+    stack = []  # [(name, begin)]
+    last = 0.0
+    for seconds, message in markers:
+        if stack or seconds > last:
+            self_times[tuple(name for name, _ in stack) or (OTHER,)] += seconds - last
+        last = seconds
+        match = PHASE_RE.match(message)
+        if not match:
+            continue
+        kind, name = match.groups()
+        name = name.strip().replace(';', ',')
+        if kind == 'begin':
+            stack.append((name, seconds))
+        elif name in (n for n, _ in stack):
+            while stack.pop()[0] != name:
+                pass
+    return dict(self_times), last
+
+def totals(self_times):
+    """{stack: self seconds} -> {stack: total seconds} including every enclosing stack."""
+    result = defaultdict(float)
+    for stack, seconds in self_times.items():
+        for depth in range(1, len(stack) + 1):
+            result[stack[:depth]] += seconds
+    return dict(result)
+
+def profile(log_files, max_print_line=MAX_PRINT_LINE):
+    """Averages the phase self times and build totals of the given logs. Returns (self_times, total)."""
+    summed, total = defaultdict(float), 0.0
+    for log_file in log_files:
+        self_times, seconds = phase_times(read_markers(log_file, max_print_line))
+        if not self_times:
+            print(f"Warning: {log_file} has no [+N.NNNs] time stamps")
+        for stack, value in self_times.items():
+            summed[stack] += value
+        total += seconds
+    n = len(log_files)
+    return {stack: value / n for stack, value in summed.items()}, total / n
+
+def print_table(self_times, total):
+    """Prints the phases in tree order with total and self time."""
+    all_totals = totals(self_times)
+    print(f"{'phase':<56} {'total s':>9} {'self s':>9} {'%':>6}")
+    for stack in all_totals:
+        name = '  ' * (len(stack) - 1) + stack[-1]
+        share = 100 * all_totals[stack] / total if total else 0.0
+        print(f"{name:<56} {all_totals[stack]:>9.3f} {self_times.get(stack, 0.0):>9.3f} {share:>6.1f}")
+    print(f"{'total':<56} {total:>9.3f}")
+
+def print_diff(old, new):
+    """Prints the phases whose total time changed between two profiles, largest change first."""
+    (old_self, old_total), (new_self, new_total) = old, new
+    old_totals, new_totals = totals(old_self), totals(new_self)
+    rows = []
+    for stack in set(old_totals) | set(new_totals):
+        before, after = old_totals.get(stack, 0.0), new_totals.get(stack, 0.0)
+        rows.append((after - before, ' > '.join(stack), before, after))
+    rows.sort(key=lambda row: -abs(row[0]))
+    print(f"{'phase':<56} {'old s':>9} {'new s':>9} {'delta s':>9} {'%':>7}")
+    for delta, name, before, after in rows:
+        change = f"{100 * delta / before:+.1f}" if before else 'new'
+        print(f"{name:<56} {before:>9.3f} {after:>9.3f} {delta:>+9.3f} {change:>7}")
+    print(f"{'total':<56} {old_total:>9.3f} {new_total:>9.3f} {new_total - old_total:>+9.3f}")
+
+def folded_stacks(self_times):
+    """Folded stack lines ('a;b;c milliseconds') for flamegraph.pl, speedscope or inferno."""
+    return [f"{';'.join(stack)} {round(seconds * 1000)}"
+            for stack, seconds in sorted(self_times.items()) if round(seconds * 1000) > 0]
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Per-phase timing of LuaLaTeX builds from their .log files")
+    arg_parser.add_argument('logs', nargs='*', help=".log files of one build (averaged if several)")
+    arg_parser.add_argument('--diff', nargs=2, metavar=('OLD', 'NEW'), help="compare two .log files")
+    arg_parser.add_argument('--folded', metavar='FILE', help="write folded stacks for a flamegraph to FILE")
+    arg_parser.add_argument('--max-print-line', type=int, default=MAX_PRINT_LINE,
+                            help="log line width of the TeX installation (default: %(default)s)")
+    args = arg_parser.parse_args()
+
+    if args.diff:
+        print_diff(profile([args.diff[0]], args.max_print_line), profile([args.diff[1]], args.max_print_line))
+    elif args.logs:
+        self_times, total = profile(args.logs, args.max_print_line)
+        print_table(self_times, total)
+        if args.folded:
+            with open(args.folded, 'w', encoding='utf-8') as f:
+                f.write("\n".join(folded_stacks(self_times)) + "\n")
+            print(f"Wrote {args.folded}")
+    else:
+        arg_parser.print_usage()
+        sys.exit(1)
@@ -9,15 +9,13 @@
 
 
 import streamlit as st
-import requests
-from bs4 import BeautifulSoup
 import re
 import json
 import os
+import kth_directory
 
 # --- 1. CONFIGURATION & BILINGUAL DATA ---
 STATE_FILE = "wizard_session.json"
-HEADERS = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
 
 TRANSLATIONS = {
     'English': {
@@ -27,6 +25,7 @@ TRANSLATIONS = {
         'sup_header': "2. Supervisors",
         'out_header': "3. LaTeX Generation",
         'user_label': "KTH Username",
+        'sup_user_label': "KTH Username(s), separated by commas",
         'fetch_btn': "Fetch Data",
         'edit_expander': "Edit Details",
         'fname': "First Name", 'lname': "Last Name", 'email': "Email",
@@ -47,6 +46,7 @@ TRANSLATIONS = {
         'sup_header': "2. Handledare",
         'out_header': "3. LaTeX-generering",
         'user_label': "KTH-användarnamn",
+        'sup_user_label': "KTH-användarnamn, separerade med kommatecken",
         'fetch_btn': "Hämta data",
         'edit_expander': "Redigera detaljer",
         'fname': "Förnamn", 'lname': "Efternamn", 'email': "E-post",
@@ -62,8 +62,6 @@ TRANSLATIONS = {
     }
 }
 
-SCHOOL_MAP_letters = {'a': "ABE", 'm': "ITM", 's': "SCI", 'c': "CBH", 'j': "EECS"}
-
 EDUCATION_CODES = {
     'ARKITEKT': {'swe': "Arkitektur", 'eng': "Architecture"},
     'BIOLFYS': {'swe': "Biologisk fysik", 'eng': "Biological Physics"},
@@ -149,42 +147,11 @@ def load_state():
         except: pass
 
 def get_kth_person_info(username):
-    try:
-        url = f"https://www.kth.se/profile/{username}/"
-        res = requests.get(url, headers=HEADERS, timeout=10)
-        if res.status_code != 200: return None, "Profile not found."
-        html_content = res.text
-        soup = BeautifulSoup(html_content, 'html.parser')
-        kthid = None
-        kthid_elem = soup.find(attrs={"class": "kthId"})
-        if kthid_elem: kthid = kthid_elem.get_text(strip=True)
-        if not kthid:
-            span_match = re.search(r'<span class="kthId">(u1[a-z0-9]+)</span>', html_content)
-            if span_match: kthid = span_match.group(1)
-        if not kthid:
-            match = re.search(r'u1[a-z0-9]{6}', html_content)
-            kthid = match.group(0) if match else "u1XXXXXX"
-        
-        email_elem = soup.find('a', href=re.compile(r'mailto:'))
-        email = email_elem.get_text(strip=True) if email_elem else ""
-        works_for = soup.find('div', class_='worksforWrapper')
-        if works_for:
-            dept_name = works_for.find('a').get_text(strip=True)
-            dir_link = works_for.find('a')['href']
-            school_letter = re.search(r'/directory/([a-z])/', dir_link.lower())
-            school_acronym = SCHOOL_MAP_letters.get(school_letter.group(1), "XXX") if school_letter else "XXX"
-            dir_res = requests.get(dir_link, headers=HEADERS, timeout=10)
-            dir_soup = BeautifulSoup(dir_res.text, 'html.parser')
-            for row in dir_soup.find_all('tr'):
-                e_td = row.find('td', class_='email')
-                if e_td and email in e_td.get_text():
-                    return {
-                        "kthid": kthid, "email": email, "is_kth": True, "dept": dept_name, "school": school_acronym,
-                        "fname": row.find('td', class_='firstname').get_text(strip=True),
-                        "lname": row.find('td', class_='lastname').get_text(strip=True)
-                    }, None
-        return None, "Not found in directory."
-    except Exception as e: return None, str(e)
+    return kth_directory.lookup_person(username)
+
+def split_usernames(text):
+    """'alice, bob carol' -> ['alice', 'bob', 'carol']"""
+    return [u for u in re.split(r'[\s,;]+', text or "") if u]
 
 # --- 4. UI SETUP ---
 st.set_page_config(page_title="KTH Config Wizard", layout="wide")
@@ -240,11 +207,21 @@ if st.session_state['author']:
 st.header(t['sup_header'])
 cs1, cs2 = st.columns([1, 2])
 with cs1:
-    s_user = st.text_input(t['user_label'], key="sup_input")
+    s_user = st.text_input(t['sup_user_label'], key="sup_input")
+    # errors of the last lookup survive its rerun and are shown once
+    for message in st.session_state.pop('sup_lookup_errors', []):
+        st.error(message)
     if st.button(t['fetch_btn'], key="sup_fetch"):
-        data, err = get_kth_person_info(s_user)
-        if data: st.session_state['supervisors'].append(data); save_state(); st.rerun()
-        else: st.error(err)
+        # several usernames (a whole supervisor team) are looked up concurrently
+        found, errors = False, []
+        for username, data, err in kth_directory.lookup_people(split_usernames(s_user)):
+            if data: st.session_state['supervisors'].append(data); found = True
+            else: errors.append(f"{username}: {err}")
+        if found:
+            st.session_state['sup_lookup_errors'] = errors
+            save_state(); st.rerun()
+        for message in errors:
+            st.error(message)
 with cs2:
     with st.expander(t['add_ext_sup']):
         ef, el, ee, eo = st.text_input(t['fname']), st.text_input(t['lname']), st.text_input(t['email']), st.text_input(t['ext_org'])
@@ -0,0 +1,150 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+# -*- mode: python; python-indent-offset: 4 -*-
+#
+# Generates luaotfload-blacklist.cnf without a LuaLaTeX run.
+#
+# listfonts_and_generate_exclusion_list.tex loads every installed font in turn, in one LuaLaTeX
+# job, and excludes the fonts that cannot typeset their own basename. This script applies the
+# same test to the font files' cmaps directly (every character of the basename except '-'
+# must be mapped; a font that cannot be read fails), in a process pool. Results are cached in
+# .cache/font_blacklist.json by path, size and mtime, so after a TeX Live update only the new
+# or changed fonts are opened.
+#
+# The output has the blacklist format: one font path per line. Lines the user commented out
+# with '#' stay commented, and entries for fonts that were not scanned are kept as they are.
+#
+# python3 scripts/font_blacklist.py [--font-dir DIR ...] [--output luaotfload-blacklist.cnf]
+# requires: pip install fonttools
+
+import os
+import sys
+import json
+import argparse
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+from build_utils import write_if_changed
+
+try:
+    from fontTools.ttLib import TTFont
+except ImportError:
+    TTFont = None
+
+BLACKLIST_FILE = 'luaotfload-blacklist.cnf'
+CACHE_FILE = os.path.join('.cache', 'font_blacklist.json')
+FONT_SUFFIXES = ('.otf', '.ttf', '.otc', '.ttc')
+SYSTEM_FONT_DIRS = ['/usr/share/fonts', '/usr/local/share/fonts', os.path.expanduser('~/.fonts'),
+                    os.path.expanduser('~/.local/share/fonts'), '/Library/Fonts', '/System/Library/Fonts']
+
+def default_font_dirs():
+    """The system font directories plus the TeX trees' OpenType and TrueType fonts."""
+    dirs = [d for d in SYSTEM_FONT_DIRS if os.path.isdir(d)]
+    for var in ('TEXMFDIST', 'TEXMFLOCAL'):
+        try:
+            root = subprocess.run(['kpsewhich', f'-var-value={var}'], capture_output=True,
+                                  text=True, timeout=30).stdout.strip()
+        except (OSError, subprocess.SubprocessError):
+            continue
+        for sub in ('opentype', 'truetype'):
+            path = os.path.join(root, 'fonts', sub)
+            if root and os.path.isdir(path):
+                dirs.append(path)
+    return dirs
+
+def find_fonts(font_dirs):
+    fonts = []
+    for font_dir in font_dirs:
+        for root, _, files in os.walk(font_dir):
+            fonts.extend(os.path.join(root, name) for name in files if name.lower().endswith(FONT_SUFFIXES))
+    return sorted(set(fonts))
+
+def missing_glyphs(path):
+    """Returns the characters of the font's basename (except '-') it cannot render, or None if it can.
+
+    A font that cannot be read gets ['unreadable'], as a missing cache file did in the TeX test.
+    """
+    basename = os.path.basename(path)
+    try:
+        # luaotfload loads the first font of a collection for {file:...}
+        font = TTFont(path, fontNumber=0, lazy=True)
+        cmap = font.getBestCmap() or {}
+        font.close()
+    except Exception:  # fontTools raises many kinds of errors for broken fonts
+        return ['unreadable']
+    missing = sorted({c for c in basename if c != '-' and ord(c) not in cmap})
+    return missing or None
+
+def load_cache():
+    try:
+        with open(CACHE_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_cache(cache):
+    os.makedirs(os.path.dirname(CACHE_FILE), exist_ok=True)
+    with open(CACHE_FILE + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(cache, f)
+    os.replace(CACHE_FILE + '.tmp', CACHE_FILE)
+
+def check_fonts(fonts, workers=None):
+    """Returns {path: missing characters or None}, opening only fonts that changed since the last run."""
+    cache = load_cache()
+    results, stale = {}, []
+    for path in fonts:
+        st = os.stat(path)
+        cached = cache.get(path)
+        if cached and cached['size'] == st.st_size and cached['mtime_ns'] == st.st_mtime_ns:
+            results[path] = cached
+        else:
+            stale.append((path, st.st_size, st.st_mtime_ns))
+    if stale:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            checked = pool.map(missing_glyphs, [path for path, _, _ in stale], chunksize=16)
+            for (path, size, mtime_ns), missing in zip(stale, checked):
+                results[path] = {'size': size, 'mtime_ns': mtime_ns, 'missing': missing}
+    if stale or len(results) != len(cache):
+        save_cache(results)
+    print(f"Checked {len(fonts)} fonts ({len(stale)} opened, {len(fonts) - len(stale)} from the cache)")
+    return {path: result['missing'] for path, result in results.items()}
+
+def read_blacklist(path):
+    """Returns (entries, commented): the listed paths and those commented out with '#'."""
+    entries, commented = [], set()
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line.startswith('#'):
+                    commented.add(line.lstrip('#').strip())
+                elif line:
+                    entries.append(line)
+    return entries, commented
+
+def generate_blacklist(font_dirs=None, output=BLACKLIST_FILE, workers=None):
+    """Writes the blacklist for the fonts under font_dirs. Returns the number of excluded fonts."""
+    font_dirs = [os.path.abspath(d) for d in (font_dirs or default_font_dirs())]
+    results = check_fonts(find_fonts(font_dirs), workers)
+    old_entries, commented = read_blacklist(output)
+
+    excluded = {path for path, missing in results.items() if missing}
+    # entries for fonts this run did not look at (e.g. another machine's TeX tree) are kept
+    excluded.update(path for path in old_entries + sorted(commented) if path not in results)
+    lines = [('#' if path in commented else '') + path for path in sorted(excluded)]
+    if write_if_changed(output, "\n".join(lines) + "\n"):
+        print(f"Wrote {output} with {len(lines)} entries")
+    else:
+        print(f"{output} is up to date ({len(lines)} entries)")
+    return len(lines)
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Generate " + BLACKLIST_FILE + " from the fonts' cmaps")
+    arg_parser.add_argument('--font-dir', action='append',
+                            help="directory to scan, may be repeated (default: system and TeX font directories)")
+    arg_parser.add_argument('--output', default=BLACKLIST_FILE, help="blacklist file (default: %(default)s)")
+    arg_parser.add_argument('--workers', type=int, help="size of the process pool")
+    args = arg_parser.parse_args()
+    if TTFont is None:
+        print("fontTools is not installed (pip install fonttools).")
+        sys.exit(1)
+    generate_blacklist(args.font_dir, args.output, args.workers)
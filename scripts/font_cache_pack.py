@@ -0,0 +1,182 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+# -*- mode: python; python-indent-offset: 4 -*-
+#
+# Packs the LuaTeX font cache (the .luc/.lua files luaotfload writes to
+# luatex-cache/generic/fonts/otl) into one compressed archive, and restores it.
+#
+# kth/kth-font-cache.lua copies the cache file by file from inside a TeX run, and the copy in
+# saved_font_cache/ is committed uncompressed. Here the archive is a zip whose members are named
+# by the SHA-256 of their contents (identical files are stored once), plus a manifest.json with
+# the font name, path, size, mtime, hash and the luaotfload version of every entry. A restore
+# only extracts the entries that are missing or stale in the target cache, in parallel, so a
+# fresh container (warmup.tex, Overleaf) gets a warm cache in one step instead of a font rescan.
+#
+# python3 scripts/font_cache_pack.py pack [--source DIR] [--archive FILE]
+# python3 scripts/font_cache_pack.py restore [--cache-dir DIR] [--archive FILE] [--force]
+# python3 scripts/font_cache_pack.py list [--archive FILE]
+
+import os
+import re
+import sys
+import json
+import hashlib
+import zipfile
+import argparse
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+SAVED_DIR = 'saved_font_cache'
+ARCHIVE_FILE = 'saved_font_cache.zip'
+MANIFEST = 'manifest.json'
+CACHE_SUFFIXES = ('.luc', '.lua')
+OTL_SUBDIR = os.path.join('luatex-cache', 'generic', 'fonts', 'otl')
+# where kth/kth-font-cache.lua restores to when TEXMFCACHE is not known (Overleaf)
+DEFAULT_OTL_DIR = '/home/tex/texmf-var/luatex-cache/generic/fonts/otl'
+ZIP_DATE = (1980, 1, 1, 0, 0, 0)  # fixed member timestamps keep the archive reproducible
+
+def file_sha256(path):
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+def luaotfload_version():
+    """The installed luaotfload version (from luaotfload-tool), or None."""
+    try:
+        output = subprocess.run(['luaotfload-tool', '--version'], capture_output=True, text=True,
+                                timeout=30).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None
+    match = re.search(r'luaotfload[^\n]*?(\d+\.\d+(?:\.\d+)?)', output)
+    return match.group(1) if match else None
+
+def otl_cache_dir():
+    """The luaotfload otl cache directory: $TEXMFCACHE (as latexmkrc sets it), kpsewhich, or Overleaf's."""
+    texmfcache = os.environ.get('TEXMFCACHE')
+    if not texmfcache:
+        try:
+            texmfcache = subprocess.run(['kpsewhich', '-var-value=TEXMFCACHE'], capture_output=True,
+                                        text=True, timeout=30).stdout.strip().split(os.pathsep)[0]
+        except (OSError, subprocess.SubprocessError):
+            texmfcache = None
+    return os.path.join(texmfcache, OTL_SUBDIR) if texmfcache else DEFAULT_OTL_DIR
+
+def scan_cache(source):
+    """Returns the manifest entries for the cache files under source, sorted by path."""
+    entries = []
+    for root, _, files in os.walk(source):
+        for name in files:
+            if not name.endswith(CACHE_SUFFIXES):
+                continue
+            path = os.path.join(root, name)
+            st = os.stat(path)
+            entries.append({
+                'path': os.path.relpath(path, source).replace(os.sep, '/'),
+                'font': os.path.splitext(name)[0],
+                'size': st.st_size,
+                'mtime': int(st.st_mtime),
+                'sha256': file_sha256(path),
+            })
+    return sorted(entries, key=lambda e: e['path'])
+
+def pack(source=SAVED_DIR, archive=ARCHIVE_FILE, version=None):
+    """Writes the cache files of source to archive. Returns the manifest."""
+    entries = scan_cache(source)
+    version = version or luaotfload_version()
+    for entry in entries:
+        entry['luaotfload_version'] = version
+    manifest = {'format': 1, 'luaotfload_version': version, 'entries': entries}
+
+    tmp_path = archive + '.tmp'
+    with zipfile.ZipFile(tmp_path, 'w') as zf:
+        info = zipfile.ZipInfo(MANIFEST, ZIP_DATE)
+        info.compress_type = zipfile.ZIP_DEFLATED
+        zf.writestr(info, json.dumps(manifest, indent=1))
+        stored = set()
+        for entry in entries:
+            if entry['sha256'] in stored:
+                continue
+            stored.add(entry['sha256'])
+            info = zipfile.ZipInfo('objects/' + entry['sha256'], ZIP_DATE)
+            info.compress_type = zipfile.ZIP_LZMA
+            with open(os.path.join(source, entry['path']), 'rb') as f:
+                zf.writestr(info, f.read())
+    os.replace(tmp_path, archive)
+    return manifest
+
+def read_manifest(archive=ARCHIVE_FILE):
+    with zipfile.ZipFile(archive) as zf:
+        return json.loads(zf.read(MANIFEST))
+
+def is_current(entry, target):
+    """True if target already holds the entry: same size and mtime, or else the same hash."""
+    try:
+        st = os.stat(target)
+    except FileNotFoundError:
+        return False
+    if st.st_size != entry['size']:
+        return False
+    return int(st.st_mtime) == entry['mtime'] or file_sha256(target) == entry['sha256']
+
+def _restore_entry(archive, entry, target):
+    # each thread uses its own ZipFile handle; decompression releases the GIL
+    with zipfile.ZipFile(archive) as zf:
+        data = zf.read('objects/' + entry['sha256'])
+    if hashlib.sha256(data).hexdigest() != entry['sha256']:
+        raise ValueError(f"corrupt archive member for {entry['path']}")
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    with open(target + '.tmp', 'wb') as f:
+        f.write(data)
+    os.replace(target + '.tmp', target)
+    os.utime(target, (entry['mtime'], entry['mtime']))
+
+def restore(archive=ARCHIVE_FILE, cache_dir=None, force=False, workers=None):
+    """Extracts the missing or stale entries of archive into cache_dir. Returns the number restored."""
+    manifest = read_manifest(archive)
+    cache_dir = cache_dir or otl_cache_dir()
+    installed = luaotfload_version()
+    packed = manifest.get('luaotfload_version')
+    if installed and packed and installed != packed and not force:
+        print(f"{archive} was packed with luaotfload {packed}, but {installed} is installed; "
+              f"luaotfload would rebuild these entries. Use --force to restore anyway.")
+        return 0
+
+    stale = [(entry, os.path.join(cache_dir, *entry['path'].split('/'))) for entry in manifest['entries']]
+    stale = [(entry, target) for entry, target in stale if not is_current(entry, target)]
+    if stale:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(lambda item: _restore_entry(archive, *item), stale))
+    print(f"Restored {len(stale)} of {len(manifest['entries'])} font cache entries to {cache_dir}")
+    return len(stale)
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Pack or restore the LuaTeX font cache")
+    arg_parser.add_argument('--archive', default=ARCHIVE_FILE, help="archive file (default: %(default)s)")
+    commands = arg_parser.add_subparsers(dest='command', required=True)
+    pack_parser = commands.add_parser('pack', help="pack a font cache directory into the archive")
+    pack_parser.add_argument('--source', default=SAVED_DIR,
+                             help="directory with the .luc/.lua files (default: %(default)s)")
+    pack_parser.add_argument('--luaotfload-version', help="record this version instead of asking luaotfload-tool")
+    restore_parser = commands.add_parser('restore', help="restore missing or stale entries into the font cache")
+    restore_parser.add_argument('--cache-dir', help="luaotfload otl cache directory (default: from TEXMFCACHE)")
+    restore_parser.add_argument('--force', action='store_true', help="restore even if luaotfload versions differ")
+    restore_parser.add_argument('--workers', type=int, help="number of parallel extractions")
+    commands.add_parser('list', help="show the manifest of the archive")
+    args = arg_parser.parse_args()
+
+    if args.command == 'pack':
+        manifest = pack(args.source, args.archive, args.luaotfload_version)
+        print(f"Packed {len(manifest['entries'])} font cache entries into {args.archive} "
+              f"({os.path.getsize(args.archive)} bytes, sha256 {file_sha256(args.archive)[:16]})")
+    elif args.command == 'restore':
+        if not os.path.exists(args.archive):
+            print(f"No archive {args.archive}. Nothing to restore.")
+            sys.exit(1)
+        restore(args.archive, args.cache_dir, args.force, args.workers)
+    else:
+        manifest = read_manifest(args.archive)
+        print(f"luaotfload {manifest.get('luaotfload_version')}")
+        for entry in manifest['entries']:
+            print(f"{entry['sha256'][:12]}  {entry['size']:>9}  {entry['path']}")
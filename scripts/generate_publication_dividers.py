@@ -1,38 +1,65 @@
-import json
-import os
-import re
+import argparse
+from build_utils import write_if_changed
+from pub_db import load_records
+from latex_escape import clean_latex_string
+import pdf_subset
 
-def clean_latex_string(text):
-    """Cleans a string for LaTeX while preserving math mode."""
-    if not text: return ""
-    text = re.sub(r'\s+', ' ', text).strip()
-    parts = re.split(r'(\$.*?\$)', text)
-    mapping = {
-        '&': r'\&', '%': r'\%', '$': r'\$', '#': r'\#',
-        '_': r'\_', '{': r'\{', '}': r'\}',
-        '~': r'\textasciitilde{}', '^': r'\textasciicircum{}'
-    }
-    cleaned_parts = []
-    for part in parts:
-        if part.startswith('$') and part.endswith('$'):
-            cleaned_parts.append(part)
-        else:
-            local_mapping = mapping.copy()
-            del local_mapping['$'] 
-            temp_part = part
-            for char, escape in local_mapping.items():
-                temp_part = temp_part.replace(char, escape)
-            cleaned_parts.append(temp_part)
-    return "".join(cleaned_parts)
+def divider_fragment(data, subset=None):
+    """Renders the divider page and included PDF of one publication (a Publication record).
 
-def generate_latex_dividers(json_path, output_path):
-    with open(json_path, 'r', encoding='utf-8') as f:
-        pubs = json.load(f)
+    subset is the page-subset PDF to include instead of the whole file, if any.
+    """
+    idx = data.tab_index
+    label = data.label
+    bib_key = data.bib_key
+    pdf_file = data.file_path
+    pdf_downloaded = data.pdf_downloaded
+    # Remove .pdf extension for the \myfancytab command
+    path_base = pdf_file.rsplit('.', 1)[0] if '.' in pdf_file else pdf_file
+    
+    scale = data.scale
+    pages = data.pdf_pages
+    perm = data.permission_text
 
+    lines = []
+    lines.append(f"% Divider for {label}")
+    lines.append("\\thispagestyle{empty}")
+    lines.append("\\begin{dividerContent}{0cm}{5cm}")
+    # Note: using the explicit tab_index (idx) instead of the loop counter
+    lines.append(f"\\myfancytab[RIGHT]{{\\ref*{{{label}}}}}{{{idx}}}{{{bib_key}}}{{{path_base}}}")
+    lines.append("")
+    lines.append(perm)
+    lines.append("\\end{dividerContent}")
+    lines.append("\\cleardoublepage")
+    if pdf_downloaded and subset:
+        # Only the used pages, extracted by pdf_subset.py; the full file if the cache is absent
+        lines.append(f"\\IfFileExists{{{subset}}}"
+                     f"{{\\includepdf[pages=-,scale={scale}]{{{subset}}}}}"
+                     f"{{\\includepdf[pages={{{pages}}},scale={scale}]{{{pdf_file}}}}}")
+    elif pdf_downloaded:
+        lines.append(f"\\includepdf[pages={{{pages}}},scale={scale}]{{{pdf_file}}}")
+    else:
+        # Add a comment in the TeX file
+        lines.append(f"% PDF file missing for {label} - please check your Included_publications/ folder")
+        # Optional: Add a visual placeholder in the PDF
+        # Clean the path string so underscores like 'Included_publications' don't break LaTeX
+        clean_path = clean_latex_string(pdf_file)
+        lines.append(f"\\begin{{center}}\\huge\\color{{red}}MISSING PDF: {clean_path}\\end{{center}}")
+        lines.append(f"%\\includepdf[pages={{{pages}}},scale={scale}]{{{pdf_file}}}")
+    lines.append("\\cleardoublepage")
+    return "\n".join(lines)
+
+def render_dividers(pubs, fragment=divider_fragment, subsets=None):
+    """Returns the LaTeX text of the divider section for the publication map pubs.
+
+    fragment renders a single publication; the build driver passes a memoized version.
+    subsets maps diva IDs to page-subset PDFs (see pdf_subset.py) to include instead.
+    """
+    subsets = subsets or {}
     # 1. Filter for included papers
     # 2. Sort them numerically by their 'tab_index'
-    included_papers = [p for p in pubs.values() if p.get('status') == 'included']
-    included_papers.sort(key=lambda x: x.get('tab_index', 99)) # Default to 99 if missing
+    included_papers = [(k, p) for k, p in pubs.items() if p.status == 'included']
+    included_papers.sort(key=lambda item: item[1].tab_order) # papers without a tab_index go last
 
     lines = [
         "%% Auto-generated divider pages",
@@ -83,46 +110,25 @@ def generate_latex_dividers(json_path, output_path):
         "\\makeatother",
     ]
 
-    for data in included_papers:
-        idx = data.get('tab_index')
-        label = data.get('label')
-        bib_key = data.get('bib_key')
-        pdf_file = data.get('file_path', '')
-        pdf_downloaded = data.get('pdf_downloaded', False)
-        # Remove .pdf extension for the \myfancytab command
-        path_base = pdf_file.rsplit('.', 1)[0] if '.' in pdf_file else pdf_file
-        
-        scale = data.get('scale', 0.9)
-        pages = data.get('pdf_pages', '1-')
-        perm = data.get('permission_text', '')
-
-        lines.append(f"% Divider for {label}")
-        lines.append("\\thispagestyle{empty}")
-        lines.append("\\begin{dividerContent}{0cm}{5cm}")
-        # Note: using the explicit tab_index (idx) instead of the loop counter
-        lines.append(f"\\myfancytab[RIGHT]{{\\ref*{{{label}}}}}{{{idx}}}{{{bib_key}}}{{{path_base}}}")
-        lines.append("")
-        lines.append(perm)
-        lines.append("\\end{dividerContent}")
-        lines.append("\\cleardoublepage")
-        if pdf_downloaded:
-            lines.append(f"\\includepdf[pages={{{pages}}},scale={scale}]{{{pdf_file}}}")
-        else:
-            print(f"no PDF file downloaded for {label}")
-            # Add a comment in the TeX file
-            lines.append(f"% PDF file missing for {label} - please check your Included_publications/ folder")
-            # Optional: Add a visual placeholder in the PDF
-            # Clean the path string so underscores like 'Included_publications' don't break LaTeX
-            clean_path = clean_latex_string(pdf_file)
-            lines.append(f"\\begin{{center}}\\huge\\color{{red}}MISSING PDF: {clean_path}\\end{{center}}")
-            lines.append(f"%\\includepdf[pages={{{pages}}},scale={scale}]{{{pdf_file}}}")
-        lines.append("\\cleardoublepage")
+    for diva_id, data in included_papers:
+        if not data.pdf_downloaded:
+            print(f"no PDF file downloaded for {data.label}")
+        lines.append(fragment(data, subsets.get(diva_id)))
 
     lines.append("\\FileClose{citedtagsfile}")
     lines.append("\\fi")
+    return "\n".join(lines)
+
+def generate_latex_dividers(json_path, output_path, subset_pdfs=False):
+    pubs = load_records(json_path, status='included')
+    subsets = pdf_subset.subset_pdfs(pubs) if subset_pdfs else None
 
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write("\n".join(lines))
+    write_if_changed(output_path, render_dividers(pubs, subsets=subsets))
 
 if __name__ == "__main__":
-    generate_latex_dividers('publications_map.json', 'lib/publications_dividers_generated.tex')
+    arg_parser = argparse.ArgumentParser(description="Generate lib/publications_dividers_generated.tex")
+    arg_parser.add_argument('--subset-pdfs', action='store_true',
+                            help="include only the used pages, extracted to a cache (see pdf_subset.py)")
+    args = arg_parser.parse_args()
+    generate_latex_dividers('publications_map.json', 'lib/publications_dividers_generated.tex',
+                            subset_pdfs=args.subset_pdfs)
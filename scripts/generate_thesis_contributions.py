@@ -3,75 +3,81 @@
 # -*- mode: python; python-indent-offset: 4 -*-
 #
 
-import json
 from pathlib import Path
+from build_utils import write_if_changed
+from pub_db import load_records
+from latex_escape import clean_latex_string as escape_latex, strip_bibtex_braces
 
 def clean_latex_string(text):
     """
     Escapes LaTeX special characters.
     Note: CReDiT roles often include '&' which must be '\&'.
     """
-    if not text:
-        return ""
-    # Remove bibtex-style braces and escape ampersands
-    text = text.replace("{", "").replace("}", "")
-    text = text.replace("&", r"\&")
-    return text
+    # Remove bibtex-style braces (author names come from BibTeX), then use the shared escaping
+    return escape_latex(strip_bibtex_braces(text))
 
-def generate_contributions(json_path, output_path):
-    if not Path(json_path).exists():
-        return
+def contribution_fragment(paper):
+    """Renders the CReDiT contribution section of one paper (a Publication record)."""
+    tex = []
+    label = (paper.label or "Paper").split(":")[-1]
+    title = clean_latex_string(paper.title)
+    
+    tex.append(f"\\subsection*{{Paper {label}: {title}}}")
+    
+    # Handle Equal Contribution Notes
+    eq = paper.equal_contributors
+    if eq:
+        names = " and ".join([clean_latex_string(n) for n in eq])
+        tex.append(f"\\textit{{{names} contributed equally to this work.}}\\\\")
+    
+    # Handle specific domain/clinical notes
+    note = paper.contribution_note
+    if note:
+        tex.append(f"\\textit{{{clean_latex_string(note)}}}\\\\")
+
+    # CReDiT Role List using enumitem description
+
+    # Increase leftmargin and add itemsep for vertical breathing room 
+    tex.append("\\begin{description}[style=multiline, leftmargin=4cm, font=\\bfseries, itemsep=1.5ex]")
 
-    with open(json_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    credit = paper.credit_contributions
+    for author, roles in credit.items():
+        author_name = clean_latex_string(author)
+        # Wrap the name in a parbox to allow wrapping and remove the colon 
+        # The width (3.8cm) should be slightly less than the leftmargin (4cm)
+        # Group the parbox in extra braces to prevent "extra }" errors
+        # Grouping protects the [t] from the \item parser
+        label_content = f"{{\\parbox[t]{{3.8cm}}{{\\raggedright \\bfseries {author_name}}}}}"
+    
+        clean_roles = [clean_latex_string(r) for r in roles]
+        role_str = ", ".join(clean_roles)
+    
+        tex.append(f"    \\item[{label_content}] {role_str}")
 
+    tex.append("\\end{description}\n")
+    tex.append("\\bigskip\n")
+    return "\n".join(tex)
+
+def render_contributions(data, fragment=contribution_fragment):
+    """Returns the LaTeX text of the CReDiT contributions for the publication map data.
+
+    fragment renders a single paper; the build driver passes a memoized version.
+    """
     # Filter and sort by the student's defined tab order
-    included = [v for v in data.values() if v.get("status") == "included"]
-    included.sort(key=lambda x: x.get("tab_index", 999))
+    included = [v for v in data.values() if v.status == "included"]
+    included.sort(key=lambda x: x.tab_order)
 
     tex = ["% Auto-generated CReDiT Contributions\n"]
-    
-    for paper in included:
-        label = paper.get("label", "Paper").split(":")[-1]
-        title = clean_latex_string(paper.get("title", "Untitled"))
-        
-        tex.append(f"\\subsection*{{Paper {label}: {title}}}")
-        
-        # Handle Equal Contribution Notes
-        eq = paper.get("equal_contributors", [])
-        if eq:
-            names = " and ".join([clean_latex_string(n) for n in eq])
-            tex.append(f"\\textit{{{names} contributed equally to this work.}}\\\\")
-        
-        # Handle specific domain/clinical notes
-        note = paper.get("contribution_note", "")
-        if note:
-            tex.append(f"\\textit{{{clean_latex_string(note)}}}\\\\")
+    tex.extend(fragment(paper) for paper in included)
+    return "\n".join(tex)
 
-        # CReDiT Role List using enumitem description
+def generate_contributions(json_path, output_path):
+    if not Path(json_path).exists():
+        return
 
-        # Increase leftmargin and add itemsep for vertical breathing room 
-        tex.append("\\begin{description}[style=multiline, leftmargin=4cm, font=\\bfseries, itemsep=1.5ex]")
-    
-        credit = paper.get("credit_contributions", {})
-        for author, roles in credit.items():
-            author_name = clean_latex_string(author)
-            # Wrap the name in a parbox to allow wrapping and remove the colon 
-            # The width (3.8cm) should be slightly less than the leftmargin (4cm)
-            # Group the parbox in extra braces to prevent "extra }" errors
-            # Grouping protects the [t] from the \item parser
-            label_content = f"{{\\parbox[t]{{3.8cm}}{{\\raggedright \\bfseries {author_name}}}}}"
-        
-            clean_roles = [clean_latex_string(r) for r in roles]
-            role_str = ", ".join(clean_roles)
-        
-            tex.append(f"    \\item[{label_content}] {role_str}")
-    
-        tex.append("\\end{description}\n")
-        tex.append("\\bigskip\n")
+    data = load_records(json_path, status='included')
 
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write("\n".join(tex))
+    write_if_changed(output_path, render_contributions(data))
 
 if __name__ == "__main__":
     generate_contributions("publications_map.json", "lib/thesis_contributions_generated.tex")
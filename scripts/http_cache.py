@@ -0,0 +1,108 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+# -*- mode: python; python-indent-offset: 4 -*-
+#
+# On-disk HTTP response cache with conditional requests.
+#
+# Each URL gets a body file and a small JSON metadata file (ETag, Last-Modified, SHA-256 of the
+# body) under CACHE_DIR. fetch() sends If-None-Match/If-Modified-Since, so an unchanged resource
+# costs a 304 and no download. The cached body can also be replayed without network access.
+
+import os
+import json
+import hashlib
+import tempfile
+import urllib.error
+import urllib.request
+from datetime import datetime, timezone
+
+CACHE_DIR = os.path.join('.cache', 'http')
+CHUNK_SIZE = 64 * 1024
+
+def cache_paths(url):
+    """Returns the (body, metadata) file names used to cache url."""
+    digest = hashlib.sha256(url.encode('utf-8')).hexdigest()[:24]
+    base = os.path.join(CACHE_DIR, digest)
+    return base + '.body', base + '.json'
+
+def load_entry(url):
+    """Returns the cached metadata for url, or None if there is no complete cache entry."""
+    body_path, meta_path = cache_paths(url)
+    if not (os.path.exists(body_path) and os.path.exists(meta_path)):
+        return None
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    entry['body_path'] = body_path
+    return entry
+
+def _save_entry(url, entry):
+    _, meta_path = cache_paths(url)
+    entry = {k: v for k, v in entry.items() if k != 'body_path'}
+    with open(meta_path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(entry, f, indent=2)
+    os.replace(meta_path + '.tmp', meta_path)
+
+def fetch(url, offline=False, headers=None, timeout=None):
+    """Returns (body_path, sha256, changed) for url, using the cache where possible.
+
+    changed is False when the server answered 304 or sent a body identical to the cached one.
+    With offline=True the cached body is returned without contacting the server. Returns
+    (None, None, False) if the resource is not available.
+    """
+    entry = load_entry(url)
+    if offline:
+        if entry is None:
+            print(f"Offline mode: no cached response for {url}")
+            return None, None, False
+        return entry['body_path'], entry['sha256'], False
+
+    request = urllib.request.Request(url, headers=dict(headers or {}))
+    if entry is not None:
+        if entry.get('etag'):
+            request.add_header('If-None-Match', entry['etag'])
+        if entry.get('last_modified'):
+            request.add_header('If-Modified-Since', entry['last_modified'])
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    body_path, _ = cache_paths(url)
+    now = datetime.now(timezone.utc).isoformat(timespec='seconds')
+    tmp_path = None
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            # Stream the body to a temp file while hashing, so large exports never sit in memory
+            sha = hashlib.sha256()
+            fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix='.part')
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in iter(lambda: response.read(CHUNK_SIZE), b''):
+                    sha.update(chunk)
+                    f.write(chunk)
+            new_entry = {
+                'url': url,
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'sha256': sha.hexdigest(),
+                'fetched': now,
+            }
+    except urllib.error.HTTPError as e:
+        if e.code == 304 and entry is not None:
+            entry['checked'] = now
+            _save_entry(url, entry)
+            return entry['body_path'], entry['sha256'], False
+        print(f"HTTP error fetching {url}: {e}")
+        return None, None, False
+    except Exception as e:
+        print(f"Error fetching {url}: {e}")
+        if tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return None, None, False
+
+    changed = entry is None or entry.get('sha256') != new_entry['sha256']
+    if changed:
+        os.replace(tmp_path, body_path)
+    else:
+        os.remove(tmp_path)
+    _save_entry(url, new_entry)
+    return body_path, new_entry['sha256'], changed
@@ -0,0 +1,83 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+# -*- mode: python; python-indent-offset: 4 -*-
+#
+# Identifier index used to cross-reference DiVA records with BibTeX entries.
+#
+# A DOI, ISBN or patent number names a publication exactly, so DiVA_discovery.py first joins
+# the identifiers of a MODS record against this index (one dict lookup each) and only falls
+# back to the fuzzy title match of title_index.py when none of them hits. Identifiers are
+# normalized on both sides: DOIs lower-cased without resolver prefixes, ISBN-10s converted to
+# ISBN-13, patent numbers reduced to their digits (no country prefix or kind code).
+#
+# The entries of Included_publications/*.bib describe the included papers under the
+# references.bib key plus '_pub'; their identifiers resolve to the references.bib key, which
+# is the one \cite and the generators use.
+
+import re
+
+# Tried in this order: the most specific identifier wins
+IDENTIFIER_TYPES = ['doi', 'patent', 'isbn']
+# Bib entry types whose isbn names the entry itself rather than the book it appeared in
+ISBN_ENTRY_TYPES = {'book', 'collection', 'proceedings', 'phdthesis', 'mastersthesis', 'thesis',
+                    'techreport', 'report', 'manual'}
+ALIAS_SUFFIX = '_pub'
+
+def normalize_doi(doi):
+    doi = re.sub(r'^(https?://(dx\.)?doi\.org/|doi:\s*)', '', (doi or '').strip().lower())
+    return doi or None
+
+def normalize_isbn(isbn):
+    digits = re.sub(r'[^0-9X]', '', (isbn or '').upper())
+    if len(digits) == 10:
+        core = '978' + digits[:9]
+        check = (10 - sum(int(c) * (1 if i % 2 == 0 else 3) for i, c in enumerate(core)) % 10) % 10
+        return core + str(check)
+    return digits if len(digits) == 13 else None
+
+def normalize_patent(number):
+    """'US 7107453 B2', 'US7107453B2' and '7107453' all give '7107453'."""
+    match = re.fullmatch(r'([A-Z]{2})?0*(\d+)([A-Z]\d?)?', re.sub(r'[^0-9A-Z]', '', (number or '').upper()))
+    return match.group(2) if match else None
+
+NORMALIZERS = {'doi': normalize_doi, 'isbn': normalize_isbn, 'patent': normalize_patent}
+
+def bib_identifiers(entry):
+    """Returns the normalized [(kind, value)] identifiers of a bibtexparser entry."""
+    entry_type = entry.get('ENTRYTYPE', '').lower()
+    identifiers = [('doi', entry.get('doi'))]
+    if entry_type in ISBN_ENTRY_TYPES:
+        identifiers += [('isbn', isbn) for isbn in re.split(r'[,;]|\s+and\s+', entry.get('isbn', ''))]
+    if entry_type == 'patent':
+        identifiers.append(('patent', entry.get('number')))
+    identifiers = [(kind, NORMALIZERS[kind](value)) for kind, value in identifiers if value]
+    return [(kind, value) for kind, value in identifiers if value]
+
+class IdentifierIndex:
+    """{(kind, normalized identifier): bib key} over the entries of the bib files."""
+
+    def __init__(self, entries, alias_entries=()):
+        self.keys = {}
+        for entry in entries:
+            for identifier in bib_identifiers(entry):
+                self.keys.setdefault(identifier, entry['ID'])  # first entry in file order wins
+        known = {entry['ID'] for entry in entries}
+        for entry in alias_entries:
+            key = entry['ID'][:-len(ALIAS_SUFFIX)] if entry['ID'].endswith(ALIAS_SUFFIX) else entry['ID']
+            if key in known:
+                for identifier in bib_identifiers(entry):
+                    self.keys.setdefault(identifier, key)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def match(self, identifiers):
+        """Returns (bib key, kind) for the first of identifiers [(kind, value)] in the index,
+        or (None, None). Values are normalized here."""
+        for kind in IDENTIFIER_TYPES:
+            for other_kind, value in identifiers:
+                if other_kind == kind:
+                    key = self.keys.get((kind, NORMALIZERS[kind](value)))
+                    if key is not None:
+                        return key, kind
+        return None, None
@@ -0,0 +1,162 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+# -*- mode: python; python-indent-offset: 4 -*-
+#
+# KTH profile and directory lookups for config_wizard.py.
+#
+# A person's profile page names their department, and the department's directory page holds
+# their first and last name. Directory pages are large and shared by everyone in a department,
+# so only their table rows are parsed, and the rows are cached on disk (with a TTL) and in
+# memory, indexed by email and kthid. A second lookup in the same department is a dict hit.
+# Someone missing from a cached page is looked up once more in a freshly downloaded copy.
+#
+# lookup_people() resolves several usernames concurrently, e.g. a whole supervisor team.
+
+import os
+import re
+import json
+import time
+import hashlib
+import importlib.util
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from bs4 import BeautifulSoup, SoupStrainer
+
+# BeautifulSoup's lxml parser is faster; html.parser is the fallback
+HTML_PARSER = 'lxml' if importlib.util.find_spec('lxml') is not None else 'html.parser'
+
+HEADERS = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
+DIRECTORY_CACHE_DIR = os.path.join('.cache', 'kth_directory')
+DIRECTORY_TTL = 7 * 24 * 3600  # seconds a cached directory page is trusted
+SCHOOL_MAP_letters = {'a': "ABE", 'm': "ITM", 's': "SCI", 'c': "CBH", 'j': "EECS"}
+KTHID_RE = re.compile(r'u1[a-z0-9]{6}')
+MAX_LOOKUP_WORKERS = 8
+
+class DirectoryPage:
+    """The rows of one department directory page, indexed by email and kthid."""
+
+    def __init__(self, rows, fetched):
+        self.rows = rows
+        self.fetched = fetched
+        self.by_email = {row['email'].lower(): row for row in rows if row['email']}
+        self.by_kthid = {row['kthid']: row for row in rows if row.get('kthid')}
+
+    def find(self, email=None, kthid=None):
+        """Returns the row of the person with email (or else kthid), or None."""
+        if email:
+            row = self.by_email.get(email.lower())
+            if row is None:
+                # the email cell may hold more than the bare address
+                row = next((r for r in self.rows if email in r['email']), None)
+            if row is not None:
+                return row
+        return self.by_kthid.get(kthid) if kthid else None
+
+_pages = {}
+_page_locks = {}
+_locks_guard = threading.Lock()
+
+def parse_directory(html):
+    """Returns [{'email', 'fname', 'lname', 'kthid'}] for the rows of a directory page."""
+    soup = BeautifulSoup(html, HTML_PARSER, parse_only=SoupStrainer('tr'))
+    rows = []
+    for tr in soup.find_all('tr'):
+        e_td = tr.find('td', class_='email')
+        if not e_td:
+            continue
+        fname = tr.find('td', class_='firstname')
+        lname = tr.find('td', class_='lastname')
+        kthid = KTHID_RE.search(str(tr))
+        rows.append({
+            "email": e_td.get_text(strip=True),
+            "fname": fname.get_text(strip=True) if fname else "",
+            "lname": lname.get_text(strip=True) if lname else "",
+            "kthid": kthid.group(0) if kthid else None,
+        })
+    return rows
+
+def _cache_file(url):
+    return os.path.join(DIRECTORY_CACHE_DIR, hashlib.sha256(url.encode('utf-8')).hexdigest()[:24] + '.json')
+
+def _read_cached(url):
+    try:
+        with open(_cache_file(url), 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+        return DirectoryPage(cached['rows'], cached['fetched'])
+    except (OSError, ValueError, KeyError):
+        return None
+
+def _write_cached(url, page):
+    os.makedirs(DIRECTORY_CACHE_DIR, exist_ok=True)
+    path = _cache_file(url)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump({'url': url, 'fetched': page.fetched, 'rows': page.rows}, f, ensure_ascii=False)
+    os.replace(path + '.tmp', path)
+
+def get_directory(url, ttl=DIRECTORY_TTL, refresh=False):
+    """Returns the DirectoryPage for url, from memory, disk or the network (in that order).
+
+    Concurrent lookups of the same department wait for a single download.
+    """
+    with _locks_guard:
+        lock = _page_locks.setdefault(url, threading.Lock())
+    with lock:
+        now = time.time()
+        page = None if refresh else _pages.get(url) or _read_cached(url)
+        if page is None or now - page.fetched > ttl:
+            res = requests.get(url, headers=HEADERS, timeout=10)
+            res.raise_for_status()
+            page = DirectoryPage(parse_directory(res.text), now)
+            _write_cached(url, page)
+        _pages[url] = page
+        return page
+
+def lookup_person(username):
+    """Returns (person, None) for a KTH username, or (None, error message)."""
+    try:
+        url = f"https://www.kth.se/profile/{username}/"
+        res = requests.get(url, headers=HEADERS, timeout=10)
+        if res.status_code != 200: return None, "Profile not found."
+        html_content = res.text
+        soup = BeautifulSoup(html_content, HTML_PARSER)
+        kthid = None
+        kthid_elem = soup.find(attrs={"class": "kthId"})
+        if kthid_elem: kthid = kthid_elem.get_text(strip=True)
+        if not kthid:
+            span_match = re.search(r'<span class="kthId">(u1[a-z0-9]+)</span>', html_content)
+            if span_match: kthid = span_match.group(1)
+        if not kthid:
+            match = KTHID_RE.search(html_content)
+            kthid = match.group(0) if match else "u1XXXXXX"
+
+        email_elem = soup.find('a', href=re.compile(r'mailto:'))
+        email = email_elem.get_text(strip=True) if email_elem else ""
+        works_for = soup.find('div', class_='worksforWrapper')
+        if works_for:
+            dept_name = works_for.find('a').get_text(strip=True)
+            dir_link = works_for.find('a')['href']
+            school_letter = re.search(r'/directory/([a-z])/', dir_link.lower())
+            school_acronym = SCHOOL_MAP_letters.get(school_letter.group(1), "XXX") if school_letter else "XXX"
+            started = time.time()
+            page = get_directory(dir_link)
+            row = page.find(email=email, kthid=kthid)
+            if row is None and page.fetched < started:
+                # the cached page may predate the person's arrival in the department
+                row = get_directory(dir_link, refresh=True).find(email=email, kthid=kthid)
+            if row:
+                return {
+                    "kthid": kthid, "email": email, "is_kth": True, "dept": dept_name, "school": school_acronym,
+                    "fname": row['fname'], "lname": row['lname']
+                }, None
+        return None, "Not found in directory."
+    except Exception as e: return None, str(e)
+
+def lookup_people(usernames, max_workers=MAX_LOOKUP_WORKERS):
+    """Resolves several usernames concurrently. Returns [(username, person, error)] in input order."""
+    usernames = list(usernames)
+    if not usernames:
+        return []
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(usernames))) as pool:
+        results = list(pool.map(lookup_person, usernames))
+    return [(username, person, err) for username, (person, err) in zip(usernames, results)]
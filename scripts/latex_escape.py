@@ -0,0 +1,70 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+# -*- mode: python; python-indent-offset: 4 -*-
+#
+# Shared LaTeX escaping for the generators.
+#
+# clean_latex_string() collapses whitespace, keeps $...$ math spans as they are and escapes
+# the LaTeX special characters everywhere else. A single precompiled regex decides whether a
+# string needs escaping at all (most titles do not), math spans are found in one regex scan,
+# and only the special characters actually present are replaced. Results are memoized because
+# the same author names, role labels and titles are escaped over and over. A non-breaking space
+# (U+00A0) is written as a tie, '~'.
+#
+# str.translate() with multi-character replacements was measured to be slower in CPython than
+# replacing just the characters present, see benchmarks/bench_latex_escape.py.
+
+import re
+from functools import lru_cache
+
+# Replacement order matters only in that no replacement produces a character handled earlier.
+# '$' is deliberately absent: a lone dollar outside a math span is left alone.
+LATEX_ESCAPES = (
+    ('&', r'\&'), ('%', r'\%'), ('#', r'\#'), ('_', r'\_'),
+    ('{', r'\{'), ('}', r'\}'),
+    ('~', r'\textasciitilde{}'), ('^', r'\textasciicircum{}'),
+)
+
+SPECIAL_RE = re.compile(r'[&%#_{}~^]')
+MATH_RE = re.compile(r'(\$.*?\$)')
+NBSP = '\u00a0'
+TIE_MARK = '\0'  # stands in for a non-breaking space while the rest is escaped
+# BibTeX protection braces are dropped and ties ('Maguire~Jr.') become non-breaking spaces
+BIBTEX_BRACES = str.maketrans({'{': None, '}': None, '~': NBSP})
+
+def escape_text(text):
+    """Escapes the LaTeX special characters of text that contains no math."""
+    if not SPECIAL_RE.search(text):
+        return text
+    for char, escape in LATEX_ESCAPES:
+        if char in text:
+            text = text.replace(char, escape)
+    return text
+
+@lru_cache(maxsize=8192)
+def clean_latex_string(text):
+    """Cleans a string for LaTeX while preserving math mode."""
+    if not text: return ""
+    if NBSP in text:
+        # str.split() would collapse a non-breaking space (e.g. a BibTeX tie) like any other
+        return clean_latex_string(text.replace(NBSP, TIE_MARK)).replace(TIE_MARK, '~')
+    # same result as re.sub(r'\s+', ' ', text).strip(), without the regex
+    text = " ".join(text.split())
+    if '$' not in text:
+        return escape_text(text)
+    # split() puts the captured math spans at the odd positions
+    parts = MATH_RE.split(text)
+    parts[0::2] = [escape_text(part) for part in parts[0::2]]
+    return "".join(parts)
+
+def clean_latex_strings(texts):
+    """Batch version of clean_latex_string(); repeated strings are only escaped once."""
+    return [clean_latex_string(text) for text in texts]
+
+def strip_bibtex_braces(text):
+    """Removes BibTeX protection braces, e.g. 'Gerald Q. {Maguire Jr.}' -> 'Gerald Q. Maguire Jr.'.
+
+    A tie becomes a non-breaking space, which clean_latex_string() writes as '~' again.
+    """
+    if not text: return ""
+    return text.translate(BIBTEX_BRACES)
@@ -2,76 +2,219 @@
 # -*- coding: utf-8 -*-
 # -*- mode: python; python-indent-offset: 4 -*-
 # This script reads the uploaded config_snippet.tex, extracts the keys/values, and performs a surgical replacement in the custom_configuration.tex file.
-
-#!/usr/bin/python3
-# -*- coding: utf-8 -*-
+#
+# The configuration file is tokenized once into an index of the commands that start a line,
+# with their balanced-brace argument spans and whether the line is commented out. All snippet
+# values are then applied in a single rebuild of the file, so the cost is linear in the size of
+# the file plus the snippets. Several queued snippets (config_snippet*.tex) are merged in one
+# pass; when they set the same command, the last one wins.
+#
+# python3 scripts/merge_config.py [snippet ...]
 
 import re
 import os
+import sys
+import glob
+from collections import namedtuple
+
+MAIN_FILE = 'custom_configuration.tex'
+SNIPPET_PATTERN = 'config_snippet*.tex'
+
+# A command at the start of a line, possibly commented out: indentation, '%', control word
+LINE_COMMAND_RE = re.compile(r'^[ \t]*(%?)[ \t]*\\([A-Za-z@]+)', re.MULTILINE)
+# A command anywhere in a snippet
+SNIPPET_COMMAND_RE = re.compile(r'\\([A-Za-z@]+)')
+
+# start/end: span replaced by a merge (whole line(s), through the end of the last line)
+# args: raw text of the arguments following the command, e.g. '{2026}{XXX}' or '[short]{Long}'
+Occurrence = namedtuple('Occurrence', ['name', 'start', 'end', 'args', 'commented'])
+
+def skip_group(text, pos, limit=None):
+    """Returns the index after the balanced {...} group starting at text[pos], or None.
+
+    Escaped braces (\\{, \\}) are ignored and so is everything after a % up to the end of the line,
+    as TeX would. The group must close before limit (default: the end of text).
+    """
+    depth = 0
+    n = len(text) if limit is None else limit
+    while pos < n:
+        c = text[pos]
+        if c == '\\':
+            pos += 2
+            continue
+        if c == '%':
+            newline = text.find('\n', pos, n)
+            if newline < 0:
+                return None
+            pos = newline
+        elif c == '{':
+            depth += 1
+        elif c == '}':
+            depth -= 1
+            if depth == 0:
+                return pos + 1
+        pos += 1
+    return None
+
+def skip_optional(text, pos, limit=None):
+    """Returns the index after the [...] optional argument starting at text[pos], or None.
+
+    Brace groups inside it may contain ']'. The argument must close on its line and before limit.
+    """
+    n = len(text) if limit is None else limit
+    pos += 1
+    while pos < n:
+        c = text[pos]
+        if c == '\\':
+            pos += 2
+            continue
+        if c in '%\n':
+            return None
+        if c == '{':
+            pos = skip_group(text, pos, n)
+            if pos is None:
+                return None
+            continue
+        if c == ']':
+            return pos + 1
+        pos += 1
+    return None
+
+def scan_args(text, pos, limit=None):
+    """Returns the end of the arguments that follow a command name ending at pos.
+
+    The arguments are brace groups and [...] optional arguments. Spaces or tabs may separate the
+    name from the first one; the arguments themselves must be adjacent. An unbalanced argument
+    counts as no argument, and so does one that does not end before limit.
+    """
+    n = len(text) if limit is None else limit
+    i = pos
+    while i < n and text[i] in ' \t':
+        i += 1
+    end = pos
+    while i < n and text[i] in '{[':
+        group_end = skip_group(text, i, n) if text[i] == '{' else skip_optional(text, i, n)
+        if group_end is None:
+            break
+        end = i = group_end
+    return end
 
-def merge_configs(main_file, snippet_file):
-    if not os.path.exists(snippet_file):
-        print(f"No snippet ({snippet_file}) found. Skipping merge.")
+def index_commands(text):
+    """Tokenizes text once. Returns {command name: [Occurrence, ...]} in file order.
+
+    Only commands that start a line (after optional indentation and '%') are indexed; a line
+    inside the multi-line argument of an earlier command is not. The arguments of a commented
+    command never extend past its line.
+    """
+    index = {}
+    pos = 0
+    for m in LINE_COMMAND_RE.finditer(text):
+        if m.start() < pos:
+            continue
+        name = m.group(2)
+        commented = m.group(1) == '%'
+        # the arguments of a commented-out command end with its line, whatever its braces say
+        limit = text.find('\n', m.end()) if commented else -1
+        args_end = scan_args(text, m.end(), limit if limit >= 0 else None)
+        line_end = text.find('\n', args_end)
+        end = len(text) if line_end < 0 else line_end
+        index.setdefault(name, []).append(
+            Occurrence(name, m.start(), end, text[m.end():args_end].lstrip(' \t'), commented))
+        pos = end
+    return index
+
+def parse_snippet(text):
+    """Returns [(command name, raw brace groups)] for the commands of a snippet, in order."""
+    commands = []
+    pos = 0
+    while True:
+        m = SNIPPET_COMMAND_RE.search(text, pos)
+        if not m:
+            return commands
+        args_end = scan_args(text, m.end())
+        if args_end > m.end():
+            commands.append((m.group(1), text[m.end():args_end].lstrip(' \t')))
+        pos = max(args_end, m.end())
+
+def choose_target(occurrences):
+    """Replace exactly ONE line: the first active one, or else the first commented one."""
+    for occurrence in occurrences:
+        if not occurrence.commented:
+            return occurrence
+    return occurrences[0]
+
+def merge_text(main_content, snippet_contents):
+    """Applies the commands of the snippets (in order) to main_content in a single rebuild.
+
+    Returns (merged text, [(command name, 'replaced' or 'prepended')]).
+    """
+    values = {}
+    for snippet_content in snippet_contents:
+        for cmd, args in parse_snippet(snippet_content):
+            values.pop(cmd, None)  # a later snippet moves the command to the end
+            values[cmd] = args
+
+    index = index_commands(main_content)
+    replacements = []
+    new_lines = []
+    actions = []
+    for cmd, args in values.items():
+        replacement = f'\\{cmd}{args}'
+        if cmd in index:
+            target = choose_target(index[cmd])
+            replacements.append((target.start, target.end, replacement))
+            actions.append((cmd, 'replaced'))
+        else:
+            # If the command is completely missing, put it at the top of the file
+            new_lines.append(replacement + "\n")
+            actions.append((cmd, 'prepended'))
+
+    pieces = new_lines
+    pos = 0
+    for start, end, replacement in sorted(replacements):
+        pieces.append(main_content[pos:start])
+        pieces.append(replacement)
+        pos = end
+    pieces.append(main_content[pos:])
+    return "".join(pieces), actions
+
+def merge_configs(main_file, snippet_files):
+    """Merges one snippet file, or a list of queued ones, into main_file and removes them."""
+    if isinstance(snippet_files, str):
+        snippet_files = [snippet_files]
+    snippet_files = [path for path in snippet_files if os.path.exists(path)]
+    if not snippet_files:
+        print(f"No snippet ({SNIPPET_PATTERN}) found. Skipping merge.")
         return
 
     with open(main_file, 'r', encoding='utf-8') as f:
         main_content = f.read()
 
-    with open(snippet_file, 'r', encoding='utf-8') as f:
-        snippet_content = f.read()
-
-    # 1. Extract commands from snippet
-    # re.DOTALL handles multiline titles
-    # Captures \command{value}
-    commands = re.findall(r'\\(\w+)\s*\{(.*?)\}(?=\s*\\|\s*$)', snippet_content, re.DOTALL)
-
-    for cmd, value in commands:
-        # 2. Regex to find the existing line in custom_configuration.tex
-        # (?m)        -> Multiline mode (^ matches start of line)
-        # ^\s*%?\s* -> Optional leading comment char and whitespace
-        # \\{cmd}     -> The specific LaTeX command
-        # (?:\{.*?\})?-> Optional existing braces/content
-        # [^\n]* -> Match the rest of the line (including comments)
-        pattern = rf'(?m)^\s*%?\s*\\{cmd}(?:\{{.*?\}}|[^\n])*'
-        
-        replacement = rf'\{cmd}{{{value}}}'
-
-        # Find all occurrences (e.g., active and commented versions of \degreeName)
-        matches = list(re.finditer(pattern, main_content))
-        
-        if matches:
-            # Logic: Replace exactly ONE line.
-            # Priority: The first active line. If none active, the first commented one.
-            target_match = None
-            for m in matches:
-                if not m.group(0).strip().startswith('%'):
-                    target_match = m
-                    break
-            
-            if not target_match:
-                target_match = matches[0]
-
-            start, end = target_match.span()
-            main_content = main_content[:start] + replacement + main_content[end:]
+    snippet_contents = []
+    for snippet_file in snippet_files:
+        with open(snippet_file, 'r', encoding='utf-8') as f:
+            snippet_contents.append(f.read())
+
+    main_content, actions = merge_text(main_content, snippet_contents)
+    for cmd, action in actions:
+        if action == 'replaced':
             print(f"Surgically replaced: \\{cmd}")
         else:
-            # If the command is completely missing, append it to a clean section at the top
-            # but after the initial file comments.
-            main_content = replacement + "\n" + main_content
-            print(f"Preprended (new field): \\{cmd}")
+            print(f"Prepended (new field): \\{cmd}")
 
-    # 3. Save the merged result
+    # Save the merged result
     with open(main_file, 'w', encoding='utf-8') as f:
         f.write(main_content)
-    
-    # 4. Cleanup
-    try:
-        os.remove(snippet_file)
-        print(f"Cleaned up {snippet_file}")
-    except:
-        pass
-    
+
+    # Cleanup
+    for snippet_file in snippet_files:
+        try:
+            os.remove(snippet_file)
+            print(f"Cleaned up {snippet_file}")
+        except OSError:
+            pass
+
     print(f"\nMerge complete. {main_file} is now clean and updated.")
 
 if __name__ == "__main__":
-    merge_configs('custom_configuration.tex', 'config_snippet.tex')
+    merge_configs(MAIN_FILE, sys.argv[1:] or sorted(glob.glob(SNIPPET_PATTERN)))
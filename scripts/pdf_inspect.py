@@ -0,0 +1,244 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+# -*- mode: python; python-indent-offset: 4 -*-
+#
+# Checks the PDFs of the included publications before LaTeX is run.
+#
+# Every PDF in Included_publications/ (and any other file_path of an included publication) is
+# opened in a process pool to record its page count, page box sizes and content hash. Results
+# are cached in .cache/pdf_inspect.json by size and mtime, so an unchanged file is never
+# reopened. For each included publication it then
+#   - sets pdf_downloaded from whether file_path is a readable PDF,
+#   - checks the pdf_pages range (pdfpages syntax) against the real page count,
+#   - suggests a scale that keeps the included page inside the thesis paper with a margin.
+# A missing file is only a warning (the dividers show a placeholder). Unreadable PDFs and bad
+# page ranges are errors and make the exit status 1, so they are caught in milliseconds
+# instead of minutes into a LuaLaTeX run.
+#
+# python3 scripts/pdf_inspect.py [--paper a4|g5] [--set-scale]
+# requires: pip install pypdf
+
+import os
+import sys
+import json
+import math
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from pub_store import MAP_FILE, PublicationStore
+
+try:
+    import pypdf
+except ImportError:
+    pypdf = None
+
+PDF_DIR = 'Included_publications'
+CACHE_FILE = os.path.join('.cache', 'pdf_inspect.json')
+MM = 72 / 25.4  # PostScript points per millimetre
+# Paper sizes of kththesis.cls in points: a4paper (default) and the g5paper option
+PAPER_SIZES = {'a4': (210 * MM, 297 * MM), 'g5': (169 * MM, 239 * MM)}
+MIN_MARGIN = 5 * MM  # blank border kept around an included page
+SCALE_STEP = 0.05
+
+def file_sha256(path):
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+def inspect_pdf(path):
+    """Returns {'pages', 'boxes', 'sha256'} for a PDF, or {'error'} if it cannot be read.
+
+    boxes lists the distinct [width, height, number of pages] of the crop boxes (in points,
+    rotation applied), which is what \\includepdf places on the page.
+    """
+    result = {'sha256': file_sha256(path)}
+    try:
+        reader = pypdf.PdfReader(path)
+        sizes = {}
+        for page in reader.pages:
+            box = page.cropbox
+            width, height = round(float(box.width), 1), round(float(box.height), 1)
+            if (page.rotation or 0) % 180:
+                width, height = height, width
+            sizes[(width, height)] = sizes.get((width, height), 0) + 1
+        result['pages'] = len(reader.pages)
+        result['boxes'] = [[w, h, n] for (w, h), n in sizes.items()]
+    except Exception as e:
+        result['error'] = str(e)
+    return result
+
+def _stat_key(path):
+    st = os.stat(path)
+    return st.st_size, st.st_mtime_ns
+
+def load_cache():
+    try:
+        with open(CACHE_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_cache(cache):
+    os.makedirs(os.path.dirname(CACHE_FILE), exist_ok=True)
+    with open(CACHE_FILE + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(cache, f, indent=1)
+    os.replace(CACHE_FILE + '.tmp', CACHE_FILE)
+
+def inspect_pdfs(paths, workers=None):
+    """Returns {path: inspection} for the existing files among paths, reusing cached results."""
+    cache = load_cache()
+    results, stale = {}, []
+    for path in sorted(set(paths)):
+        if not os.path.isfile(path):
+            continue
+        size, mtime_ns = _stat_key(path)
+        cached = cache.get(path)
+        if cached and cached.get('size') == size and cached.get('mtime_ns') == mtime_ns:
+            results[path] = cached
+        else:
+            stale.append((path, size, mtime_ns))
+
+    if stale:
+        if len(stale) == 1:
+            inspected = [inspect_pdf(stale[0][0])]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                inspected = list(pool.map(inspect_pdf, [path for path, _, _ in stale]))
+        for (path, size, mtime_ns), result in zip(stale, inspected):
+            result.update(size=size, mtime_ns=mtime_ns)
+            results[path] = result
+    # entries of PDFs this call did not ask about (e.g. pdf_subset.py looks at fewer files)
+    # stay; only those whose file is gone are dropped
+    gone = [path for path in cache if path not in results and not os.path.isfile(path)]
+    if stale or gone:
+        for path in gone:
+            del cache[path]
+        cache.update(results)
+        save_cache(cache)
+    return results
+
+def parse_page_spec(spec, page_count):
+    """Expands a pdfpages 'pages' option into a list of page numbers (None for a blank page).
+
+    Accepts e.g. '1-', '1-2', '3,5,{},last', '-' and descending ranges such as 'last-1'; an
+    empty spec means page 1, as in pdfpages. Raises ValueError for pages outside 1..page_count.
+    """
+    def number(text, default):
+        text = text.strip()
+        if not text:
+            return default
+        if text == 'last':
+            return page_count
+        if not text.isdigit():
+            raise ValueError(f"'{text}' is not a page number")
+        page = int(text)
+        if not 1 <= page <= page_count:
+            raise ValueError(f"page {page} is outside 1-{page_count}")
+        return page
+
+    spec = (spec or '').strip()
+    if spec.startswith('{') and spec.endswith('}') and spec != '{}':
+        spec = spec[1:-1]
+    if not spec:
+        return [1]
+    pages = []
+    for item in spec.split(','):
+        item = item.strip()
+        if item == '{}':
+            pages.append(None)
+        elif '-' in item:
+            first, last = item.split('-', 1)
+            first, last = number(first, 1), number(last, page_count)
+            step = 1 if first <= last else -1
+            pages.extend(range(first, last + step, step))
+        else:
+            pages.append(number(item, 1))
+    return pages
+
+def suggest_scale(boxes, paper='a4'):
+    """The largest multiple of SCALE_STEP (at most 1.0) that keeps MIN_MARGIN around every page.
+
+    \\includepdf first fits a page to the paper keeping its aspect ratio; scale then shrinks it.
+    """
+    paper_width, paper_height = PAPER_SIZES[paper]
+    scale = 1.0
+    for width, height, _ in boxes:
+        fit = min(paper_width / width, paper_height / height)
+        fitted_width, fitted_height = width * fit, height * fit
+        scale = min(scale, (paper_width - 2 * MIN_MARGIN) / fitted_width,
+                    (paper_height - 2 * MIN_MARGIN) / fitted_height)
+    return round(math.floor(scale / SCALE_STEP + 1e-9) * SCALE_STEP, 2)
+
+def check_publications(pub_map, inspections, paper='a4'):
+    """Checks the included publications against the inspected PDFs.
+
+    Returns (updates, problems, suggestions): the {diva_id: {field: value}} to apply (pdf_downloaded),
+    a list of problem messages, and {diva_id: suggested scale}.
+    """
+    updates, problems, suggestions = {}, [], {}
+    for diva_id, data in pub_map.items():
+        if data.get('status') != 'included':
+            continue
+        label = data.get('label') or diva_id
+        pdf_file = data.get('file_path', '')
+        inspection = inspections.get(pdf_file)
+        downloaded = bool(inspection) and 'error' not in inspection
+        if data.get('pdf_downloaded', False) != downloaded:
+            updates[diva_id] = {'pdf_downloaded': downloaded}
+        if not inspection:
+            # not fatal: the divider generator puts a MISSING PDF placeholder in its place
+            print(f"Warning: {label}: {pdf_file} does not exist")
+            continue
+        if 'error' in inspection:
+            problems.append(f"{label}: {pdf_file} is not a readable PDF ({inspection['error']})")
+            continue
+        try:
+            parse_page_spec(data.get('pdf_pages', '1-'), inspection['pages'])
+        except ValueError as e:
+            problems.append(f"{label}: pdf_pages '{data.get('pdf_pages')}' of {pdf_file} ({inspection['pages']} pages): {e}")
+        suggestions[diva_id] = suggest_scale(inspection['boxes'], paper)
+    return updates, problems, suggestions
+
+def inspect_publications(map_file=MAP_FILE, paper='a4', set_scale=False, workers=None):
+    """Inspects the PDFs, records pdf_downloaded (and optionally scale) in the map.
+
+    Returns the list of problems; an empty list means the map is safe to typeset.
+    """
+    if pypdf is None:
+        print("pypdf is not installed (pip install pypdf); skipping the PDF inspection.")
+        return []
+    store = PublicationStore(map_file)
+    pub_map, _ = store.load()
+    paths = [os.path.join(PDF_DIR, name) for name in os.listdir(PDF_DIR)
+             if name.lower().endswith('.pdf')] if os.path.isdir(PDF_DIR) else []
+    paths += [data.get('file_path', '') for data in pub_map.values() if data.get('status') == 'included']
+    inspections = inspect_pdfs(paths, workers)
+
+    updates, problems, suggestions = check_publications(pub_map, inspections, paper)
+    for diva_id, scale in suggestions.items():
+        data = pub_map[diva_id]
+        if data.get('scale') != scale:
+            if set_scale:
+                updates.setdefault(diva_id, {})['scale'] = scale
+            else:
+                print(f"{data.get('label')}: suggested scale {scale} (currently {data.get('scale')})")
+    for diva_id, fields in updates.items():
+        print(f"{pub_map[diva_id].get('label')}: " + ", ".join(f"{k} -> {v}" for k, v in fields.items()))
+    store.patch(updates)
+
+    for problem in problems:
+        print(f"Error: {problem}")
+    print(f"Inspected {len(inspections)} PDFs, {len(problems)} problems.")
+    return problems
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Check the PDFs of the included publications")
+    arg_parser.add_argument('--map', default=MAP_FILE, help="publication map (default: %(default)s)")
+    arg_parser.add_argument('--paper', choices=sorted(PAPER_SIZES), default='a4',
+                            help="paper size of the thesis, for the suggested scale (default: %(default)s)")
+    arg_parser.add_argument('--set-scale', action='store_true', help="store the suggested scale in the map")
+    arg_parser.add_argument('--workers', type=int, help="size of the process pool")
+    args = arg_parser.parse_args()
+    sys.exit(1 if inspect_publications(args.map, args.paper, args.set_scale, args.workers) else 0)
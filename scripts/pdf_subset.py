@@ -0,0 +1,105 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+# -*- mode: python; python-indent-offset: 4 -*-
+#
+# Page-subset cache for the PDFs of the included publications.
+#
+# \includepdf[pages={1-2}]{US12111768.pdf} still makes LuaTeX open and parse the whole 20-page
+# patent on every compile. subset_pdfs() extracts the pages named by pdf_pages into a small PDF
+# under .cache/pdf_pages/, named by the SHA-256 of the source contents plus the page spec, so an
+# unchanged source is never extracted twice and an edited one gets a new file. The divider
+# generator then includes the subset, falling back to the original when the cache is absent
+# (e.g. on a machine that only has the committed lib/*.tex files).
+#
+# python3 scripts/pdf_subset.py           extract the subsets of the included publications
+# python3 scripts/pdf_subset.py --prune   also remove subsets that are no longer used
+# requires: pip install pypdf
+
+import os
+import hashlib
+import argparse
+from pub_store import MAP_FILE, load_map
+from pub_record import publication_records
+from pdf_inspect import inspect_pdfs, parse_page_spec
+
+try:
+    import pypdf
+except ImportError:
+    pypdf = None
+
+SUBSET_DIR = os.path.join('.cache', 'pdf_pages')
+
+def subset_path(source_sha256, spec):
+    """Content-addressed file name of the pages spec of a source PDF."""
+    key = hashlib.sha256(f"{source_sha256}\0{spec}".encode('utf-8')).hexdigest()[:24]
+    # forward slashes, as the path is written into LaTeX
+    return f"{SUBSET_DIR.replace(os.sep, '/')}/{key}.pdf"
+
+def extract_pages(source, pages, target):
+    """Writes the given pages of source (1-based, None for a blank page) to target atomically."""
+    reader = pypdf.PdfReader(source)
+    writer = pypdf.PdfWriter()
+    for page in pages:
+        if page is None:
+            previous = writer.pages[-1] if writer.pages else reader.pages[0]
+            writer.add_blank_page(float(previous.mediabox.width), float(previous.mediabox.height))
+        else:
+            writer.add_page(reader.pages[page - 1])
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    with open(target + '.tmp', 'wb') as f:
+        writer.write(f)
+    os.replace(target + '.tmp', target)
+
+def subset_pdfs(pubs):
+    """Returns {diva_id: subset file} for the included publications whose pdf_pages is a proper subset.
+
+    pubs maps diva IDs to Publication records (see pub_record.py). Missing subsets are extracted;
+    publications whose PDF is missing or unreadable, whose range is invalid (see pdf_inspect.py)
+    or that use every page are left out.
+    """
+    if pypdf is None:
+        print("pypdf is not installed (pip install pypdf); including the full PDFs.")
+        return {}
+    included = {diva_id: data for diva_id, data in pubs.items()
+                if data.status == 'included' and data.pdf_downloaded}
+    inspections = inspect_pdfs([data.file_path for data in included.values()])
+    subsets = {}
+    for diva_id, data in included.items():
+        inspection = inspections.get(data.file_path)
+        if not inspection or 'error' in inspection:
+            continue
+        spec = data.pdf_pages
+        try:
+            pages = parse_page_spec(spec, inspection['pages'])
+        except ValueError:
+            continue
+        if pages == list(range(1, inspection['pages'] + 1)):
+            continue
+        target = subset_path(inspection['sha256'], spec)
+        if not os.path.exists(target):
+            extract_pages(data.file_path, pages, target)
+            print(f"Extracted pages {spec} of {data.file_path} to {target}")
+        subsets[diva_id] = target
+    return subsets
+
+def prune_subsets(keep):
+    """Removes the cached subsets not in keep. Returns the number removed."""
+    if not os.path.isdir(SUBSET_DIR):
+        return 0
+    keep = {os.path.basename(path) for path in keep}
+    removed = 0
+    for name in os.listdir(SUBSET_DIR):
+        if name.endswith('.pdf') and name not in keep:
+            os.remove(os.path.join(SUBSET_DIR, name))
+            removed += 1
+    return removed
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Extract the included pages of the publication PDFs")
+    arg_parser.add_argument('--map', default=MAP_FILE, help="publication map (default: %(default)s)")
+    arg_parser.add_argument('--prune', action='store_true', help="remove subsets that are no longer used")
+    args = arg_parser.parse_args()
+    subsets = subset_pdfs(publication_records(load_map(args.map), lazy=True))
+    print(f"{len(subsets)} page subsets in {SUBSET_DIR}")
+    if args.prune:
+        print(f"Removed {prune_subsets(subsets.values())} unused subsets")
@@ -0,0 +1,183 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+# -*- mode: python; python-indent-offset: 4 -*-
+#
+# Optional SQLite index of publications_map.json.
+#
+# publications_map.json (plus its journal, see pub_store.py) stays the canonical, committed
+# copy. Once publications_map.sqlite exists, the generators and the CReDiT wizard query it
+# instead of loading and scanning the whole map: each record is stored as its JSON text next to
+# indexed columns for status, label, tab_index, bib_key, year and pubtype, so fetching the
+# handful of 'included' papers of a large DiVA history is an index lookup.
+#
+# The index follows the map by itself. Journal entries newer than the indexed version are
+# replayed into it (O(changed records)); a rewritten map file (compaction, git pull) triggers a
+# full re-import. Records keep their map order and key order, so export is lossless.
+#
+# python3 scripts/pub_db.py --import            create or refresh publications_map.sqlite
+# python3 scripts/pub_db.py --export out.json   write the indexed records in the JSON format
+# python3 scripts/pub_db.py --status included   list matching records
+
+import os
+import json
+import sqlite3
+import argparse
+from build_utils import write_if_changed
+from pub_store import MAP_FILE, PublicationStore, dump_map, load_map
+from pub_record import loads, publication_records
+
+INDEXED_FIELDS = ['status', 'label', 'tab_index', 'bib_key', 'year', 'pubtype']
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS publications (
+    diva_id TEXT PRIMARY KEY,
+    pos INTEGER NOT NULL,
+    status TEXT, label TEXT, tab_index INTEGER, bib_key TEXT, year TEXT, pubtype TEXT,
+    record TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+""" + "".join(f"CREATE INDEX IF NOT EXISTS idx_{field} ON publications({field});\n" for field in INDEXED_FIELDS)
+
+def db_path(map_file=MAP_FILE):
+    """publications_map.json -> publications_map.sqlite"""
+    return os.path.splitext(str(map_file))[0] + '.sqlite'
+
+def _map_stat(map_file):
+    try:
+        st = os.stat(map_file)
+        return f"{st.st_size}:{st.st_mtime_ns}"
+    except FileNotFoundError:
+        return None
+
+def _row(diva_id, pos, record):
+    return (diva_id, pos, *(record.get(field) for field in INDEXED_FIELDS),
+            json.dumps(record, ensure_ascii=False))
+
+class PublicationDB:
+    """SQLite index of one publication map; use as a context manager."""
+
+    def __init__(self, map_file=MAP_FILE, db_file=None):
+        self.store = PublicationStore(map_file)
+        self.db_file = db_file or db_path(map_file)
+        self.conn = sqlite3.connect(self.db_file)
+        self.conn.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    def _meta(self, key):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key, value):
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def import_map(self, pub_map, version=0):
+        """Replaces the indexed records with pub_map."""
+        with self.conn:
+            self.conn.execute("DELETE FROM publications")
+            self.conn.executemany("INSERT INTO publications VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                  [_row(diva_id, pos, record) for pos, (diva_id, record) in enumerate(pub_map.items())])
+            self._set_meta('map_stat', _map_stat(self.store.map_file))
+            self._set_meta('version', version)
+
+    def apply(self, updates):
+        """Applies {diva_id: {field: value}} like PublicationStore.load() replays the journal."""
+        next_pos = self.conn.execute("SELECT COALESCE(MAX(pos) + 1, 0) FROM publications").fetchone()[0]
+        for diva_id, fields in updates:
+            row = self.conn.execute("SELECT pos, record FROM publications WHERE diva_id = ?", (diva_id,)).fetchone()
+            if row:
+                pos, record = row[0], loads(row[1])
+            else:
+                pos, record = next_pos, {}
+                next_pos += 1
+            record.update(fields)
+            self.conn.execute("INSERT OR REPLACE INTO publications VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                              _row(diva_id, pos, record))
+
+    def sync(self):
+        """Brings the index up to date with the map and its journal. Returns the version."""
+        stat = _map_stat(self.store.map_file)
+        version = int(self._meta('version') or -1)
+        base, entries = self.store.read_journal()
+        current = base + len(entries)
+        if stat != self._meta('map_stat') or current < version:
+            pub_map, current = self.store.load()
+            self.import_map(pub_map, current)
+        elif current > version:
+            with self.conn:
+                self.apply((entry['id'], entry['set']) for entry in entries if entry['v'] > version)
+                self._set_meta('version', current)
+        return current
+
+    def query(self, order_by='pos', **where):
+        """Returns {diva_id: record} of the records whose indexed fields equal where, in order_by order.
+
+        e.g. query(status='included', order_by='tab_index')
+        """
+        for field in list(where) + [order_by]:
+            if field not in INDEXED_FIELDS + ['pos']:
+                raise ValueError(f"not an indexed field: {field}")
+        sql = "SELECT diva_id, record FROM publications"
+        if where:
+            sql += " WHERE " + " AND ".join(f"{field} IS ?" for field in where)
+        sql += f" ORDER BY {order_by}, pos"
+        return {diva_id: loads(record) for diva_id, record in self.conn.execute(sql, list(where.values()))}
+
+    def export_map(self, path):
+        """Writes all indexed records to path in the publications_map.json format."""
+        write_if_changed(str(path), dump_map(self.query()))
+
+def load_publications(map_file=MAP_FILE, **where):
+    """Returns {diva_id: record} of the map, optionally filtered on indexed fields (status=...).
+
+    Uses the SQLite index when it has been created (pub_db.py --import), otherwise loads and
+    filters the JSON map. Both return the records in map order.
+    """
+    if os.path.exists(db_path(map_file)):
+        with PublicationDB(map_file) as db:
+            db.sync()
+            return db.query(**where)
+    pub_map = load_map(map_file)
+    if not where:
+        return pub_map
+    return {k: v for k, v in pub_map.items() if all(v.get(f) == value for f, value in where.items())}
+
+def load_records(map_file=MAP_FILE, lazy=False, **where):
+    """load_publications() as {diva_id: Publication} (see pub_record.py).
+
+    With lazy, only the included records are converted when loading.
+    """
+    return publication_records(load_publications(map_file, **where), lazy)
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="SQLite index of " + MAP_FILE)
+    arg_parser.add_argument('--map', default=MAP_FILE, help="publication map (default: %(default)s)")
+    arg_parser.add_argument('--import', dest='do_import', action='store_true',
+                            help="create the index, or re-import the whole map into it")
+    arg_parser.add_argument('--export', metavar='FILE', help="write the indexed records as JSON to FILE")
+    for field in INDEXED_FIELDS:
+        arg_parser.add_argument(f'--{field.replace("_", "-")}', dest=field,
+                                type=int if field == 'tab_index' else str, help=f"list records with this {field}")
+    args = arg_parser.parse_args()
+
+    with PublicationDB(args.map) as db:
+        if args.do_import:
+            pub_map, version = db.store.load()
+            db.import_map(pub_map, version)
+            print(f"Imported {len(pub_map)} records into {db.db_file}")
+        else:
+            db.sync()
+        if args.export:
+            db.export_map(args.export)
+            print(f"Exported {db.db_file} to {args.export}")
+        where = {field: getattr(args, field) for field in INDEXED_FIELDS if getattr(args, field) is not None}
+        if where:
+            for diva_id, record in db.query(**where).items():
+                print(f"{diva_id}\t{record.get('label')}\t{record.get('title')}")
@@ -0,0 +1,185 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+# -*- mode: python; python-indent-offset: 4 -*-
+#
+# The record model of publications_map.json, shared by the generators and the CReDiT wizard.
+#
+# FIELDS lists every field of a map record with its one default value, in the canonical field
+# order of the JSON file. Publication holds a record in __slots__ (no per-record dict): a field
+# the map does not set reads as its default and is not written back by to_dict(), so loading
+# and saving a record does not change it. Fields outside FIELDS are kept in extra.
+#
+# loads() and dumps_map() use orjson when it is installed (pip install orjson) and the json
+# module otherwise; both give the same result. publication_records(lazy=True) converts only
+# the included records up front, the others (most of a large DiVA history are 'unprocessed')
+# when they are first accessed.
+
+import re
+import copy
+import json
+from collections.abc import Mapping
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# field: default, in the order the fields are written to publications_map.json
+FIELDS = {
+    'title': 'Untitled',
+    'full title': None,
+    'year': 'Unknown',
+    'pubtype': 'unknown',
+    'authors': [],
+    'identifiers': {},
+    'status': 'unprocessed',
+    'label': None,
+    'bib_key': None,
+    'in_bib': False,
+    'bib_match': None,
+    'better_bib_key': None,
+    'pdf_downloaded': False,
+    'tab_index': None,          # None until the student orders the included papers
+    'file_path': 'Included_publications/',
+    'pdf_pages': '1-',
+    'scale': 1.0,
+    'permission_text': '',
+    'credit_contributions': {},
+    'equal_contributors': [],
+    'contribution_note': '',
+}
+# the fields DiVA_discovery.py gives a new record
+NEW_RECORD_FIELDS = ['title', 'year', 'pubtype', 'authors', 'identifiers', 'status', 'label', 'bib_key',
+                     'in_bib', 'bib_match', 'pdf_downloaded', 'tab_index', 'file_path', 'pdf_pages', 'scale',
+                     'permission_text']
+# the fields of the divider page, added to records from before they existed
+DIVIDER_FIELDS = ['tab_index', 'file_path', 'pdf_pages', 'scale', 'permission_text']
+# where papers without a tab_index go when sorting by tab order
+LAST_TAB_INDEX = 999
+# Python attribute of each field ('full title' -> full_title) and back
+ATTRIBUTES = {field: field.replace(' ', '_') for field in FIELDS}
+FIELD_NAMES = {attr: field for field, attr in ATTRIBUTES.items()}
+# the one place orjson ('1e-5') and the json module ('1e-05') write numbers differently
+EXPONENT_RE = re.compile(r'[0-9][eE][-+]?[0-9]')
+
+class Publication:
+    """One record of publications_map.json with typed fields and the shared defaults."""
+
+    __slots__ = tuple(ATTRIBUTES.values()) + ('extra',)
+
+    def __init__(self, record=None):
+        self.extra = None
+        if record:
+            self.update(record)
+
+    def __getattr__(self, name):
+        # only called for unset slots and unknown names
+        field = FIELD_NAMES.get(name)
+        if field is not None:
+            return copy.copy(FIELDS[field])
+        extra = object.__getattribute__(self, 'extra')
+        if extra and name in extra:
+            return extra[name]
+        raise AttributeError(name)
+
+    def __getstate__(self):
+        # pickle and copy would otherwise read every slot and store the defaults as set
+        return self.to_dict()
+
+    def __setstate__(self, record):
+        self.extra = None
+        self.update(record)
+
+    def __repr__(self):
+        return f"Publication({self.to_dict()!r})"
+
+    def update(self, record):
+        """Sets the fields of record ({map field: value}), like dict.update()."""
+        for field, value in record.items():
+            attr = ATTRIBUTES.get(field)
+            if attr is not None:
+                setattr(self, attr, value)
+            else:
+                if self.extra is None:
+                    self.extra = {}
+                self.extra[field] = value
+
+    def is_set(self, field):
+        """True if the map record sets field (rather than leaving it at its default)."""
+        attr = ATTRIBUTES.get(field)
+        if attr is None:
+            return bool(self.extra) and field in self.extra
+        try:
+            object.__getattribute__(self, attr)
+            return True
+        except AttributeError:
+            return False
+
+    def to_dict(self):
+        """The record as the map stores it: the fields that are set, in FIELDS order, then extra."""
+        record = {field: getattr(self, attr) for field, attr in ATTRIBUTES.items() if self.is_set(field)}
+        if self.extra:
+            record.update(self.extra)
+        return record
+
+    @property
+    def tab_order(self):
+        """Sort key of the included papers: tab_index, papers without one last."""
+        return self.tab_index if self.tab_index is not None else LAST_TAB_INDEX
+
+def new_record(**fields):
+    """A new map record: the NEW_RECORD_FIELDS at their defaults, then fields."""
+    record = {field: copy.copy(FIELDS[field]) for field in NEW_RECORD_FIELDS}
+    record.update(fields)
+    return record
+
+def fill_defaults(record, fields):
+    """Adds the defaults of fields missing from the map record (a dict), keeping set values."""
+    for field in fields:
+        record.setdefault(field, copy.copy(FIELDS[field]))
+
+class LazyPublications(Mapping):
+    """{diva_id: Publication} over a parsed map, converting a record when it is first read.
+
+    The included records are converted up front, as every generator reads them.
+    """
+
+    def __init__(self, pub_map):
+        self.raw = pub_map
+        self.records = {diva_id: Publication(record) for diva_id, record in pub_map.items()
+                        if record.get('status') == 'included'}
+
+    def __getitem__(self, diva_id):
+        record = self.records.get(diva_id)
+        if record is None:
+            record = self.records[diva_id] = Publication(self.raw[diva_id])
+        return record
+
+    def __iter__(self):
+        return iter(self.raw)
+
+    def __len__(self):
+        return len(self.raw)
+
+def publication_records(pub_map, lazy=False):
+    """{diva_id: record dict} -> {diva_id: Publication}, in map order."""
+    if lazy:
+        return LazyPublications(pub_map)
+    return {diva_id: Publication(record) for diva_id, record in pub_map.items()}
+
+def loads(data):
+    """Parses JSON text (str or bytes)."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def dumps_map(obj):
+    """The indent-2 JSON text json.dumps(obj, indent=2, ensure_ascii=False) gives."""
+    if orjson is not None:
+        try:
+            text = orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode('utf-8')
+        except TypeError:  # e.g. integers beyond 64 bits
+            text = None
+        if text is not None and not EXPONENT_RE.search(text):
+            return text
+    return json.dumps(obj, indent=2, ensure_ascii=False)
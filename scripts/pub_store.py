@@ -0,0 +1,224 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+# -*- mode: python; python-indent-offset: 4 -*-
+#
+# Journaled storage for publications_map.json.
+#
+# Writers never rewrite the whole map for a small edit. patch() appends one JSON line per
+# changed record to publications_map.json.journal (fsync'ed), and compact() folds the journal
+# into the canonical JSON (see dump_map()) with a temp file and an atomic rename. Every
+# mutation happens under an exclusive lock on publications_map.json.lock and bumps a version
+# counter, so a CReDiT wizard save that overlaps a discovery run is serialized instead of
+# silently lost.
+#
+# Readers must use load() (or load_map()), which replays pending journal entries on top of
+# the JSON file. Patches only set fields, so replaying an entry twice is harmless: a crash
+# between writing the map and truncating the journal cannot corrupt anything.
+#
+# python3 scripts/pub_store.py --compact   folds a pending journal into the JSON file
+
+import os
+import json
+import argparse
+from contextlib import contextmanager
+from pub_record import FIELDS, loads, dumps_map
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+MAP_FILE = 'publications_map.json'
+COMPACT_THRESHOLD = 64  # journal entries that trigger an automatic compaction
+
+# Field order of the records in the canonical publications_map.json; other fields follow, sorted
+FIELD_ORDER = list(FIELDS)
+_FIELD_RANK = {field: i for i, field in enumerate(FIELD_ORDER)}
+
+def canonical_record(record):
+    """The record with its fields in the canonical order."""
+    return {k: record[k] for k in sorted(record, key=lambda k: (_FIELD_RANK.get(k, len(FIELD_ORDER)), k))}
+
+def dump_map(pub_map):
+    """The canonical serialization of publications_map.json, shared by every writer.
+
+    Records keep their map order (new ones are appended), their fields follow FIELD_ORDER,
+    and the indentation is 2, so the same map always gives the same bytes.
+    """
+    return dumps_map({diva_id: canonical_record(record) for diva_id, record in pub_map.items()})
+
+def _fsync_write(path, text):
+    """Writes text to path atomically: temp file, fsync, rename."""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+class PublicationStore:
+    """publications_map.json plus its journal and lock file."""
+
+    def __init__(self, map_file=MAP_FILE):
+        self.map_file = str(map_file)
+        self.journal_file = self.map_file + '.journal'
+        self.lock_file = self.map_file + '.lock'
+
+    @contextmanager
+    def locked(self):
+        """Exclusive inter-process lock around a read-modify-write of the map."""
+        with open(self.lock_file, 'a+') as f:
+            if fcntl:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+                else:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def read_journal(self):
+        """Returns (base version, list of entries).
+
+        A line that does not parse (a torn append from a crash) is skipped with a warning; the
+        entries after it are still read.
+        """
+        base, entries = 0, []
+        if not os.path.exists(self.journal_file):
+            return base, entries
+        with open(self.journal_file, 'r', encoding='utf-8', errors='replace') as f:
+            for number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    item = loads(line)
+                except ValueError:
+                    print(f"Warning: skipping unreadable line {number} of {self.journal_file}")
+                    continue
+                if 'base' in item:
+                    base = item['base']
+                else:
+                    entries.append(item)
+        return base, entries
+
+    def _repair_journal_locked(self):
+        """Makes the journal end with a complete line before appending to it.
+
+        An append interrupted by a crash leaves a last line without its newline. If that line
+        is complete JSON only the newline is missing; otherwise it is cut off, so the next
+        entries do not get glued onto it.
+        """
+        try:
+            with open(self.journal_file, 'rb+') as f:
+                data = f.read()
+                if not data or data.endswith(b"\n"):
+                    return
+                last_newline = data.rfind(b"\n") + 1
+                try:
+                    loads(data[last_newline:])
+                    f.write(b"\n")
+                except ValueError:
+                    print(f"Warning: dropping the torn last line of {self.journal_file}")
+                    f.truncate(last_newline)
+                f.flush()
+                os.fsync(f.fileno())
+        except FileNotFoundError:
+            pass
+
+    def _load(self):
+        pub_map = {}
+        if os.path.exists(self.map_file):
+            with open(self.map_file, 'rb') as f:
+                pub_map = loads(f.read())
+        base, entries = self.read_journal()
+        for entry in entries:
+            pub_map.setdefault(entry['id'], {}).update(entry['set'])
+        return pub_map, base + len(entries), len(entries)
+
+    def load(self):
+        """Returns (pub_map, version) with all journaled updates applied."""
+        pub_map, version, _ = self._load()
+        return pub_map, version
+
+    def version(self):
+        """Current version counter; changes on every patch."""
+        base, entries = self.read_journal()
+        return base + len(entries)
+
+    def patch(self, updates):
+        """Applies {diva_id: {field: value}} by appending one journal line per record.
+
+        Cost is O(changed records), not a rewrite of the whole map. Returns the new version.
+        """
+        with self.locked():
+            if updates:
+                self._repair_journal_locked()
+            _, version, pending = self._load()
+            if not updates:
+                return version
+            lines = []
+            for diva_id, fields in updates.items():
+                version += 1
+                lines.append(json.dumps({'v': version, 'id': diva_id, 'set': fields}, ensure_ascii=False))
+            with open(self.journal_file, 'a', encoding='utf-8') as f:
+                f.write("\n".join(lines) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            if pending + len(lines) >= COMPACT_THRESHOLD:
+                self._compact_locked()
+            return version
+
+    def compact(self):
+        """Folds the journal into the JSON file with an atomic rename. Returns the version."""
+        with self.locked():
+            return self._compact_locked()
+
+    def _compact_locked(self):
+        pub_map, version, pending = self._load()
+        text = dump_map(pub_map)
+        try:
+            with open(self.map_file, 'r', encoding='utf-8') as f:
+                unchanged = f.read() == text
+        except FileNotFoundError:
+            unchanged = not pub_map
+        # the map file is only rewritten when its canonical form differs, e.g. not for a journal
+        # that only set values the map already had
+        if not unchanged:
+            _fsync_write(self.map_file, text)
+        if pending:
+            _fsync_write(self.journal_file, json.dumps({'base': version}) + "\n")
+        return version
+
+def diff_maps(old_map, new_map):
+    """Returns {diva_id: {field: value}} for the fields of new_map that differ from old_map."""
+    updates = {}
+    for diva_id, record in new_map.items():
+        old_record = old_map.get(diva_id)
+        if old_record is None:
+            updates[diva_id] = record
+            continue
+        changed = {k: v for k, v in record.items() if k not in old_record or old_record[k] != v}
+        if changed:
+            updates[diva_id] = changed
+    return updates
+
+def load_map(map_file=MAP_FILE):
+    """Returns the publication map with pending journal entries applied."""
+    return PublicationStore(map_file).load()[0]
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Maintenance of the journaled " + MAP_FILE)
+    arg_parser.add_argument('--compact', action='store_true', help="fold the journal into the JSON file")
+    arg_parser.add_argument('--map', default=MAP_FILE, help="publication map (default: %(default)s)")
+    args = arg_parser.parse_args()
+    store = PublicationStore(args.map)
+    if args.compact:
+        print(f"{args.map} compacted at version {store.compact()}")
+    else:
+        print(f"{args.map} is at version {store.version()}")
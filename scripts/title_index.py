@@ -0,0 +1,250 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+# -*- mode: python; python-indent-offset: 4 -*-
+#
+# Title index used to cross-reference DiVA records with BibTeX entries.
+#
+# The original rule in DiVA_discovery.py accepts the first bib entry (in file order) whose
+# normalized title contains the normalized DiVA title, or whose fuzz.ratio() with it is above
+# FUZZY_THRESHOLD. Scoring every DiVA title against every bib title costs O(records x entries)
+# Levenshtein calls, so this index normalizes the bib titles once and uses trigram blocking to
+# select a small candidate set per DiVA title. The blocking is lossless: a candidate is only
+# dropped when it provably cannot satisfy either half of the rule, so the result is identical.
+#
+# match_all() is the batch backend used by discovery: it scores the DiVA titles against their
+# blocked candidates with rapidfuzz's process.cdist (C++, threads on every core), in groups of
+# titles that share candidates, and picks, per DiVA title, the best-scoring entry above the
+# threshold rather than the first one in file order. Titles without a fuzzy hit fall back to the
+# substring rule.
+
+import re
+from collections import defaultdict
+from bisect import bisect_left, bisect_right
+from rapidfuzz import process
+from rapidfuzz.fuzz import ratio as raw_ratio
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+Q = 3  # q-gram length used for blocking
+# cdist computes the score matrix in blocks of at most this many cells (8 bytes each)
+CDIST_BLOCK_CELLS = 8 * 1024 * 1024
+# a batch may score at most this many times the cells of its titles' own candidate sets
+BATCH_OVERHEAD = 2
+
+def normalize_text(text):
+    """Simple normalization for fuzzy matching."""
+    if not text: return ""
+    return re.sub(r'[^\w\s]', '', text).lower().strip()
+
+def normalize_name(name):
+    """Normalizes a person's name for comparison: 'Maguire Jr., Gerald Q.' (DiVA), 'Maguire, Jr.,
+    Gerald Q.' and 'Gerald Q. {Maguire~Jr.}' (BibTeX) all give 'gerald q maguire jr'."""
+    if not name: return ""
+    parts = [part.strip() for part in name.replace('~', ' ').split(',')]
+    if len(parts) > 1:
+        # Last, First or Last, Jr, First
+        parts = parts[-1:] + parts[:1] + parts[1:-1]
+    return " ".join(normalize_text(" ".join(parts)).split())
+
+def bib_title(entry):
+    """Returns the title of a bibtexparser entry with BibTeX braces removed."""
+    return entry.get('title', '').replace('{', '').replace('}', '')
+
+def qgrams(text):
+    """Returns the list of overlapping q-grams of text (with repeats)."""
+    return [text[i:i + Q] for i in range(len(text) - Q + 1)]
+
+class TitleIndex:
+    """Pre-normalized bib titles with q-gram postings for candidate blocking."""
+
+    def __init__(self, entries, threshold=90, titles=None):
+        # titles may hold already normalized titles (one per entry), e.g. from a cache
+        self.threshold = threshold
+        # fuzz.ratio() rounds, so "> threshold" means the raw score is above threshold + 0.5
+        self.min_fraction = (threshold + 0.5) / 100.0
+        self.keys = [entry['ID'] for entry in entries]
+        if titles is None:
+            titles = [normalize_text(bib_title(entry)) for entry in entries]
+        self.titles = list(titles)
+
+        self.postings = defaultdict(list)
+        self.by_length = defaultdict(list)
+        for idx, title in enumerate(self.titles):
+            for gram in set(qgrams(title)):
+                self.postings[gram].append(idx)
+            self.by_length[len(title)].append(idx)
+        self.lengths = sorted(self.by_length)
+        self._arrays = None  # numpy copies of by_length and postings, built by match_all()
+
+    def __len__(self):
+        return len(self.titles)
+
+    def _max_distance(self, len1, len2):
+        """Upper bound on the indel distance of a pair that can still pass the ratio test."""
+        return int((1.0 - self.min_fraction) * (len1 + len2))
+
+    def _length_window(self, len1):
+        """Bib title lengths that can reach the ratio threshold against a title of length len1."""
+        f = self.min_fraction
+        lo = bisect_left(self.lengths, f * len1 / (2.0 - f))
+        hi = bisect_right(self.lengths, (2.0 - f) * len1 / f)
+        return self.lengths[lo:hi]
+
+    def _substring_candidates(self, norm):
+        if len(norm) < Q:
+            return [idx for idx, title in enumerate(self.titles) if norm in title]
+        # every q-gram of norm must occur in a title that contains norm
+        rarest = min(set(qgrams(norm)), key=lambda g: len(self.postings.get(g, ())))
+        return [idx for idx in self.postings.get(rarest, ()) if norm in self.titles[idx]]
+
+    def _candidate_sources(self, norm):
+        """Returns (lengths, grams): the candidates of norm are every title of one of lengths and
+        every title containing one of grams."""
+        len1 = len(norm)
+        window = self._length_window(len1)
+        if not window:
+            return [], []
+
+        lengths = []
+        # q-gram lemma: a pair within distance d shares at least max(len) - Q + 1 - d*Q q-grams
+        min_shared = None
+        for len2 in window:
+            shared = max(len1, len2) - Q + 1 - self._max_distance(len1, len2) * Q
+            if shared <= 0:
+                # too short for the q-gram bound to say anything, so keep every title of this length
+                lengths.append(len2)
+            elif min_shared is None or shared < min_shared:
+                min_shared = shared
+        if min_shared is None:
+            return lengths, []
+
+        # prefix filter: a title sharing min_shared q-grams must contain one of the
+        # len(grams) - min_shared + 1 rarest q-grams of norm
+        grams = sorted(qgrams(norm), key=lambda g: len(self.postings.get(g, ())))
+        prefix = {g for g in grams[:len(grams) - min_shared + 1] if g in self.postings}
+        return lengths, prefix
+
+    def _fuzzy_candidates(self, norm):
+        lengths, grams = self._candidate_sources(norm)
+        candidates = set()
+        candidates.update(*(self.by_length[len2] for len2 in lengths), *(self.postings[g] for g in grams))
+        return candidates
+
+    def _candidate_mask(self, norm):
+        """_fuzzy_candidates() as a boolean numpy array over the bib titles."""
+        if self._arrays is None:
+            self._arrays = ({len2: np.array(idxs) for len2, idxs in self.by_length.items()},
+                            {g: np.array(idxs) for g, idxs in self.postings.items()})
+        length_arrays, gram_arrays = self._arrays
+        lengths, grams = self._candidate_sources(norm)
+        mask = np.zeros(len(self.titles), dtype=bool)
+        for len2 in lengths:
+            mask[length_arrays[len2]] = True
+        for g in grams:
+            mask[gram_arrays[g]] = True
+        return mask
+
+    def match(self, title):
+        """Returns the key of the first bib entry matching title, or None.
+
+        Same rule as the original linear scan: substring of the normalized bib title
+        or fuzz.ratio() above the threshold, first entry in file order wins.
+        """
+        if not self.titles:
+            return None
+        norm = normalize_text(title)
+        if not norm:
+            # the empty string is a substring of every title
+            return self.keys[0]
+
+        substring_hits = self._substring_candidates(norm)
+        first = substring_hits[0] if substring_hits else len(self.titles)
+        candidates = {idx: self.titles[idx] for idx in self._fuzzy_candidates(norm) if idx < first}
+        # score the whole candidate set in one call; thefuzz's ratio() is rapidfuzz's ratio rounded
+        for _, score, idx in process.extract(norm, candidates, scorer=raw_ratio,
+                                             score_cutoff=self.threshold, limit=None):
+            if int(round(score)) > self.threshold and idx < first:
+                first = idx
+        return self.keys[first] if first < len(self.titles) else None
+
+    def _first_substring(self, norm):
+        """Index of the first bib title containing norm, or None."""
+        hits = self._substring_candidates(norm)
+        return hits[0] if hits else None
+
+    def best_match(self, title):
+        """Returns the key of the best-scoring bib entry for title, or None.
+
+        The entry with the highest fuzz.ratio() above the threshold wins (the first in file order
+        on a tie); without one, the first entry whose title contains the DiVA title.
+        """
+        if not self.titles:
+            return None
+        norm = normalize_text(title)
+        best = None
+        if norm:
+            candidates = {idx: self.titles[idx] for idx in self._fuzzy_candidates(norm)}
+            for _, score, idx in process.extract(norm, candidates, scorer=raw_ratio,
+                                                 score_cutoff=self.threshold, limit=None):
+                score = int(round(score))
+                if score > self.threshold and (best is None or (score, -idx) > best):
+                    best = (score, -idx)
+        if best is not None:
+            return self.keys[-best[1]]
+        idx = self._first_substring(norm) if norm else 0  # the empty string is in every title
+        return self.keys[idx] if idx is not None else None
+
+    def match_all(self, titles, workers=-1):
+        """best_match() for a list of titles, scored in bulk by process.cdist in workers native
+        threads (-1: one per core). Returns a list of keys (or None).
+
+        Only the blocked candidates are scored: titles of similar length (whose candidate sets
+        overlap) are grouped, and each group is scored against the union of its candidates,
+        as long as that costs at most BATCH_OVERHEAD times the per-title candidate sets.
+        """
+        if np is None:
+            return [self.best_match(title) for title in titles]
+        if not self.titles:
+            return [None] * len(titles)
+        queries = [normalize_text(title) for title in titles]
+        best = [None] * len(queries)  # index of the best-scoring title above the threshold
+        order = sorted((i for i, norm in enumerate(queries) if norm), key=lambda i: len(queries[i]))
+        group, columns, work = [], None, 0
+        for i in order + [None]:
+            if i is not None:
+                candidates = self._candidate_mask(queries[i])
+                size = int(np.count_nonzero(candidates))
+                if not size:
+                    continue
+                merged = candidates if columns is None else columns | candidates
+                cells = (len(group) + 1) * int(np.count_nonzero(merged))
+                if not group or (cells <= CDIST_BLOCK_CELLS and cells <= BATCH_OVERHEAD * (work + size)):
+                    group.append(i)
+                    columns, work = merged, work + size
+                    continue
+            if group:
+                self._score_group(queries, group, np.flatnonzero(columns), best, workers)
+            if i is not None:
+                group, columns, work = [i], candidates, size
+
+        keys = []
+        for norm, idx in zip(queries, best):
+            if idx is None:
+                idx = self._first_substring(norm) if norm else 0  # the empty string is in every title
+            keys.append(self.keys[idx] if idx is not None else None)
+        return keys
+
+    def _score_group(self, queries, group, columns, best, workers):
+        """Sets best[i] for the queries of group, scored against the bib titles of columns (sorted indices)."""
+        scores = process.cdist([queries[i] for i in group], [self.titles[c] for c in columns],
+                               scorer=raw_ratio, score_cutoff=self.threshold, dtype=np.float64,
+                               workers=workers)
+        # fuzz.ratio() rounds half to even, as np.rint does
+        scores = np.rint(scores)
+        top = scores.argmax(axis=1)  # first maximum, i.e. file order on a tie
+        for i, col, score in zip(group, top, scores[np.arange(len(group)), top]):
+            if score > self.threshold:
+                best[i] = int(columns[col])
@@ -0,0 +1,34 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+# -*- mode: python; python-indent-offset: 4 -*-
+#
+# lib/unicode_blocks_generated.tex from scripts/codepoint_scan.py. Run from the repository root: python3 -m pytest tests
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+
+from codepoint_scan import fallback_config
+
+def make_usage(tmp_path):
+    greek = tmp_path / 'U+0370-U+03FF-Greek and Coptic.tex'
+    greek.write_text("\\newunicodechar{α}{\\iffontchar\\font`α α\\else{{\\greekfont α}}\\fi}\n", encoding='utf-8')
+    latin = tmp_path / 'U+0100-U+017F-Latin Extended-A.tex'
+    latin.write_text("\\newunicodechar{ć}{\\iffontchar\\font`ć ć\\else{{\\mystixmathfont ć}}\\fi}\n", encoding='utf-8')
+    return {(0x0100, 0x017F, 'Latin Extended-A', str(latin)): ['ć'],
+            (0x0370, 0x03FF, 'Greek and Coptic', str(greek)): ['α']}
+
+def input_lines(text):
+    return [line for line in text.splitlines() if 'input{' in line]
+
+def test_block_needing_a_disabled_font_option_is_commented_out(tmp_path):
+    text = fallback_config(make_usage(tmp_path), {'EnableGreekFont'}, {'ć': 'a.tex', 'α': 'a.tex'}, enabled=set())
+    latin, greek = input_lines(text)
+    assert latin.startswith('\\input{')
+    assert greek.startswith('%\\input{')
+    assert 'needs the EnableGreekFont class option' in text
+
+def test_block_is_input_when_its_font_option_is_enabled(tmp_path):
+    text = fallback_config(make_usage(tmp_path), {'EnableGreekFont'}, {'α': 'a.tex'}, enabled={'EnableGreekFont'})
+    assert all(line.startswith('\\input{') for line in input_lines(text))
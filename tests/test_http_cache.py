@@ -0,0 +1,94 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+# -*- mode: python; python-indent-offset: 4 -*-
+#
+# Conditional requests of scripts/http_cache.py against a local HTTP server.
+# Run from the repository root: python3 -m pytest tests
+
+import os
+import sys
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+
+import http_cache
+
+class Handler(BaseHTTPRequestHandler):
+    # served body, whether to send an ETag, and the requests seen (set per test)
+    body = b''
+    etag = True
+    requests = []
+
+    def do_GET(self):
+        tag = '"' + hashlib.sha256(self.body).hexdigest()[:16] + '"'
+        Handler.requests.append(self.headers.get('If-None-Match'))
+        if self.path == '/missing':
+            self.send_error(404)
+            return
+        if self.etag and self.headers.get('If-None-Match') == tag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        if self.etag:
+            self.send_header('ETag', tag)
+        self.send_header('Content-Length', str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    monkeypatch.setattr(http_cache, 'CACHE_DIR', str(tmp_path / 'http'))
+    Handler.body, Handler.etag, Handler.requests = b'<modsCollection/>', True, []
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, kwargs={'poll_interval': 0.01}, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+    httpd.server_close()
+
+def read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+def test_first_fetch_stores_the_body(server):
+    body_path, sha, changed = http_cache.fetch(server + '/export')
+    assert changed and read(body_path) == b'<modsCollection/>'
+    assert sha == hashlib.sha256(b'<modsCollection/>').hexdigest()
+    assert not [name for name in os.listdir(http_cache.CACHE_DIR) if name.endswith('.part')]
+
+def test_unchanged_resource_costs_a_304(server):
+    http_cache.fetch(server + '/export')
+    body_path, sha, changed = http_cache.fetch(server + '/export')
+    assert not changed and read(body_path) == b'<modsCollection/>'
+    assert Handler.requests[0] is None and Handler.requests[1] is not None
+    assert 'checked' in http_cache.load_entry(server + '/export')
+
+def test_same_body_without_etag_is_not_a_change(server):
+    Handler.etag = False
+    http_cache.fetch(server + '/export')
+    _, _, changed = http_cache.fetch(server + '/export')
+    assert not changed
+
+def test_changed_body_replaces_the_cached_one(server):
+    _, old_sha, _ = http_cache.fetch(server + '/export')
+    Handler.body = b'<modsCollection><mods/></modsCollection>'
+    body_path, sha, changed = http_cache.fetch(server + '/export')
+    assert changed and sha != old_sha and read(body_path) == Handler.body
+
+def test_offline_replays_the_cache_without_contacting_the_server(server):
+    assert http_cache.fetch(server + '/export', offline=True) == (None, None, False)
+    http_cache.fetch(server + '/export')
+    body_path, _, changed = http_cache.fetch(server + '/export', offline=True)
+    assert not changed and read(body_path) == b'<modsCollection/>'
+    assert len(Handler.requests) == 1
+
+def test_http_error_keeps_nothing(server):
+    assert http_cache.fetch(server + '/missing') == (None, None, False)
+    assert http_cache.load_entry(server + '/missing') is None
@@ -0,0 +1,49 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+# -*- mode: python; python-indent-offset: 4 -*-
+#
+# Identifier join of scripts/identifier_index.py. Run from the repository root: python3 -m pytest tests
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+
+from identifier_index import IdentifierIndex, normalize_doi, normalize_isbn, normalize_patent
+
+ENTRIES = [
+    {'ID': 'paperA', 'ENTRYTYPE': 'article', 'doi': '10.1109/ABC.2020.123', 'title': 'A'},
+    {'ID': 'bookB', 'ENTRYTYPE': 'book', 'isbn': '0-306-40615-2', 'title': 'B'},
+    {'ID': 'chapterC', 'ENTRYTYPE': 'incollection', 'isbn': '978-0-306-40615-7', 'title': 'C'},
+    {'ID': 'patentD', 'ENTRYTYPE': 'patent', 'number': 'US 7107453 B2', 'title': 'D'},
+    {'ID': 'paperE', 'ENTRYTYPE': 'article', 'doi': '10.1109/abc.2020.123', 'title': 'E duplicate DOI'},
+]
+
+def test_normalizers():
+    assert normalize_doi('https://doi.org/10.1109/ABC.2020.123') == '10.1109/abc.2020.123'
+    assert normalize_doi('doi: 10.1109/ABC.2020.123') == '10.1109/abc.2020.123'
+    assert normalize_isbn('0-306-40615-2') == normalize_isbn('978-0-306-40615-7') == '9780306406157'
+    assert normalize_isbn('12345') is None
+    assert normalize_patent('US7107453B2') == normalize_patent('7107453') == '7107453'
+
+def test_match_joins_on_normalized_identifiers():
+    index = IdentifierIndex(ENTRIES)
+    assert index.match([('doi', 'https://dx.doi.org/10.1109/abc.2020.123')]) == ('paperA', 'doi')
+    assert index.match([('isbn', '9780306406157')]) == ('bookB', 'isbn')
+    assert index.match([('patent', 'US 7,107,453')]) == ('patentD', 'patent')
+    assert index.match([('doi', '10.1/none'), ('urn', 'x')]) == (None, None)
+
+def test_isbn_of_a_chapter_does_not_name_the_chapter():
+    index = IdentifierIndex([entry for entry in ENTRIES if entry['ID'] == 'chapterC'])
+    assert index.match([('isbn', '9780306406157')]) == (None, None)
+
+def test_doi_wins_over_isbn():
+    index = IdentifierIndex(ENTRIES)
+    assert index.match([('isbn', '0306406152'), ('doi', '10.1109/ABC.2020.123')]) == ('paperA', 'doi')
+
+def test_included_bib_aliases_resolve_to_the_references_key():
+    alias = {'ID': 'paperF_pub', 'ENTRYTYPE': 'article', 'doi': '10.5555/f'}
+    orphan = {'ID': 'paperG_pub', 'ENTRYTYPE': 'article', 'doi': '10.5555/g'}
+    index = IdentifierIndex(ENTRIES + [{'ID': 'paperF', 'ENTRYTYPE': 'article', 'title': 'F'}], [alias, orphan])
+    assert index.match([('doi', '10.5555/F')]) == ('paperF', 'doi')
+    assert index.match([('doi', '10.5555/g')]) == (None, None)
@@ -0,0 +1,59 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+# -*- mode: python; python-indent-offset: 4 -*-
+#
+# Snippet merging of scripts/merge_config.py. Run from the repository root: python3 -m pytest tests
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+
+from merge_config import index_commands, merge_text, parse_snippet
+
+def test_commented_line_with_an_unbalanced_brace_ends_at_its_line():
+    # the brace left open on the commented line is closed by an active line below it
+    main = "%\\title{Old draft\n\\subtitle{Kept}}\n\\author{Kept too}\n"
+    occurrence = index_commands(main)['title'][0]
+    assert occurrence.commented and main[occurrence.start:occurrence.end] == "%\\title{Old draft"
+    merged, actions = merge_text(main, ["\\title{New}"])
+    assert merged == "\\title{New}\n\\subtitle{Kept}}\n\\author{Kept too}\n"
+    assert actions == [('title', 'replaced')]
+
+def test_commented_multiline_argument_does_not_swallow_active_lines():
+    main = "% \\title{Start of a\n\\kthid{u1abcdef}\n% rest}\n"
+    occurrence = index_commands(main)['title'][0]
+    assert occurrence.commented and main[occurrence.start:occurrence.end] == "% \\title{Start of a"
+    merged, _ = merge_text(main, ["\\title{New}"])
+    assert merged == "\\title{New}\n\\kthid{u1abcdef}\n% rest}\n"
+
+def test_active_line_is_preferred_over_commented_one():
+    main = "%\\title{Commented}\n\\title{Active}\n"
+    merged, _ = merge_text(main, ["\\title{New}"])
+    assert merged == "%\\title{Commented}\n\\title{New}\n"
+
+def test_nested_braces_spanning_lines_are_replaced_whole():
+    main = "\\title{A {nested\n{title}} here} % note\n\\subtitle{S}\n"
+    assert index_commands(main)['title'][0].args == "{A {nested\n{title}} here}"
+    merged, _ = merge_text(main, ["\\title{One {nested} title}"])
+    assert merged == "\\title{One {nested} title}\n\\subtitle{S}\n"
+
+def test_escaped_braces_and_comments_inside_arguments():
+    snippet = "\\title{50\\% of \\{x\\} % a comment with }\n rest}\n\\year{2026}"
+    assert parse_snippet(snippet) == [('title', "{50\\% of \\{x\\} % a comment with }\n rest}"),
+                                      ('year', "{2026}")]
+
+def test_optional_arguments_are_kept_with_the_command():
+    assert parse_snippet("\\title[Short]{Long {title}}\n\\setDate[x]{2026}{01}") == [
+        ('title', "[Short]{Long {title}}"), ('setDate', "[x]{2026}{01}")]
+    main = "\\title[Old]{Old title}\n\\subtitle{S}\n"
+    merged, _ = merge_text(main, ["\\title[Short]{New title}"])
+    assert merged == "\\title[Short]{New title}\n\\subtitle{S}\n"
+
+def test_optional_argument_with_a_brace_group_containing_a_bracket():
+    assert parse_snippet("\\title[{a]b}]{T}") == [('title', "[{a]b}]{T}")]
+
+def test_missing_command_is_prepended_and_last_snippet_wins():
+    merged, actions = merge_text("\\title{T}\n", ["\\kthid{u1aaaaaa}", "\\kthid{u1bbbbbb}"])
+    assert merged == "\\kthid{u1bbbbbb}\n\\title{T}\n"
+    assert actions == [('kthid', 'prepended')]
@@ -0,0 +1,75 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+# -*- mode: python; python-indent-offset: 4 -*-
+#
+# The inspection cache of scripts/pdf_inspect.py. Run from the repository root: python3 -m pytest tests
+
+import os
+import sys
+import json
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+
+import pdf_inspect
+
+pypdf = pytest.importorskip('pypdf')
+
+def write_pdf(path, pages, width=595, height=842):
+    writer = pypdf.PdfWriter()
+    for _ in range(pages):
+        writer.add_blank_page(width=width, height=height)
+    with open(path, 'wb') as f:
+        writer.write(f)
+    return str(path)
+
+@pytest.fixture
+def cache_file(tmp_path, monkeypatch):
+    path = tmp_path / '.cache' / 'pdf_inspect.json'
+    monkeypatch.setattr(pdf_inspect, 'CACHE_FILE', str(path))
+    return path
+
+def read_cache(cache_file):
+    return json.loads(cache_file.read_text(encoding='utf-8'))
+
+def test_unchanged_file_is_not_reopened(tmp_path, cache_file, monkeypatch):
+    a = write_pdf(tmp_path / 'a.pdf', 2)
+    result = pdf_inspect.inspect_pdfs([a])[a]
+    assert result['pages'] == 2 and result['boxes'] == [[595.0, 842.0, 2]]
+
+    def fail(path):
+        raise AssertionError(f"{path} was inspected again")
+    monkeypatch.setattr(pdf_inspect, 'inspect_pdf', fail)
+    assert pdf_inspect.inspect_pdfs([a])[a]['pages'] == 2
+
+def test_changed_file_is_inspected_again(tmp_path, cache_file):
+    a = write_pdf(tmp_path / 'a.pdf', 2)
+    pdf_inspect.inspect_pdfs([a])
+    write_pdf(tmp_path / 'a.pdf', 5)
+    assert pdf_inspect.inspect_pdfs([a])[a]['pages'] == 5
+    assert read_cache(cache_file)[a]['pages'] == 5
+
+def test_narrower_call_keeps_the_other_entries(tmp_path, cache_file):
+    a = write_pdf(tmp_path / 'a.pdf', 1)
+    b = write_pdf(tmp_path / 'b.pdf', 3)
+    pdf_inspect.inspect_pdfs([a])
+    pdf_inspect.inspect_pdfs([b])
+    assert set(read_cache(cache_file)) == {a, b}
+    write_pdf(tmp_path / 'a.pdf', 4)
+    assert set(pdf_inspect.inspect_pdfs([a])) == {a}
+    assert read_cache(cache_file)[b]['pages'] == 3
+
+def test_entries_of_deleted_files_are_pruned(tmp_path, cache_file):
+    a = write_pdf(tmp_path / 'a.pdf', 1)
+    b = write_pdf(tmp_path / 'b.pdf', 1)
+    pdf_inspect.inspect_pdfs([a])
+    pdf_inspect.inspect_pdfs([b])
+    os.remove(b)
+    pdf_inspect.inspect_pdfs([a])
+    assert set(read_cache(cache_file)) == {a}
+
+def test_unreadable_pdf_is_an_error_entry(tmp_path, cache_file):
+    bad = tmp_path / 'bad.pdf'
+    bad.write_bytes(b'not a pdf')
+    result = pdf_inspect.inspect_pdfs([str(bad), str(tmp_path / 'missing.pdf')])
+    assert list(result) == [str(bad)] and 'error' in result[str(bad)]
@@ -0,0 +1,65 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+# -*- mode: python; python-indent-offset: 4 -*-
+#
+# The SQLite index of scripts/pub_db.py. Run from the repository root: python3 -m pytest tests
+
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+
+from pub_db import PublicationDB, load_publications
+from pub_store import PublicationStore, dump_map
+
+PUB_MAP = {
+    'diva2:3': {'title': 'C', 'status': 'included', 'label': 'paper:C', 'tab_index': 2, 'year': '2024'},
+    'diva2:1': {'title': 'A', 'status': 'unprocessed', 'year': '2020', 'authors': ['Kostić, Dejan']},
+    'diva2:2': {'title': 'B', 'status': 'included', 'label': 'paper:B', 'tab_index': 1, 'year': '2022'},
+}
+
+@pytest.fixture
+def map_file(tmp_path):
+    path = tmp_path / 'publications_map.json'
+    path.write_text(dump_map(PUB_MAP), encoding='utf-8')
+    return path
+
+def test_index_gives_the_same_records_as_the_map(map_file):
+    without_index = load_publications(map_file, status='included')
+    with PublicationDB(map_file) as db:
+        db.sync()
+        assert db.query(status='included') == without_index
+        assert list(db.query(status='included', order_by='tab_index')) == ['diva2:2', 'diva2:3']
+    assert load_publications(map_file, status='included') == without_index
+    assert list(load_publications(map_file)) == list(PUB_MAP)
+
+def test_export_is_lossless(map_file, tmp_path):
+    with PublicationDB(map_file) as db:
+        db.sync()
+        db.export_map(tmp_path / 'out.json')
+    assert (tmp_path / 'out.json').read_text(encoding='utf-8') == map_file.read_text(encoding='utf-8')
+
+def test_journal_patches_are_replayed_into_the_index(map_file):
+    with PublicationDB(map_file) as db:
+        db.sync()
+        store = PublicationStore(map_file)
+        version = store.patch({'diva2:1': {'status': 'included', 'tab_index': 3},
+                               'diva2:9': {'title': 'New', 'status': 'unprocessed'}})
+        assert db.sync() == version
+        assert list(db.query(status='included', order_by='tab_index')) == ['diva2:2', 'diva2:3', 'diva2:1']
+        assert list(db.query()) == ['diva2:3', 'diva2:1', 'diva2:2', 'diva2:9']
+
+def test_rewritten_map_is_imported_again(map_file):
+    with PublicationDB(map_file) as db:
+        db.sync()
+    changed = dict(PUB_MAP, **{'diva2:2': dict(PUB_MAP['diva2:2'], status='excluded')})
+    map_file.write_text(dump_map(changed), encoding='utf-8')
+    os.utime(map_file, ns=(0, 0))  # a different mtime even on a coarse clock
+    assert list(load_publications(map_file, status='included')) == ['diva2:3']
+
+def test_query_rejects_fields_that_are_not_indexed(map_file):
+    with PublicationDB(map_file) as db:
+        db.sync()
+        with pytest.raises(ValueError):
+            db.query(title='A')
@@ -0,0 +1,46 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+# -*- mode: python; python-indent-offset: 4 -*-
+#
+# Journal recovery of scripts/pub_store.py. Run from the repository root: python3 -m pytest tests
+
+import os
+import sys
+import json
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+
+from pub_store import PublicationStore
+
+def make_store(tmp_path):
+    map_file = tmp_path / 'publications_map.json'
+    map_file.write_text(json.dumps({'a': {'title': 'x'}}), encoding='utf-8')
+    return PublicationStore(map_file)
+
+def test_patch_after_torn_append_survives_compaction(tmp_path):
+    store = make_store(tmp_path)
+    store.patch({'a': {'title': 'y'}})
+    # an append interrupted by a crash: half a line, no newline
+    with open(store.journal_file, 'a', encoding='utf-8') as f:
+        f.write('{"v": 2, "id": "a", "set": {"tit')
+    store.patch({'a': {'title': 'z'}})
+    store.patch({'a': {'label': 'paper:A'}})
+    assert store.load()[0] == {'a': {'title': 'z', 'label': 'paper:A'}}
+
+    store.compact()
+    with open(store.map_file, 'r', encoding='utf-8') as f:
+        assert json.load(f) == {'a': {'title': 'z', 'label': 'paper:A'}}
+
+def test_complete_last_line_without_newline_is_kept(tmp_path):
+    store = make_store(tmp_path)
+    with open(store.journal_file, 'w', encoding='utf-8') as f:
+        f.write('{"v": 1, "id": "a", "set": {"title": "y"}}')
+    store.patch({'a': {'label': 'paper:A'}})
+    assert store.load() == ({'a': {'title': 'y', 'label': 'paper:A'}}, 2)
+
+def test_unreadable_line_does_not_hide_later_entries(tmp_path):
+    store = make_store(tmp_path)
+    with open(store.journal_file, 'w', encoding='utf-8') as f:
+        f.write('{"v": 1, "id": "a", "set": {"ti{"v": 2, "id": "a", "set": {"title": "y"}}\n'
+                '{"v": 3, "id": "a", "set": {"label": "paper:A"}}\n')
+    assert store.load()[0] == {'a': {'title': 'x', 'label': 'paper:A'}}
@@ -0,0 +1,35 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+# -*- mode: python; python-indent-offset: 4 -*-
+#
+# Escaping of BibTeX-derived names in scripts/generate_thesis_contributions.py.
+# Run from the repository root: python3 -m pytest tests
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+
+from pub_record import Publication
+from latex_escape import clean_latex_string as escape_latex
+from generate_thesis_contributions import clean_latex_string, contribution_fragment
+
+def test_bibtex_tie_is_kept_as_a_tie():
+    assert clean_latex_string('{Maguire~Jr.}, Gerald Q.') == 'Maguire~Jr., Gerald Q.'
+
+def test_non_breaking_space_is_written_as_a_tie():
+    assert escape_latex('Maguire\u00a0Jr.,  Gerald Q. & $a\u00a0b$') == 'Maguire~Jr., Gerald Q. \\& $a~b$'
+
+def test_tied_names_in_fragment_are_not_escaped_as_tildes():
+    paper = Publication({
+        'title': 'Fast~Paths & Slow Paths', 'status': 'included', 'label': 'paper:A',
+        'equal_contributors': ['Maguire~Jr., Gerald Q.', 'Kostić, Dejan'],
+        'credit_contributions': {'Maguire~Jr., Gerald Q.': ['Writing – Review & Editing']},
+    })
+    fragment = contribution_fragment(paper)
+    assert 'textasciitilde' not in fragment
+    assert 'Maguire~Jr., Gerald Q.' in fragment
+    assert r'Review \& Editing' in fragment
+
+def test_literal_tilde_outside_bibtex_names_is_still_escaped():
+    assert escape_latex('~user') == r'\textasciitilde{}user'
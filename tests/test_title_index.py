@@ -0,0 +1,75 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+# -*- mode: python; python-indent-offset: 4 -*-
+#
+# Bib title matching of scripts/title_index.py. Run from the repository root: python3 -m pytest tests
+
+import os
+import sys
+import random
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+
+from thefuzz import fuzz
+from title_index import TitleIndex, normalize_name, normalize_text, bib_title
+
+WORDS = "adaptive network packet cache latency wireless patient imaging dose graph neural lead " \
+        "identification estimation autoencoder anomaly detection radio tag hospital the of for and with".split()
+
+def make_titles(rng, count):
+    return [" ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 9))).capitalize() for _ in range(count)]
+
+def linear_match(title, bib_entries, threshold=90):
+    """The loop sync_discovery() used before the index: first substring or fuzz.ratio() hit wins."""
+    norm = normalize_text(title)
+    for entry in bib_entries:
+        norm_bib = normalize_text(bib_title(entry))
+        if norm in norm_bib or fuzz.ratio(norm, norm_bib) > threshold:
+            return entry['ID']
+    return None
+
+def make_queries(rng, titles, count):
+    queries = []
+    for _ in range(count):
+        title = rng.choice(titles)
+        choice = rng.random()
+        if choice < 0.3:
+            pos = rng.randrange(len(title))
+            title = title[:pos] + rng.choice("aeiou") + title[pos + 1:]
+        elif choice < 0.5:
+            title = title.rsplit(" ", 1)[0]
+        elif choice < 0.6:
+            title = "{" + title.replace(" ", "} {") + "}"
+        elif choice < 0.8:
+            title = make_titles(rng, 1)[0]
+        queries.append(title)
+    return queries + ["", "x", "Of"]
+
+def test_match_agrees_with_the_linear_thefuzz_loop():
+    rng = random.Random(3)
+    titles = make_titles(rng, 400)
+    entries = [{'ID': f"key{i}", 'title': title} for i, title in enumerate(titles)]
+    index = TitleIndex(entries)
+    for query in make_queries(rng, titles, 300):
+        assert index.match(query) == linear_match(query, entries), query
+
+def test_match_all_agrees_with_best_match():
+    rng = random.Random(7)
+    titles = make_titles(rng, 400)
+    index = TitleIndex([{'ID': f"key{i}", 'title': title} for i, title in enumerate(titles)])
+    queries = make_queries(rng, titles, 300)
+    assert index.match_all(queries) == [index.best_match(query) for query in queries]
+
+def test_match_all_prefers_the_best_score_over_file_order():
+    entries = [{'ID': 'near', 'title': 'Positive Patient Identification using RFID and Wireless Network'},
+               {'ID': 'exact', 'title': 'Positive Patient Identification using {RFID} and Wireless Networks'}]
+    index = TitleIndex(entries)
+    assert index.match_all(["Positive Patient Identification using RFID and Wireless Networks",
+                            "Patient Identification", "Unrelated"]) == ['exact', 'near', None]
+
+def test_normalize_name_matches_the_diva_and_bibtex_spellings():
+    names = ["Maguire Jr., Gerald Q.", "Gerald Q. Maguire Jr.", "Maguire, Jr., Gerald Q.",
+             "Gerald Q. {Maguire~Jr.}", "  Maguire Jr.,   Gerald Q. "]
+    assert {normalize_name(name) for name in names} == {"gerald q maguire jr"}
+    assert normalize_name("Kostić, Dejan") == normalize_name("Dejan Kostić") == "dejan kostić"
+    assert normalize_name("Maguire, G.") != normalize_name("Maguire, Gerald Q.")